@@ -0,0 +1,229 @@
+"""Admission control: per-client rate limits and load shedding.
+
+``AdmissionMiddleware`` decides, before a request reaches the app, whether
+to serve it:
+
+1. Each client (the user of a valid bearer token, else the remote address)
+   has a token bucket per route template, refilled at ``rate`` requests per
+   second up to ``burst``. Expensive routes cost more than one token
+   (``ROUTE_COSTS``). A request finding its bucket empty gets a 429 with a
+   ``Retry-After`` of the time until enough tokens are back, so a retry
+   storm from one client is turned away without touching MongoDB.
+2. At most ``max_concurrency`` admitted requests run at once; the others
+   wait in a bounded FIFO queue. A request is shed with a 503 and a
+   ``Retry-After`` when the queue is full, when the expected wait (queue
+   length times the recent service time, over the concurrency) already
+   exceeds ``max_wait``, or when it has waited ``max_wait`` without being
+   admitted. Requests that are admitted are then served with the latency
+   of a bounded load instead of everyone's p99 growing with the backlog.
+
+Every decision is counted in ``admission_decisions_total`` by route and
+decision. Paths outside ``/api`` (``/metrics``) and CORS preflights are
+never limited, so the app stays observable under overload.
+
+Configured from the environment (``AdmissionConfig.from_env``)::
+
+    RATE_LIMIT_RPS                requests per second per client and route (0 disables)
+    RATE_LIMIT_BURST              bucket size, default twice the rate
+    MAX_CONCURRENT_REQUESTS       requests served at once (0 disables queueing and shedding)
+    ADMISSION_QUEUE_SIZE          requests waiting for a slot
+    ADMISSION_MAX_QUEUE_WAIT_MS   longest wait before a request is shed
+"""
+import asyncio
+import math
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import Callable, Deque, Dict, Mapping, Optional, Tuple
+
+import orjson
+from starlette.routing import Match
+
+from metrics import ADMISSION_DECISIONS, ADMISSION_QUEUE_DEPTH, ADMISSION_QUEUE_WAIT
+
+# Tokens taken by a request, per "METHOD /route/template"; 1 when absent
+ROUTE_COSTS: Dict[str, float] = {
+    "POST /api/import": 10,
+    "GET /api/export": 10,
+    "POST /api/{collection}/bulk": 5,
+    "DELETE /api/{collection}/bulk": 5,
+    "GET /api/search": 2,
+    "GET /api/analytics/cycles": 2,
+    "GET /api/analytics/symptoms": 2,
+}
+# Buckets kept in memory; the least recently used are dropped (and start full again)
+MAX_BUCKETS = 100_000
+
+
+@dataclass
+class AdmissionConfig:
+    rate: float = 20.0
+    burst: float = 40.0
+    max_concurrency: int = 128
+    queue_size: int = 256
+    max_wait: float = 0.5
+
+    @classmethod
+    def from_env(cls, environ: Mapping[str, str]) -> "AdmissionConfig":
+        rate = float(environ.get("RATE_LIMIT_RPS") or cls.rate)
+        return cls(
+            rate=rate,
+            burst=float(environ.get("RATE_LIMIT_BURST") or 2 * rate),
+            max_concurrency=int(environ.get("MAX_CONCURRENT_REQUESTS") or cls.max_concurrency),
+            queue_size=int(environ.get("ADMISSION_QUEUE_SIZE") or cls.queue_size),
+            max_wait=float(environ.get("ADMISSION_MAX_QUEUE_WAIT_MS") or cls.max_wait * 1000) / 1000,
+        )
+
+
+class TokenBuckets:
+    """One token bucket per key, refilled continuously."""
+
+    def __init__(self, rate: float, burst: float, max_buckets: int = MAX_BUCKETS):
+        self.rate = rate
+        self.burst = burst
+        self.max_buckets = max_buckets
+        # key -> (tokens, monotonic time of the last update)
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    def take(self, key: str, cost: float = 1.0, now: Optional[float] = None) -> float:
+        """Take ``cost`` tokens; returns 0 if they were available, else the seconds until they are."""
+        now = time.monotonic() if now is None else now
+        tokens, updated = self._buckets.pop(key, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+        cost = min(cost, self.burst)
+        wait = 0.0
+        if tokens >= cost:
+            tokens -= cost
+        else:
+            wait = (cost - tokens) / self.rate
+        self._buckets[key] = (tokens, now)
+        while len(self._buckets) > self.max_buckets:
+            self._buckets.popitem(last=False)
+        return wait
+
+
+class ConcurrencyLimiter:
+    """At most ``limit`` holders, the others wait in a bounded FIFO queue."""
+
+    def __init__(self, limit: int, queue_size: int, max_wait: float):
+        self.limit = limit
+        self.queue_size = queue_size
+        self.max_wait = max_wait
+        self.active = 0
+        # Moving average of how long a slot is held, to predict queueing delay
+        self.service_time = 0.0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    def expected_wait(self) -> float:
+        return (len(self._waiters) + 1) * self.service_time / self.limit
+
+    async def acquire(self) -> Optional[str]:
+        """Take a slot; returns None once admitted, else why the request is shed."""
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            return None
+        if len(self._waiters) >= self.queue_size:
+            return "queue_full"
+        if self.expected_wait() > self.max_wait:
+            return "queue_delay"
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        ADMISSION_QUEUE_DEPTH.inc()
+        try:
+            # A slot handed over as the wait times out is still taken (wait_for returns it)
+            await asyncio.wait_for(waiter, self.max_wait)
+            return None
+        except asyncio.TimeoutError:
+            return "queue_timeout"
+        except asyncio.CancelledError:
+            # The client went away; pass on a slot that was handed over meanwhile
+            if waiter.done() and not waiter.cancelled():
+                self._hand_over()
+            raise
+        finally:
+            ADMISSION_QUEUE_DEPTH.dec()
+            if not waiter.done() or waiter.cancelled():
+                try:
+                    self._waiters.remove(waiter)
+                except ValueError:
+                    pass
+
+    def release(self, held: float) -> None:
+        self.service_time = held if not self.service_time else 0.9 * self.service_time + 0.1 * held
+        self._hand_over()
+
+    def _hand_over(self) -> None:
+        # Give the slot to the first request still waiting, or free it
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+
+async def _reject(send, status: int, detail: str, retry_after: float) -> None:
+    headers = [
+        (b"content-type", b"application/json"),
+        (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+    ]
+    await send({"type": "http.response.start", "status": status, "headers": headers})
+    await send({"type": "http.response.body", "body": orjson.dumps({"detail": detail})})
+
+
+class AdmissionMiddleware:
+    """ASGI middleware applying the rate limits and the concurrency limit of ``config``."""
+
+    def __init__(self, app, routes, identify: Callable[[dict], str], config: AdmissionConfig):
+        self.app = app
+        self.routes = routes
+        self.identify = identify
+        self.config = config
+        self.buckets = TokenBuckets(config.rate, config.burst) if config.rate > 0 else None
+        self.limiter = (ConcurrencyLimiter(config.max_concurrency, config.queue_size, config.max_wait)
+                        if config.max_concurrency > 0 else None)
+
+    def _route(self, scope) -> Optional[str]:
+        for route in self.routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                # Lets MetricsMiddleware label rejected requests by route too
+                scope["route"] = route
+                return route.path
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if (scope["type"] != "http" or scope["method"] == "OPTIONS"
+                or not scope["path"].startswith("/api")):
+            await self.app(scope, receive, send)
+            return
+
+        template = self._route(scope) or "<unmatched>"
+        route_key = f"{scope['method']} {template}"
+
+        if self.buckets is not None:
+            wait = self.buckets.take(f"{self.identify(scope)}|{route_key}", ROUTE_COSTS.get(route_key, 1.0))
+            if wait:
+                ADMISSION_DECISIONS.inc(template, "rate_limited")
+                await _reject(send, 429, "Too many requests", wait)
+                return
+
+        if self.limiter is None:
+            ADMISSION_DECISIONS.inc(template, "admitted")
+            await self.app(scope, receive, send)
+            return
+
+        queued = time.perf_counter()
+        shed = await self.limiter.acquire()
+        admitted = time.perf_counter()
+        if shed is not None:
+            ADMISSION_DECISIONS.inc(template, shed)
+            await _reject(send, 503, "Server overloaded, retry later", self.config.max_wait)
+            return
+        waited = admitted - queued
+        ADMISSION_QUEUE_WAIT.observe(waited)
+        ADMISSION_DECISIONS.inc(template, "queued" if waited > 0.001 else "admitted")
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.limiter.release(time.perf_counter() - admitted)
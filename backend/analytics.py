@@ -0,0 +1,157 @@
+"""Vectorized cycle regularity and symptom analytics.
+
+A user's cycle start dates and symptom entries are loaded into numpy arrays
+of day numbers (days since the epoch) and every statistic is computed with
+array operations: gaps with ``np.diff``, rolling means with pandas, cycle
+days of symptoms with ``np.searchsorted`` against the start dates and the
+symptom x cycle-day heatmap with one ``crosstab``. Nothing iterates over
+records in Python, so the functions stay cheap when run for every user by
+the batch jobs.
+"""
+from typing import Dict, Iterable, List
+
+import numpy as np
+import pandas as pd
+
+from predictions import MAX_GAP_DAYS, MIN_GAP_DAYS
+
+DEFAULT_ROLLING_WINDOW = 3
+DEFAULT_HEATMAP_DAYS = 35
+
+# Cycle lengths outside this range are flagged irregular
+REGULAR_MIN_DAYS = 21
+REGULAR_MAX_DAYS = 35
+# ...as are lengths this far from the median of the preceding window
+MAX_DEVIATION_DAYS = 7
+
+# (phase, first cycle day, last cycle day); the luteal phase runs to the end
+PHASES = [
+    ("menstrual", 1, 5),
+    ("follicular", 6, 13),
+    ("ovulatory", 14, 16),
+    ("luteal", 17, None),
+]
+
+
+def day_numbers(values: Iterable) -> np.ndarray:
+    """Parse ``YYYY-MM-DD`` strings into int64 day numbers, dropping invalid ones."""
+    parsed = pd.to_datetime(pd.Series(list(values), dtype="object").astype(str).str[:10],
+                            format="%Y-%m-%d", errors="coerce")
+    return parsed.dropna().to_numpy().astype("datetime64[D]").astype(np.int64)
+
+
+def _iso(days: np.ndarray) -> List[str]:
+    return np.datetime_as_string(days.astype("datetime64[D]")).tolist()
+
+
+def _number(value, digits: int = 2):
+    """JSON-friendly scalar: None for NaN, rounded floats, plain ints."""
+    if value is None or pd.isna(value):
+        return None
+    if float(value).is_integer():
+        return int(value)
+    return round(float(value), digits)
+
+
+def cycle_statistics(start_dates: Iterable[str], window: int = DEFAULT_ROLLING_WINDOW) -> dict:
+    """Length statistics, rolling averages and irregularity flags of a cycle history.
+
+    The length of a cycle is the gap to the next start, so the latest cycle
+    has none. Gaps outside MIN_GAP_DAYS..MAX_GAP_DAYS are logging artifacts
+    and are left out of every statistic.
+    """
+    starts = np.unique(day_numbers(start_dates))
+    gaps = np.diff(starts).astype(float)
+    valid = (gaps >= MIN_GAP_DAYS) & (gaps <= MAX_GAP_DAYS)
+    lengths = pd.Series(np.where(valid, gaps, np.nan))
+
+    rolling = lengths.rolling(window, min_periods=1).mean()
+    # Median, so that one outlier does not get its normal successors flagged
+    baseline = lengths.shift(1).rolling(window, min_periods=1).median()
+    out_of_range = (lengths < REGULAR_MIN_DAYS) | (lengths > REGULAR_MAX_DAYS)
+    deviates = (lengths - baseline).abs() > MAX_DEVIATION_DAYS
+    irregular = (out_of_range | deviates) & valid
+
+    sample = lengths.dropna().to_numpy()
+    mean = sample.mean() if sample.size else np.nan
+    variance = sample.var(ddof=1) if sample.size > 1 else np.nan
+    std_dev = np.sqrt(variance)
+
+    # One entry per cycle; the latest cycle is still running
+    count = starts.size
+    per_cycle = pd.DataFrame({
+        "startDate": _iso(starts),
+        "length": np.append(lengths.to_numpy(), np.nan)[:count],
+        "rollingAvg": np.append(rolling.to_numpy(), np.nan)[:count],
+        "irregular": np.append(irregular.to_numpy(), False)[:count],
+    })
+    per_cycle["rollingAvg"] = per_cycle["rollingAvg"].round(2)
+    cycles = per_cycle.astype(object).where(per_cycle.notna(), None).to_dict("records")
+
+    return {
+        "cycleCount": int(starts.size),
+        "sampleSize": int(sample.size),
+        "meanLength": _number(mean),
+        "variance": _number(variance),
+        "stdDev": _number(std_dev),
+        "coefficientOfVariation": _number(std_dev / mean if sample.size > 1 else np.nan, 4),
+        "minLength": _number(sample.min()) if sample.size else None,
+        "maxLength": _number(sample.max()) if sample.size else None,
+        "irregularCount": int(irregular.sum()),
+        "rollingWindow": window,
+        "cycles": cycles,
+    }
+
+
+def symptom_heatmap(start_dates: Iterable[str], symptom_entries: List[dict],
+                    max_day: int = DEFAULT_HEATMAP_DAYS) -> dict:
+    """Count each symptom per cycle day (day 1 = period start).
+
+    Entries dated before the first cycle or after ``max_day`` of their
+    cycle are counted as ``unassigned``. Symptoms are ordered by total count.
+    """
+    starts = np.unique(day_numbers(start_dates))
+    frame = pd.DataFrame(symptom_entries, columns=["date", "symptoms"])
+    dates = pd.to_datetime(frame["date"].astype(str).str[:10], format="%Y-%m-%d", errors="coerce")
+    frame = frame[dates.notna().to_numpy()]
+    days = dates.dropna().to_numpy().astype("datetime64[D]").astype(np.int64)
+
+    if starts.size:
+        # The cycle of each entry is the last one starting on or before its date
+        cycle_index = np.searchsorted(starts, days, side="right") - 1
+        cycle_day = days - starts[np.clip(cycle_index, 0, None)] + 1
+        assigned = (cycle_index >= 0) & (cycle_day <= max_day)
+    else:
+        cycle_day = np.zeros_like(days)
+        assigned = np.zeros(days.size, dtype=bool)
+
+    exploded = frame[assigned].assign(day=cycle_day[assigned]).explode("symptoms", ignore_index=True).dropna(subset=["symptoms"])
+    day_columns = range(1, max_day + 1)
+    table = pd.crosstab(exploded["symptoms"], exploded["day"]).reindex(columns=day_columns, fill_value=0)
+    totals = table.sum(axis=1)
+    table = table.loc[totals.sort_values(ascending=False, kind="stable").index]
+
+    phase_counts: Dict[str, List[int]] = {}
+    for phase, first, last in PHASES:
+        columns = [day for day in day_columns if day >= first and (last is None or day <= last)]
+        phase_counts[phase] = table[columns].sum(axis=1).astype(int).tolist()
+
+    return {
+        "days": list(day_columns),
+        "symptoms": table.index.astype(str).tolist(),
+        "counts": table.to_numpy(dtype=int).tolist(),
+        "totals": table.sum(axis=1).astype(int).tolist(),
+        "phases": phase_counts,
+        "unassigned": int((~assigned).sum()),
+    }
+
+
+async def load_start_dates(db, user_id: str) -> List[str]:
+    docs = await db.cycles.find({"userId": user_id}, {"_id": 0, "startDate": 1}).to_list(None)
+    return [doc["startDate"] for doc in docs]
+
+
+async def load_symptom_entries(db, user_id: str) -> List[dict]:
+    return await db.symptoms.find(
+        {"userId": user_id}, {"_id": 0, "date": 1, "symptoms": 1}
+    ).to_list(None)
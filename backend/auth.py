@@ -0,0 +1,97 @@
+"""Request authentication.
+
+Clients send ``Authorization: Bearer <JWT>``; the token is verified with the
+configured secret and its ``sub`` claim is the id of the user that every
+query and write of the request is scoped by. ``JWTAuth`` instances are used
+as a FastAPI dependency. The user is resolved once per request and kept in
+the request state, where the dependency finds it when a middleware (the rate
+limiter) already resolved it.
+
+Local development can set an anonymous user: requests without a token then
+act as that user instead of getting a 401. Every anonymous client shares that
+account, so it must stay unset in deployments (see README.md).
+"""
+from typing import List, Optional
+
+import jwt
+from fastapi import HTTPException, Request
+
+# Key of the resolved user (or the 401 raised for it) in the request state
+STATE_KEY = "user_id"
+
+
+class JWTAuth:
+    """Resolve the user id of a request from its bearer token."""
+
+    def __init__(self, secret: Optional[str], algorithms: List[str],
+                 anonymous_user: Optional[str] = None, audience: Optional[str] = None):
+        self.secret = secret
+        self.algorithms = algorithms
+        self.anonymous_user = anonymous_user
+        self.audience = audience
+
+    def decode(self, token: str) -> str:
+        """Return the user id of ``token``; raises jwt.InvalidTokenError when invalid."""
+        if not self.secret:
+            raise jwt.InvalidTokenError("Token authentication is not configured")
+        claims = jwt.decode(
+            token, self.secret, algorithms=self.algorithms, audience=self.audience,
+            options={"require": ["sub"]},
+        )
+        return str(claims["sub"])
+
+    def _authorize(self, authorization: Optional[str]) -> str:
+        """User id of an Authorization header value; raises a 401 HTTPException without a valid one."""
+        if not authorization:
+            if self.anonymous_user:
+                return self.anonymous_user
+            raise HTTPException(status_code=401, detail="Not authenticated",
+                                headers={"WWW-Authenticate": "Bearer"})
+
+        scheme, _, token = authorization.partition(" ")
+        if scheme.lower() != "bearer" or not token:
+            raise HTTPException(status_code=401, detail="Invalid authorization header",
+                                headers={"WWW-Authenticate": "Bearer"})
+        try:
+            return self.decode(token.strip())
+        except jwt.InvalidTokenError as e:
+            raise HTTPException(status_code=401, detail=f"Invalid token: {e}",
+                                headers={"WWW-Authenticate": "Bearer"})
+
+    def authorize(self, scope) -> str:
+        """User id of an ASGI request scope, resolved once per request.
+
+        The outcome (user id or 401) is kept in ``scope["state"]``, so a
+        middleware resolving the user first and the dependency afterwards
+        check the signature once and always agree.
+        """
+        state = scope.setdefault("state", {})
+        if STATE_KEY not in state:
+            authorization = None
+            for name, value in scope.get("headers", ()):
+                if name == b"authorization":
+                    authorization = value.decode("latin-1")
+                    break
+            try:
+                state[STATE_KEY] = self._authorize(authorization)
+            except HTTPException as e:
+                state[STATE_KEY] = e
+        if isinstance(state[STATE_KEY], HTTPException):
+            raise state[STATE_KEY]
+        return state[STATE_KEY]
+
+    def user_of(self, scope) -> Optional[str]:
+        """User id of the bearer token of an ASGI request scope, None without a valid one.
+
+        For middleware running before the dependencies, e.g. to rate limit per
+        user; requests without a token are not given the anonymous user.
+        """
+        if not any(name == b"authorization" for name, _ in scope.get("headers", ())):
+            return None
+        try:
+            return self.authorize(scope)
+        except HTTPException:
+            return None
+
+    def __call__(self, request: Request) -> str:
+        return self.authorize(request.scope)
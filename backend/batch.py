@@ -0,0 +1,206 @@
+"""Batch precomputation of the derived collection.
+
+Recomputes the predictions and insights of every user and stores them in
+``derived`` (see derived.py), so that the first request of the day does not
+have to compute them. Users are processed in ascending id order, one page at
+a time with a bounded number of users in flight; after each page the last id
+is saved in ``batch_runs`` so that an interrupted run resumes where it
+stopped:
+
+    python batch.py derive --concurrency 16
+    python batch.py derive --restart
+    python batch.py status
+
+``python batch.py reminders`` computes the next reminder of every user (see
+reminders.py), with its own checkpoint. It is needed once when enabling
+reminders, afterwards writes keep them current; the server runs it in the
+background at startup until a run has completed (REMINDER_BACKFILL=off to
+leave it to this command):
+
+    python batch.py reminders
+    python batch.py status --job reminders
+"""
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+import typer
+from dotenv import load_dotenv
+
+from database import create_client
+from derived import compute_for_user, iter_user_ids
+from reminders import LogSink, ReminderScheduler, load_inputs
+
+logger = logging.getLogger(__name__)
+
+JOB_NAME = "derived"
+REMINDERS_JOB = "reminders"
+
+cli = typer.Typer(help="Batch jobs over all users")
+
+
+def _connect():
+    load_dotenv(Path(__file__).parent / '.env')
+    client = create_client(os.environ['MONGO_URL'], os.environ)
+    return client, client[os.environ['DB_NAME']]
+
+
+async def load_checkpoint(db, job: str = JOB_NAME) -> Optional[dict]:
+    return await db.batch_runs.find_one({"_id": job})
+
+
+async def save_checkpoint(db, job: str = JOB_NAME, **fields) -> None:
+    await db.batch_runs.update_one({"_id": job}, {"$set": fields}, upsert=True)
+
+
+async def run_derive(db, concurrency: int = 16, page_size: int = 500, restart: bool = False) -> dict:
+    """Recompute the derived documents of all users; returns the run's counters."""
+    checkpoint = None if restart else await load_checkpoint(db)
+    if checkpoint and checkpoint.get("status") == "running":
+        after = checkpoint.get("lastUserId")
+        processed, failed = checkpoint.get("processed", 0), checkpoint.get("failed", 0)
+        logger.info(f"Resuming after user {after} ({processed} already processed)")
+    else:
+        after, processed, failed = None, 0, 0
+        await save_checkpoint(db, status="running", lastUserId=None, processed=0, failed=0,
+                              startedAt=datetime.utcnow(), finishedAt=None)
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def process(user_id: str) -> bool:
+        async with semaphore:
+            try:
+                await compute_for_user(db, user_id)
+                return True
+            except Exception as e:
+                logger.error(f"Error computing derived data for user {user_id}: {e}")
+                return False
+
+    started = time.monotonic()
+    run_processed = 0
+    async for user_ids in iter_user_ids(db, after, page_size):
+        results = await asyncio.gather(*(process(user_id) for user_id in user_ids))
+        succeeded = sum(results)
+        processed += succeeded
+        failed += len(results) - succeeded
+        run_processed += len(results)
+        # Every user up to the end of the page is done, whatever the completion order
+        await save_checkpoint(db, lastUserId=user_ids[-1], processed=processed, failed=failed)
+        elapsed = time.monotonic() - started
+        logger.info(f"{processed} users done, {failed} failed, {run_processed / elapsed:.1f} users/s")
+
+    elapsed = time.monotonic() - started
+    rate = run_processed / elapsed if elapsed else 0.0
+    await save_checkpoint(db, status="completed", finishedAt=datetime.utcnow(), usersPerSecond=round(rate, 2))
+    return {"processed": processed, "failed": failed, "seconds": round(elapsed, 2), "usersPerSecond": round(rate, 2)}
+
+
+@cli.command()
+def derive(
+    concurrency: int = typer.Option(16, min=1, help="users computed at the same time"),
+    page_size: int = typer.Option(500, min=1, help="users per checkpoint"),
+    restart: bool = typer.Option(False, help="ignore the checkpoint of an interrupted run"),
+):
+    """Recompute predictions and insights of every user into the derived collection."""
+    async def main():
+        client, db = _connect()
+        try:
+            return await run_derive(db, concurrency, page_size, restart)
+        finally:
+            client.close()
+
+    summary = asyncio.run(main())
+    typer.echo(f"Processed {summary['processed']} users ({summary['failed']} failed) "
+               f"in {summary['seconds']}s: {summary['usersPerSecond']} users/s")
+    raise typer.Exit(1 if summary["failed"] else 0)
+
+
+async def run_reminders(db, concurrency: int = 16, page_size: int = 500, restart: bool = False,
+                        scheduler: Optional[ReminderScheduler] = None) -> dict:
+    """Store the next reminder of every user; returns the counters of the run.
+
+    ``scheduler`` is the running one of the server, so that reminders due
+    soon are queued right away; by default a standalone one stores them.
+    """
+    if scheduler is None:
+        scheduler = ReminderScheduler(db, LogSink(), lambda user_id: load_inputs(db, user_id))
+    checkpoint = None if restart else await load_checkpoint(db, REMINDERS_JOB)
+    if checkpoint and checkpoint.get("status") == "running":
+        after = checkpoint.get("lastUserId")
+        processed, scheduled, failed = (checkpoint.get(key, 0) for key in ("processed", "scheduled", "failed"))
+        logger.info(f"Resuming reminders after user {after} ({processed} already processed)")
+    else:
+        after, processed, scheduled, failed = None, 0, 0, 0
+        await save_checkpoint(db, REMINDERS_JOB, status="running", lastUserId=None, processed=0, scheduled=0,
+                              failed=0, startedAt=datetime.utcnow(), finishedAt=None)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def process(user_id: str) -> Optional[bool]:
+        async with semaphore:
+            try:
+                return await scheduler.reschedule(user_id) is not None
+            except Exception as e:
+                logger.error(f"Error scheduling reminders of user {user_id}: {e}")
+                return None
+
+    async for user_ids in iter_user_ids(db, after, page_size):
+        results = await asyncio.gather(*(process(user_id) for user_id in user_ids))
+        processed += len(results)
+        scheduled += sum(1 for result in results if result)
+        failed += sum(1 for result in results if result is None)
+        await save_checkpoint(db, REMINDERS_JOB, lastUserId=user_ids[-1], processed=processed,
+                              scheduled=scheduled, failed=failed)
+        logger.info(f"{processed} users done, {scheduled} reminders scheduled, {failed} failed")
+    await save_checkpoint(db, REMINDERS_JOB, status="completed", finishedAt=datetime.utcnow())
+    return {"processed": processed, "scheduled": scheduled, "failed": failed}
+
+
+@cli.command()
+def reminders(
+    concurrency: int = typer.Option(16, min=1, help="users computed at the same time"),
+    page_size: int = typer.Option(500, min=1, help="users per checkpoint"),
+    restart: bool = typer.Option(False, help="ignore the checkpoint of an interrupted run"),
+):
+    """Compute the next reminder of every user into the reminders collection."""
+    async def main():
+        client, db = _connect()
+        try:
+            return await run_reminders(db, concurrency, page_size, restart)
+        finally:
+            client.close()
+
+    summary = asyncio.run(main())
+    typer.echo(f"Processed {summary['processed']} users: {summary['scheduled']} reminders scheduled, "
+               f"{summary['failed']} failed")
+    raise typer.Exit(1 if summary["failed"] else 0)
+
+
+@cli.command()
+def status(job: str = typer.Option(JOB_NAME, help=f"{JOB_NAME} or {REMINDERS_JOB}")):
+    """Show the checkpoint of the last run."""
+    async def main():
+        client, db = _connect()
+        try:
+            return await load_checkpoint(db, job)
+        finally:
+            client.close()
+
+    checkpoint = asyncio.run(main())
+    if checkpoint is None:
+        typer.echo("No run recorded")
+        return
+    for key, value in checkpoint.items():
+        if key != "_id":
+            typer.echo(f"{key}: {value}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    cli()
@@ -0,0 +1,177 @@
+"""Response compression negotiated through Accept-Encoding.
+
+``CompressionMiddleware`` compresses responses of textual media types (JSON,
+NDJSON, CSV, text) with brotli or gzip, whichever the client prefers by its
+``q`` values; brotli wins ties. Brotli is optional (``pip install brotli``):
+without it only gzip is offered. Bodies under ``minimum_size`` bytes are
+sent as they are, since the framing would eat most of the gain. Streamed
+responses (the export) are compressed chunk by chunk, each chunk flushed so
+the client keeps receiving data as it is produced.
+
+Responses that could be compressed get ``Vary: Accept-Encoding`` and a weak
+ETag, whether or not this one was: the compressed bytes differ from the
+identity ones, but both representations are equivalent for If-None-Match
+(see response_cache.py). 304s get the same treatment, so they carry the
+ETag and Vary the 200 would have had (RFC 9110 section 15.4.5).
+
+Configured with COMPRESSION_MIN_SIZE (bytes, default 1024).
+"""
+import gzip
+import zlib
+from typing import List, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+DEFAULT_MINIMUM_SIZE = 1024
+GZIP_LEVEL = 6
+# Quality 4 compresses better than gzip -6 at a similar speed; higher levels are for static assets
+BROTLI_QUALITY = 4
+
+
+def supported_encodings() -> List[str]:
+    return ["br", "gzip"] if brotli is not None else ["gzip"]
+
+
+def negotiate(accept_encoding: str, supported: List[str]) -> Optional[str]:
+    """The supported coding the client prefers in an Accept-Encoding value, None for identity."""
+    weights = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if coding:
+            weights[coding] = q
+    best, best_q = None, 0.0
+    for coding in supported:
+        q = weights.get(coding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+class _Compressor:
+    """Incremental gzip or brotli stream."""
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=BROTLI_QUALITY)
+        else:
+            self._zlib = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def chunk(self, data: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._brotli.process(data) + self._brotli.flush()
+        return self._zlib.compress(data) + self._zlib.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._brotli.finish()
+        return self._zlib.flush(zlib.Z_FINISH)
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    return gzip.compress(data, GZIP_LEVEL)
+
+
+def _header(headers: List[Tuple[bytes, bytes]], name: bytes) -> Optional[bytes]:
+    for key, value in headers:
+        if key.lower() == name:
+            return value
+    return None
+
+
+def _negotiable(headers: List[Tuple[bytes, bytes]]) -> List[Tuple[bytes, bytes]]:
+    """``headers`` of a response whose encoding depends on Accept-Encoding: Vary added, ETag made weak."""
+    vary = _header(headers, b"vary")
+    if vary is None:
+        headers = headers + [(b"vary", b"Accept-Encoding")]
+    elif b"accept-encoding" not in vary.lower() and vary.strip() != b"*":
+        headers = [(key, value + b", Accept-Encoding" if key.lower() == b"vary" else value)
+                   for key, value in headers]
+    etag = _header(headers, b"etag")
+    if etag is not None and not etag.startswith(b"W/"):
+        headers = [(key, b"W/" + value if key.lower() == b"etag" else value) for key, value in headers]
+    return headers
+
+
+class CompressionMiddleware:
+    def __init__(self, app, minimum_size: int = DEFAULT_MINIMUM_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.supported = supported_encodings()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept = _header(scope.get("headers", []), b"accept-encoding")
+        encoding = negotiate(accept.decode("latin-1"), self.supported) if accept else None
+        start = None
+        compressor: Optional[_Compressor] = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start, compressor, passthrough
+            if message["type"] == "http.response.start":
+                if message["status"] == 304:
+                    # Validators must match those of the 200 it stands for
+                    passthrough = True
+                    await send({**message, "headers": _negotiable(list(message["headers"]))})
+                    return
+                start = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+            if compressor is not None:
+                body = compressor.chunk(message.get("body", b""))
+                if not message.get("more_body", False):
+                    body += compressor.finish()
+                await send({**message, "body": body})
+                return
+
+            # First body message: decide for the whole response
+            headers = list(start["headers"])
+            content_type = (_header(headers, b"content-type") or b"").decode("latin-1")
+            compressible = (
+                start["status"] not in (204, 206)
+                and content_type.startswith(COMPRESSIBLE_TYPES)
+                and _header(headers, b"content-encoding") is None
+            )
+            if compressible:
+                headers = _negotiable(headers)
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if not compressible or encoding is None or (not more_body and len(body) < self.minimum_size):
+                passthrough = True
+                await send({**start, "headers": headers})
+                await send(message)
+                return
+
+            headers = [(key, value) for key, value in headers if key.lower() != b"content-length"]
+            headers.append((b"content-encoding", encoding.encode()))
+            if more_body:
+                compressor = _Compressor(encoding)
+                body = compressor.chunk(body)
+            else:
+                body = compress(body, encoding)
+                headers.append((b"content-length", str(len(body)).encode()))
+            await send({**start, "headers": headers})
+            await send({**message, "body": body})
+
+        await self.app(scope, receive, send_wrapper)
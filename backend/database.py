@@ -0,0 +1,91 @@
+"""Motor client configuration from the environment.
+
+Connection pool settings (all optional, pymongo's defaults otherwise):
+
+    MONGO_MAX_POOL_SIZE               connections per server (default 100)
+    MONGO_MIN_POOL_SIZE               connections kept open, also warmed up at startup
+    MONGO_WAIT_QUEUE_TIMEOUT_MS       fail a checkout after waiting this long
+    MONGO_MAX_IDLE_TIME_MS            close connections idle for this long
+    MONGO_SERVER_SELECTION_TIMEOUT_MS fail an operation when no server is available
+    MONGO_COMPRESSORS                 wire compressors in order of preference, e.g. "zstd,snappy"
+    LIST_READ_PREFERENCE              read preference of the list endpoints, e.g. "secondaryPreferred"
+    LIST_MAX_STALENESS_SECONDS        lag allowed for those reads (default and minimum 90)
+
+Compressors need their library (zstandard, python-snappy) installed; pymongo
+skips unavailable ones with a warning and the server only uses those it also
+supports.
+"""
+import asyncio
+import logging
+from typing import Mapping, Optional
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.read_preferences import Nearest, Primary, PrimaryPreferred, Secondary, SecondaryPreferred
+
+from metrics import PoolMetricsListener
+
+logger = logging.getLogger(__name__)
+
+# Environment variable -> MongoClient keyword
+_INT_OPTIONS = {
+    "MONGO_MAX_POOL_SIZE": "maxPoolSize",
+    "MONGO_MIN_POOL_SIZE": "minPoolSize",
+    "MONGO_WAIT_QUEUE_TIMEOUT_MS": "waitQueueTimeoutMS",
+    "MONGO_MAX_IDLE_TIME_MS": "maxIdleTimeMS",
+    "MONGO_SERVER_SELECTION_TIMEOUT_MS": "serverSelectionTimeoutMS",
+}
+
+READ_PREFERENCES = {
+    "primary": Primary,
+    "primarypreferred": PrimaryPreferred,
+    "secondary": Secondary,
+    "secondarypreferred": SecondaryPreferred,
+    "nearest": Nearest,
+}
+
+
+def pool_options(environ: Mapping[str, str]) -> dict:
+    """MongoClient keyword arguments for the pool settings present in ``environ``."""
+    options = {}
+    for variable, keyword in _INT_OPTIONS.items():
+        value = environ.get(variable)
+        if value:
+            options[keyword] = int(value)
+    compressors = [name.strip() for name in environ.get("MONGO_COMPRESSORS", "").split(",") if name.strip()]
+    if compressors:
+        options["compressors"] = compressors
+    return options
+
+
+def read_preference(name: Optional[str], max_staleness: int = -1):
+    """Parse a read preference name (case-insensitive); None for unset or "primary".
+
+    ``max_staleness`` (seconds, -1 for none) excludes secondaries estimated
+    to lag further behind the primary.
+    """
+    if not name or name.lower() == "primary":
+        return None
+    try:
+        return READ_PREFERENCES[name.lower()](max_staleness=max_staleness)
+    except KeyError:
+        raise ValueError(f"Unknown read preference {name!r}, expected one of {', '.join(READ_PREFERENCES)}")
+
+
+def create_client(mongo_url: str, environ: Mapping[str, str]) -> AsyncIOMotorClient:
+    """Create the client with the pool settings of ``environ`` and pool metrics attached."""
+    options = pool_options(environ)
+    logger.info(f"MongoDB pool options: {options or 'defaults'}")
+    return AsyncIOMotorClient(mongo_url, event_listeners=[PoolMetricsListener()], **options)
+
+
+async def warm_up(client, connections: int = 1) -> None:
+    """Ping the server ``connections`` times concurrently so the pool opens that many connections.
+
+    Failures are logged, not raised: the app still starts and reconnects
+    once the server is reachable.
+    """
+    try:
+        await asyncio.gather(*(client.admin.command("ping") for _ in range(max(1, connections))))
+        logger.info(f"MongoDB reachable, {max(1, connections)} connection(s) warmed up")
+    except Exception as e:
+        logger.warning(f"MongoDB warm-up ping failed: {e}")
@@ -0,0 +1,86 @@
+"""Calendar days of records, stored as BSON dates.
+
+Cycle start and end dates and symptom and note dates are days, not instants.
+Clients send and receive them as ``YYYY-MM-DD``; MongoDB stores them as BSON
+dates at midnight UTC, so range filters and sorts compare dates natively and
+use the date indexes. ``Day`` is the pydantic type of these fields: it
+validates the day, dumps to a ``datetime`` for storage (``model_dump()``) and
+to ``YYYY-MM-DD`` in JSON mode.
+
+Documents written before the ``native_dates`` migration (migrations.py) hold
+the same days as strings. Until it has completed, ``day_filter`` matches both
+forms.
+"""
+from datetime import date, datetime
+from typing import Callable, Dict, Optional, Tuple
+
+from pydantic import BeforeValidator, PlainSerializer, SerializationInfo
+from typing_extensions import Annotated
+
+# Day fields per collection
+DATE_FIELDS: Dict[str, Tuple[str, ...]] = {
+    "cycles": ("startDate", "endDate"),
+    "symptoms": ("date",),
+    "notes": ("date",),
+}
+
+
+def _coerce(value):
+    # Stored dates come back as midnight datetimes; legacy strings may carry a time part
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, str) and "T" in value:
+        return value.split("T", 1)[0]
+    return value
+
+
+def _serialize(day: date, info: SerializationInfo):
+    return day.isoformat() if info.mode_is_json() else to_bson(day)
+
+
+Day = Annotated[date, BeforeValidator(_coerce), PlainSerializer(_serialize)]
+
+
+def to_bson(day: date) -> datetime:
+    return datetime(day.year, day.month, day.day)
+
+
+def parse_day(value) -> Optional[date]:
+    """A stored or client value as a date; None for empty values, ValueError if invalid."""
+    if value is None or value == "":
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(_coerce(value)))
+
+
+def day_filter(build: Callable[..., dict], *days: Optional[date], legacy: bool = True) -> dict:
+    """The filter ``build`` makes from day bounds, for the stored form of the days.
+
+    ``build`` receives each of ``days`` as a BSON date (None stays None).
+    With ``legacy``, documents still holding ``YYYY-MM-DD`` strings match
+    too, through a second branch built from the string form.
+    """
+    native = build(*(to_bson(day) if day else None for day in days))
+    if not legacy:
+        return native
+    strings = build(*(day.isoformat() if day else None for day in days))
+    return {"$or": [native, strings]}
+
+
+def range_filter(field: str, start: Optional[date], end: Optional[date], legacy: bool = True) -> dict:
+    """Filter on ``start <= field <= end``; either bound may be None. Empty without bounds."""
+    if start is None and end is None:
+        return {}
+
+    def build(low, high):
+        bounds = {}
+        if low is not None:
+            bounds["$gte"] = low
+        if high is not None:
+            bounds["$lte"] = high
+        return {field: bounds}
+
+    return day_filter(build, start, end, legacy=legacy)
@@ -0,0 +1,99 @@
+"""Precomputed per-user predictions and insights.
+
+The ``derived`` collection holds one document per user with the predictions
+and default insights computed by the batch job (``batch.py``), so that the
+read endpoints can serve them without loading the history on a cold cache.
+
+Freshness is tracked with a write counter: every write of a user increments
+``writes`` (``mark_stale``), and a result is stored together with the value
+of the counter it was computed at (``computedFor``). The stored result is
+only written if the counter has not moved in between, and only served while
+both values match.
+"""
+import asyncio
+from datetime import datetime
+from typing import AsyncIterator, List, Optional
+
+from pymongo.errors import DuplicateKeyError
+
+from insights import compute_insights
+from predictions import CyclePredictor
+
+USER_COLLECTIONS = ["cycles", "symptoms", "notes"]
+
+
+async def mark_stale(db, user_id: str) -> None:
+    """Invalidate the derived document of ``user_id``; call on every write."""
+    await db.derived.update_one({"userId": user_id}, {"$inc": {"writes": 1}}, upsert=True)
+
+
+async def load_fresh(db, user_id: str) -> Optional[dict]:
+    """Return the derived document of ``user_id`` if it is current, else None."""
+    doc = await db.derived.find_one({"userId": user_id}, {"_id": 0})
+    if doc is None or doc.get("computedFor") != doc.get("writes", 0):
+        return None
+    return doc
+
+
+async def compute_for_user(db, user_id: str) -> bool:
+    """Recompute and store the derived document of ``user_id``.
+
+    Returns False when a write raced with the computation; the document is
+    then left stale and the next run (or request) recomputes it.
+    """
+    current = await db.derived.find_one({"userId": user_id}, {"_id": 0, "writes": 1})
+    writes = current.get("writes", 0) if current else 0
+
+    cycles = await db.cycles.find({"userId": user_id}, {"_id": 0, "id": 1, "startDate": 1}).to_list(None)
+    predictions = CyclePredictor((c["id"], c["startDate"]) for c in cycles).predict()
+    insights = await compute_insights(db, user_id)
+
+    try:
+        result = await db.derived.update_one(
+            {"userId": user_id, "writes": writes} if current else {"userId": user_id, "writes": {"$exists": False}},
+            {"$set": {
+                "writes": writes,
+                "computedFor": writes,
+                "predictions": predictions,
+                "insights": insights,
+                "computedAt": datetime.utcnow(),
+            }},
+            upsert=True,
+        )
+    except DuplicateKeyError:
+        # The user wrote (and created the document) while we were computing
+        return False
+    return result.matched_count > 0 or result.upserted_id is not None
+
+
+async def _next_user_id(collection, after: Optional[str]) -> Optional[str]:
+    """The smallest user id of ``collection`` above ``after``: one seek on a ``userId``-prefixed index."""
+    query = {"userId": {"$gt": after}} if after is not None else {"userId": {"$ne": None}}
+    docs = await collection.find(query, {"_id": 0, "userId": 1}).sort("userId", 1).limit(1).to_list(1)
+    return docs[0]["userId"] if docs else None
+
+
+async def iter_user_ids(db, after: Optional[str] = None, page_size: int = 500) -> AsyncIterator[List[str]]:
+    """Yield pages of user ids in ascending order, starting after ``after``.
+
+    Users are everyone with a cycle, symptom or note. The ids are merged
+    from the three collections by walking their ``userId`` index one
+    distinct id at a time, so a full pass costs a few index seeks per user
+    instead of scanning every document.
+    """
+    collections = [db[name] for name in USER_COLLECTIONS]
+    heads = list(await asyncio.gather(*(_next_user_id(collection, after) for collection in collections)))
+    while True:
+        ids = []
+        while len(ids) < page_size:
+            current = min((head for head in heads if head is not None), default=None)
+            if current is None:
+                break
+            ids.append(current)
+            advancing = [i for i, head in enumerate(heads) if head == current]
+            nexts = await asyncio.gather(*(_next_user_id(collections[i], current) for i in advancing))
+            for i, head in zip(advancing, nexts):
+                heads[i] = head
+        if not ids:
+            return
+        yield ids
@@ -0,0 +1,119 @@
+"""Streaming export of a user's stored data as NDJSON or CSV.
+
+Records are read from Motor cursors in batches and encoded into chunks of
+roughly ``CHUNK_SIZE`` bytes, optionally gzip-compressed as they are
+produced, so memory use stays constant whatever the size of the history.
+
+NDJSON lines look like ``{"type": "cycle", "data": {...}}``. CSV uses one
+header shared by all record types (``CSV_COLUMNS``); list cells are joined
+with ``;`` and dict cells are JSON-encoded. The owning ``userId`` is left
+out so that an export can be imported into another account.
+"""
+import csv
+import io
+import json
+import zlib
+from datetime import date, datetime
+from typing import AsyncIterator, Tuple
+
+from dates import DATE_FIELDS, parse_day
+
+# (record type, collection name), in export order
+EXPORT_COLLECTIONS = [
+    ("cycle", "cycles"),
+    ("symptom", "symptoms"),
+    ("note", "notes"),
+    ("preferences", "preferences"),
+]
+
+CSV_COLUMNS = [
+    "type", "id",
+    "startDate", "endDate", "flow", "length",
+    "date", "symptoms", "intensity", "content",
+    "theme", "language", "notifications",
+    "createdAt", "updatedAt",
+]
+
+LIST_SEPARATOR = ";"
+CHUNK_SIZE = 64 * 1024
+CURSOR_BATCH_SIZE = 500
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def ndjson_line(record_type: str, doc: dict) -> str:
+    return json.dumps({"type": record_type, "data": doc}, default=_json_default) + "\n"
+
+
+def csv_cell(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, list):
+        return LIST_SEPARATOR.join(str(item) for item in value)
+    if isinstance(value, dict):
+        return json.dumps(value, default=_json_default)
+    return str(value)
+
+
+async def iter_records(db, user_id: str) -> AsyncIterator[Tuple[str, dict]]:
+    """Yield ``(record type, document)`` for every exported document of ``user_id``."""
+    for record_type, collection_name in EXPORT_COLLECTIONS:
+        cursor = db[collection_name].find(
+            {"userId": user_id}, {"_id": 0, "userId": 0}
+        ).batch_size(CURSOR_BATCH_SIZE)
+        date_fields = DATE_FIELDS.get(collection_name, ())
+        async for doc in cursor:
+            # Days are exported as YYYY-MM-DD, as the API serves them
+            for field in date_fields:
+                if field not in doc:
+                    continue
+                try:
+                    doc[field] = parse_day(doc.get(field))
+                except ValueError:
+                    pass
+            yield record_type, doc
+
+
+async def _encoded_chunks(db, user_id: str, export_format: str) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = None
+    if export_format == "csv":
+        writer = csv.writer(buffer)
+        writer.writerow(CSV_COLUMNS)
+
+    async for record_type, doc in iter_records(db, user_id):
+        if writer is not None:
+            row = dict(doc, type=record_type)
+            writer.writerow([csv_cell(row.get(column)) for column in CSV_COLUMNS])
+        else:
+            buffer.write(ndjson_line(record_type, doc))
+        if buffer.tell() >= CHUNK_SIZE:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+async def export_stream(db, user_id: str, export_format: str = "ndjson",
+                        compress: bool = False) -> AsyncIterator[bytes]:
+    """Stream the data of ``user_id`` as encoded (and optionally gzipped) chunks."""
+    if not compress:
+        async for chunk in _encoded_chunks(db, user_id, export_format):
+            yield chunk
+        return
+
+    # wbits=31 writes a gzip container instead of a raw zlib stream
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    async for chunk in _encoded_chunks(db, user_id, export_format):
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
@@ -0,0 +1,21 @@
+"""Multi-worker deployment: gunicorn managing uvicorn workers.
+
+    cd backend && gunicorn server:app -c gunicorn.conf.py
+
+Every worker keeps its own in-process caches; INVALIDATION_BUS=mongo (set
+here unless configured otherwise) lets a write handled by one worker drop
+the entries the others cached for it. RECORD_CACHE_URL can additionally
+point all workers at one shared record cache.
+"""
+import multiprocessing
+import os
+
+os.environ.setdefault("INVALIDATION_BUS", "mongo")
+
+bind = os.environ.get("BIND", "0.0.0.0:8001")
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "uvicorn.workers.UvicornWorker"
+# Workers load the app themselves, so each opens its own Mongo pool after the fork
+preload_app = False
+graceful_timeout = 30
+timeout = 60
@@ -0,0 +1,283 @@
+"""Streaming import of NDJSON/CSV files produced by the exporter or other trackers.
+
+The upload is spooled to a temporary file, then ``run_import`` parses it in
+batches on a worker thread (so the event loop is never blocked by parsing),
+validates every row against the collection's Create model, drops duplicates
+and writes each batch with one ``insert_many``. Progress is kept on the
+``ImportJob`` so it can be polled while the import runs.
+
+Rows are recognised by their ``type`` (``cycle``, ``symptom``, ``note``).
+NDJSON rows may be wrapped as ``{"type": ..., "data": {...}}`` like the
+export, CSV rows use the exporter's columns. A row is a duplicate when the
+user already has a record with its ``id``, or one with the same natural key
+(cycle start date, symptom date and symptoms, note date and content). Ids
+are unique across users, so a row whose id belongs to another user's record
+(a backup restored into a new account) is inserted under a new id. Rows
+already seen in the upload are remembered by id and a SHA-1 of their natural
+key, so the memory used grows with the number of rows, not with note text.
+"""
+import asyncio
+import csv
+import gzip
+import hashlib
+import io
+import json
+import os
+import uuid
+from datetime import datetime
+from typing import Callable, Dict, Iterator, List, Optional
+
+from pydantic import ValidationError
+from pymongo.errors import BulkWriteError
+
+from dates import parse_day, to_bson
+from exporter import LIST_SEPARATOR
+
+DEFAULT_BATCH_SIZE = 500
+MAX_BATCH_SIZE = 5000
+MAX_REPORTED_ERRORS = 50
+
+# Record type -> collection name
+RECORD_TYPES = {"cycle": "cycles", "symptom": "symptoms", "note": "notes"}
+
+
+def natural_key(collection: str, doc: dict) -> tuple:
+    # Days are compared as dates: stored ones may still be legacy strings
+    if collection == "cycles":
+        return (parse_day(doc.get("startDate")),)
+    if collection == "symptoms":
+        return (parse_day(doc.get("date")), tuple(sorted(doc.get("symptoms", []))))
+    return (parse_day(doc.get("date")), doc.get("content"))
+
+
+def _key_digest(collection: str, doc: dict) -> bytes:
+    """Fixed-size stand-in for the natural key, so remembering a note costs 20 bytes, not its text."""
+    return hashlib.sha1(repr((doc.get("userId"), collection, natural_key(collection, doc))).encode()).digest()
+
+
+def _natural_key_query(collection: str, docs: List[dict]) -> dict:
+    field = "startDate" if collection == "cycles" else "date"
+    days = {parse_day(doc[field]) for doc in docs} - {None}
+    # Both stored forms of each day
+    return {field: {"$in": [to_bson(day) for day in days] + [day.isoformat() for day in days]}}
+
+
+class ImportJob:
+    """Progress and outcome of one import."""
+
+    def __init__(self, user_id: str, import_format: str, total_bytes: int, batch_size: int):
+        self.id = str(uuid.uuid4())
+        self.user_id = user_id
+        self.format = import_format
+        self.batch_size = batch_size
+        self.status = "pending"  # pending, running, completed, failed
+        self.total_bytes = total_bytes
+        self.read_bytes = 0
+        self.processed = 0
+        self.inserted = 0
+        self.duplicates = 0
+        self.invalid = 0
+        self.skipped = 0
+        self.errors: List[dict] = []
+        self.created_at = datetime.utcnow()
+        self.finished_at: Optional[datetime] = None
+
+    def add_error(self, row: int, message: str) -> None:
+        self.invalid += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row, "error": message})
+
+    def to_dict(self) -> dict:
+        progress = self.read_bytes / self.total_bytes if self.total_bytes else 1.0
+        return {
+            "id": self.id,
+            "status": self.status,
+            "format": self.format,
+            "progress": round(min(progress, 1.0), 4),
+            "processed": self.processed,
+            "inserted": self.inserted,
+            "duplicates": self.duplicates,
+            "invalid": self.invalid,
+            "skipped": self.skipped,
+            "errors": self.errors,
+            "createdAt": self.created_at,
+            "finishedAt": self.finished_at,
+        }
+
+
+def _open_text(path: str):
+    """Open an uploaded file as text, transparently un-gzipping it."""
+    with open(path, "rb") as probe:
+        is_gzip = probe.read(2) == b"\x1f\x8b"
+    raw = open(path, "rb")
+    stream = gzip.GzipFile(fileobj=raw) if is_gzip else raw
+    return raw, io.TextIOWrapper(stream, encoding="utf-8", newline="")
+
+
+def _parse_ndjson(text) -> Iterator:
+    """Yield ``(type, fields)`` per line, or the exception for an unparseable one."""
+    for line in text:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield e
+            continue
+        if not isinstance(row, dict):
+            yield ValueError("Row is not a JSON object")
+        elif isinstance(row.get("data"), dict):
+            yield row.get("type"), row["data"]
+        else:
+            yield row.pop("type", None), row
+
+
+def _csv_value(column: str, value: str):
+    if column == "symptoms":
+        return [item for item in value.split(LIST_SEPARATOR) if item]
+    if column == "length":
+        return int(value)
+    if column == "notifications":
+        return json.loads(value)
+    return value
+
+
+def _parse_csv(text) -> Iterator:
+    """Yield ``(type, fields)`` per CSV row, or the exception for an unparseable one."""
+    for row in csv.DictReader(text):
+        record_type = row.pop("type", None)
+        try:
+            yield record_type, {
+                column: _csv_value(column, value)
+                for column, value in row.items()
+                if column and value not in ("", None)
+            }
+        except ValueError as e:
+            yield e
+
+
+def _next_batch(rows: Iterator, size: int) -> List:
+    """Pull up to ``size`` parsed rows from the parser."""
+    batch = []
+    for item in rows:
+        batch.append(item)
+        if len(batch) >= size:
+            break
+    return batch
+
+
+def _validate(user_id: str, models: dict, fields: dict) -> dict:
+    """Build a stored document, keeping the id and createdAt of exported records."""
+    created = models["create"](**fields)
+    doc = models["model"](**created.model_dump(), userId=user_id).model_dump()
+    if fields.get("id"):
+        doc["id"] = str(fields["id"])
+    if fields.get("createdAt"):
+        doc["createdAt"] = datetime.fromisoformat(str(fields["createdAt"]))
+    return doc
+
+
+async def _filter_existing(db, user_id: str, collection: str, docs: List[dict]) -> List[dict]:
+    """Drop the rows ``user_id`` already has; rows whose id another user has get a new one."""
+    ids = [doc["id"] for doc in docs]
+    existing = await db[collection].find(
+        {"userId": user_id, "$or": [{"id": {"$in": ids}}, _natural_key_query(collection, docs)]},
+        {"_id": 0},
+    ).to_list(None)
+    existing_ids = {doc["id"] for doc in existing}
+    existing_keys = {natural_key(collection, doc) for doc in existing}
+    fresh = [
+        doc for doc in docs
+        if doc["id"] not in existing_ids and natural_key(collection, doc) not in existing_keys
+    ]
+    if not fresh:
+        return fresh
+    # Whatever still matches belongs to other users, whose records are neither duplicates nor reported
+    taken = await db[collection].find(
+        {"id": {"$in": [doc["id"] for doc in fresh]}}, {"_id": 0, "id": 1}
+    ).to_list(None)
+    taken_ids = {doc["id"] for doc in taken}
+    for doc in fresh:
+        if doc["id"] in taken_ids:
+            doc["id"] = str(uuid.uuid4())
+    return fresh
+
+
+async def run_import(db, job: ImportJob, path: str, collections: Dict[str, dict],
+                     on_inserted: Callable[[str, List[dict]], None],
+                     format_error: Callable[[ValidationError], str] = str) -> None:
+    """Parse, validate, dedupe and insert the file at ``path``, updating ``job``.
+
+    Records are owned by ``job.user_id``. ``collections`` maps collection
+    names to their ``create``/``model`` classes; ``on_inserted`` is called
+    once per written batch with the documents it inserted.
+    """
+    job.status = "running"
+    raw, text = _open_text(path)
+    try:
+        rows = _parse_csv(text) if job.format == "csv" else _parse_ndjson(text)
+        seen_ids, seen_keys = set(), set()
+        row_number = 0
+
+        while True:
+            batch = await asyncio.to_thread(_next_batch, rows, job.batch_size)
+            if not batch:
+                break
+            job.read_bytes = raw.tell()
+
+            pending: Dict[str, List[dict]] = {}
+            for item in batch:
+                row_number += 1
+                job.processed += 1
+                if isinstance(item, Exception):
+                    job.add_error(row_number, f"Unparseable row: {item}")
+                    continue
+                record_type, fields = item
+                collection = RECORD_TYPES.get(record_type)
+                if collection is None:
+                    job.skipped += 1
+                    continue
+                try:
+                    doc = _validate(job.user_id, collections[collection], fields)
+                except ValidationError as e:
+                    job.add_error(row_number, format_error(e))
+                    continue
+                except (TypeError, ValueError) as e:
+                    job.add_error(row_number, str(e))
+                    continue
+
+                key = _key_digest(collection, doc)
+                if doc["id"] in seen_ids or key in seen_keys:
+                    job.duplicates += 1
+                    continue
+                seen_ids.add(doc["id"])
+                seen_keys.add(key)
+                pending.setdefault(collection, []).append(doc)
+
+            for collection, docs in pending.items():
+                fresh = await _filter_existing(db, job.user_id, collection, docs)
+                job.duplicates += len(docs) - len(fresh)
+                if not fresh:
+                    continue
+                failed = set()
+                try:
+                    await db[collection].insert_many(fresh, ordered=False)
+                except BulkWriteError as e:
+                    # Rows inserted concurrently by another writer since the check
+                    failed = {error["index"] for error in e.details.get("writeErrors", [])}
+                    job.duplicates += len(failed)
+                inserted = [doc for position, doc in enumerate(fresh) if position not in failed]
+                job.inserted += len(inserted)
+                on_inserted(collection, inserted)
+
+        job.read_bytes = job.total_bytes
+        job.status = "completed"
+    except Exception:
+        job.status = "failed"
+        raise
+    finally:
+        job.finished_at = datetime.utcnow()
+        text.close()
+        raw.close()
+        os.unlink(path)
@@ -0,0 +1,180 @@
+"""MongoDB index declarations and startup reconciliation.
+
+Every collection's indexes are declared once in ``INDEXES``. At startup the
+server calls ``ensure_indexes`` which compares the declarations with what
+exists in the database, creates anything missing and rebuilds indexes whose
+definition changed. With ``check_only=True`` nothing is modified and the
+differences are only reported, which is what deploy checks should use:
+
+    python indexes.py --check
+"""
+import argparse
+import asyncio
+import logging
+import os
+from pathlib import Path
+from typing import Dict, List
+
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, DESCENDING, TEXT, IndexModel
+
+from sync import TOMBSTONE_RETENTION
+
+logger = logging.getLogger(__name__)
+
+# Every per-user query filters on userId first, so it leads each compound key
+# and a query only walks the index range of that user's documents.
+_ID_UNIQUE = IndexModel([("id", ASCENDING)], name="id_unique", unique=True)
+# Keyset pagination sorts on (createdAt, id), see server.fetch_page
+_CREATED_DESC = IndexModel([("userId", ASCENDING), ("createdAt", DESCENDING), ("id", DESCENDING)],
+                           name="createdAt_desc")
+# Delta sync reads changes in (updatedAt, id) order, see sync.collect_changes
+_UPDATED_ASC = IndexModel([("userId", ASCENDING), ("updatedAt", ASCENDING), ("id", ASCENDING)],
+                          name="updatedAt")
+_DATE = IndexModel([("userId", ASCENDING), ("date", ASCENDING)], name="date")
+
+INDEXES: Dict[str, List[IndexModel]] = {
+    "cycles": [
+        _ID_UNIQUE,
+        _CREATED_DESC,
+        _UPDATED_ASC,
+        IndexModel([("userId", ASCENDING), ("startDate", ASCENDING)], name="startDate"),
+    ],
+    "symptoms": [
+        _ID_UNIQUE,
+        _CREATED_DESC,
+        _UPDATED_ASC,
+        _DATE,
+        # Multikey: one entry per tag, for tag search
+        IndexModel([("userId", ASCENDING), ("symptoms", ASCENDING)], name="symptoms"),
+    ],
+    "notes": [
+        _ID_UNIQUE,
+        _CREATED_DESC,
+        _UPDATED_ASC,
+        _DATE,
+        # Full-text search, see search.py; the userId prefix keeps each query to one user's notes
+        IndexModel([("userId", ASCENDING), ("content", TEXT)], name="content_text", default_language="english"),
+    ],
+    "preferences": [
+        _ID_UNIQUE,
+        IndexModel([("userId", ASCENDING)], name="userId_unique", unique=True),
+    ],
+    "derived": [
+        IndexModel([("userId", ASCENDING)], name="userId_unique", unique=True),
+    ],
+    "import_jobs": [
+        _ID_UNIQUE,
+        # Job states only matter while a client polls them
+        IndexModel([("createdAt", ASCENDING)], name="createdAt_ttl", expireAfterSeconds=7 * 24 * 3600),
+    ],
+    "reminders": [
+        IndexModel([("userId", ASCENDING)], name="userId_unique", unique=True),
+        # The scheduler pages through the reminders due in its next window, see reminders.py
+        IndexModel([("fireAt", ASCENDING), ("userId", ASCENDING)], name="fireAt"),
+    ],
+    "tombstones": [
+        IndexModel([("userId", ASCENDING), ("deletedAt", ASCENDING), ("id", ASCENDING)], name="deletedAt"),
+        # Expire tombstones once no valid sync token can still need them
+        IndexModel([("deletedAt", ASCENDING)], name="deletedAt_ttl",
+                   expireAfterSeconds=int(TOMBSTONE_RETENTION.total_seconds())),
+    ],
+}
+
+
+def _normalize_key(key) -> list:
+    # The server may report directions as floats (1.0) depending on how they were created
+    return [(field, d if isinstance(d, str) else int(d)) for field, d in key]
+
+
+def _declared_key(spec: dict) -> list:
+    """The key of a declaration as ``index_information()`` reports it.
+
+    A text index is reported with its text fields replaced by ``_fts``/``_ftsx``
+    (the fields themselves appear in ``weights``).
+    """
+    key = list(spec["key"].items())
+    if TEXT not in spec["key"].values():
+        return key
+    return [(field, d) for field, d in key if d != TEXT] + [("_fts", TEXT), ("_ftsx", 1)]
+
+
+def _matches(existing: dict, wanted: IndexModel) -> bool:
+    """Compare an entry of ``index_information()`` with a declaration."""
+    spec = wanted.document
+    text_fields = {field for field, d in spec["key"].items() if d == TEXT}
+    return (
+        _normalize_key(existing["key"]) == _normalize_key(_declared_key(spec))
+        and bool(existing.get("unique", False)) == bool(spec.get("unique", False))
+        and set(existing.get("weights", {})) == text_fields
+        and existing.get("default_language", "english") == spec.get("default_language", "english")
+    )
+
+
+async def ensure_indexes(db, check_only: bool = False) -> Dict[str, List[str]]:
+    """Reconcile declared indexes with the database.
+
+    Returns a report mapping ``created``, ``rebuilt``, ``missing`` and
+    ``unmanaged`` to lists of ``collection.index`` names. In check-only mode
+    the ``missing`` entry lists what would have been created or rebuilt.
+    """
+    report = {"created": [], "rebuilt": [], "missing": [], "unmanaged": []}
+
+    for collection_name, wanted in INDEXES.items():
+        collection = db[collection_name]
+        existing = await collection.index_information()
+        declared_names = set()
+
+        for index in wanted:
+            name = index.document["name"]
+            declared_names.add(name)
+            label = f"{collection_name}.{name}"
+
+            if name in existing and _matches(existing[name], index):
+                continue
+            if check_only:
+                report["missing"].append(label)
+                continue
+
+            if name in existing:
+                await collection.drop_index(name)
+                await collection.create_indexes([index])
+                report["rebuilt"].append(label)
+                logger.info(f"Rebuilt index {label}")
+            else:
+                await collection.create_indexes([index])
+                report["created"].append(label)
+                logger.info(f"Created index {label}")
+
+        for name in existing:
+            if name != "_id_" and name not in declared_names:
+                report["unmanaged"].append(f"{collection_name}.{name}")
+
+    if report["missing"]:
+        logger.warning(f"Missing or outdated indexes: {', '.join(report['missing'])}")
+    if report["unmanaged"]:
+        logger.info(f"Indexes not declared in INDEXES: {', '.join(report['unmanaged'])}")
+    return report
+
+
+async def _main(check_only: bool) -> int:
+    load_dotenv(Path(__file__).parent / '.env')
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    try:
+        report = await ensure_indexes(client[os.environ['DB_NAME']], check_only=check_only)
+    finally:
+        client.close()
+    return 1 if report["missing"] else 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    parser = argparse.ArgumentParser(description="Create or verify MongoDB indexes")
+    parser.add_argument("--check", action="store_true",
+                        help="only report missing indexes, exit 1 if any")
+    args = parser.parse_args()
+    raise SystemExit(asyncio.run(_main(args.check)))
@@ -0,0 +1,95 @@
+"""Cycle, symptom and note statistics computed with aggregation pipelines.
+
+Counts, flows and symptom frequencies are grouped and counted inside
+MongoDB, so a request transfers a handful of summary rows instead of the
+full history. Cycle lengths are the gaps between consecutive start dates
+(``predictions.cycle_gaps``), as in the predictions and analytics, so only
+the start dates of the cycles are read for them. The queries of
+``compute_insights`` run concurrently; an optional date window limits them
+to cycles starting, and symptoms/notes dated, within it.
+"""
+import asyncio
+from datetime import date
+from typing import Optional
+
+from dates import range_filter
+from predictions import DEFAULT_CYCLE_LENGTH, cycle_gaps
+
+DEFAULT_TOP_SYMPTOMS = 5
+FLOWS = ["light", "medium", "heavy"]
+
+
+def _match(user_id: str, date_field: str, date_from: Optional[date], date_to: Optional[date],
+           legacy: bool) -> dict:
+    return {"$match": {"userId": user_id, **range_filter(date_field, date_from, date_to, legacy=legacy)}}
+
+
+def flow_pipeline(match: dict) -> list:
+    return [match, {"$group": {"_id": "$flow", "count": {"$sum": 1}}}]
+
+
+def symptom_frequency_pipeline(match: dict, top: int) -> list:
+    return [
+        match,
+        {"$unwind": "$symptoms"},
+        {"$group": {"_id": "$symptoms", "count": {"$sum": 1}}},
+        {"$sort": {"count": -1, "_id": 1}},
+        {"$limit": top},
+    ]
+
+
+def regularity(variation: int) -> str:
+    if variation <= 7:
+        return "regular"
+    if variation <= 14:
+        return "somewhat_irregular"
+    return "irregular"
+
+
+async def compute_insights(db, user_id: str, date_from: Optional[date] = None,
+                           date_to: Optional[date] = None, top: int = DEFAULT_TOP_SYMPTOMS,
+                           legacy: bool = True) -> dict:
+    """``legacy`` also matches day fields still stored as strings (see dates.py)."""
+    cycle_match = _match(user_id, "startDate", date_from, date_to, legacy)
+    day_match = _match(user_id, "date", date_from, date_to, legacy)
+
+    cycles, flows, top_symptoms, symptom_entries, note_count, latest_notes = await asyncio.gather(
+        db.cycles.find(cycle_match["$match"], {"_id": 0, "startDate": 1}).to_list(None),
+        db.cycles.aggregate(flow_pipeline(cycle_match)).to_list(None),
+        db.symptoms.aggregate(symptom_frequency_pipeline(day_match, top)).to_list(top),
+        db.symptoms.count_documents(day_match["$match"]),
+        db.notes.count_documents(day_match["$match"]),
+        db.notes.find(day_match["$match"], {"_id": 0}).sort(
+            [("date", -1), ("createdAt", -1)]
+        ).limit(1).to_list(1),
+    )
+
+    flow_counts = {flow: 0 for flow in FLOWS}
+    flow_counts.update({row["_id"]: row["count"] for row in flows if row["_id"]})
+
+    if cycles:
+        # Without two plausible starts, the length the predictions assume
+        lengths = cycle_gaps(cycle["startDate"] for cycle in cycles) or [DEFAULT_CYCLE_LENGTH]
+        variation = max(lengths) - min(lengths)
+        cycle_stats = {
+            "totalCycles": len(cycles),
+            # The plain mean over the window; predictions weigh recent gaps more
+            "avgCycleLength": round(sum(lengths) / len(lengths), 1),
+            "minLength": min(lengths),
+            "maxLength": max(lengths),
+            "lengthVariation": variation,
+            "regularity": regularity(variation),
+            # Ties resolve in FLOWS order
+            "mostCommonFlow": max(flow_counts, key=flow_counts.get),
+        }
+    else:
+        cycle_stats = {"totalCycles": 0}
+
+    return {
+        **cycle_stats,
+        "flowCounts": flow_counts,
+        "topSymptoms": [{"symptom": row["_id"], "count": row["count"]} for row in top_symptoms],
+        "symptomEntries": symptom_entries,
+        "noteCount": note_count,
+        "latestNote": latest_notes[0] if latest_notes else None,
+    }
@@ -0,0 +1,170 @@
+"""Cross-worker invalidation of the in-process caches.
+
+Each worker process keeps its own predictors, month grids, response cache
+versions and record cache. When several workers serve the same database, a
+write handled by one of them has to reach the caches of the others. The
+writer publishes one event per change::
+
+    {"userId": ..., "collection": ..., "ids": [...], "months": [...]}
+
+and every other worker applies it with its handler (``server.apply_remote_change``).
+Handlers only drop cached state, so applying an event twice is harmless.
+
+Buses, chosen with INVALIDATION_BUS:
+
+    none   single process, nothing to fan out (default)
+    mongo  a capped collection that every worker tails (``MongoBus``)
+
+``LocalHub`` connects buses of the same process; it stands in for a real bus
+in tests and benchmarks that simulate several workers.
+"""
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timedelta
+from typing import Callable, List, Optional
+
+from pymongo import CursorType
+from pymongo.errors import CollectionInvalid
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[dict], None]
+
+# Events published in one insert at most
+PUBLISH_BATCH = 500
+# On reconnect, events this old are read again in case worker clocks differ
+REPLAY_MARGIN = timedelta(seconds=5)
+
+
+class InvalidationBus:
+    """Single-process bus: every cache lives in this process, nothing is sent."""
+
+    def __init__(self):
+        self.worker_id = uuid.uuid4().hex
+
+    def publish(self, event: dict) -> None:
+        pass
+
+    async def start(self, handler: Handler) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+
+class LocalHub:
+    """In-memory fan-out between the buses created by ``bus()``."""
+
+    def __init__(self):
+        self.buses: List["LocalBus"] = []
+
+    def bus(self) -> "LocalBus":
+        bus = LocalBus(self)
+        self.buses.append(bus)
+        return bus
+
+
+class LocalBus(InvalidationBus):
+    def __init__(self, hub: LocalHub):
+        super().__init__()
+        self._hub = hub
+        self._handler: Optional[Handler] = None
+
+    def publish(self, event: dict) -> None:
+        for bus in self._hub.buses:
+            if bus is not self and bus._handler is not None:
+                bus._handler(event)
+
+    async def start(self, handler: Handler) -> None:
+        self._handler = handler
+
+    async def stop(self) -> None:
+        self._handler = None
+
+
+class MongoBus(InvalidationBus):
+    """Events go through a capped collection tailed by every worker.
+
+    Publishing only queues the event; a background task inserts queued
+    events in batches, so write handlers never wait on the bus. Works on a
+    standalone mongod as well as on a replica set.
+    """
+
+    def __init__(self, db, collection: str = "invalidations", size_bytes: int = 16 * 1024 * 1024):
+        super().__init__()
+        self._db = db
+        self._name = collection
+        self._size_bytes = size_bytes
+        self._queue: "asyncio.Queue[dict]" = asyncio.Queue()
+        self._tasks: List[asyncio.Task] = []
+
+    @property
+    def _collection(self):
+        return self._db[self._name]
+
+    async def _ensure_collection(self) -> None:
+        try:
+            await self._db.create_collection(self._name, capped=True, size=self._size_bytes)
+            # A tailable cursor on an empty collection dies at once
+            await self._collection.insert_one({"origin": None, "at": datetime.utcnow()})
+        except CollectionInvalid:
+            pass
+
+    def publish(self, event: dict) -> None:
+        self._queue.put_nowait({**event, "origin": self.worker_id, "at": datetime.utcnow()})
+
+    async def start(self, handler: Handler) -> None:
+        await self._ensure_collection()
+        since = datetime.utcnow()
+        self._tasks = [
+            asyncio.create_task(self._publish_loop()),
+            asyncio.create_task(self._tail_loop(handler, since)),
+        ]
+        logger.info(f"Invalidation bus started on {self._name} as worker {self.worker_id}")
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _publish_loop(self) -> None:
+        while True:
+            events = [await self._queue.get()]
+            while len(events) < PUBLISH_BATCH and not self._queue.empty():
+                events.append(self._queue.get_nowait())
+            try:
+                await self._collection.insert_many(events, ordered=False)
+            except Exception as e:
+                # The other workers fall back on their cache TTLs for these changes
+                logger.error(f"Error publishing {len(events)} invalidation events: {e}")
+
+    async def _tail_loop(self, handler: Handler, since: datetime) -> None:
+        resume_from = since
+        while True:
+            try:
+                cursor = self._collection.find(
+                    {"at": {"$gte": resume_from}}, cursor_type=CursorType.TAILABLE_AWAIT
+                )
+                while cursor.alive:
+                    async for event in cursor:
+                        since = max(since, event["at"])
+                        if event.get("origin") not in (None, self.worker_id):
+                            handler(event)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error reading invalidation events: {e}")
+            # The cursor died (restart, failover); resume slightly before the last event seen
+            resume_from = since - REPLAY_MARGIN
+            await asyncio.sleep(1)
+
+
+def create_bus(kind: Optional[str], db) -> InvalidationBus:
+    kind = (kind or "none").lower()
+    if kind == "none":
+        return InvalidationBus()
+    if kind == "mongo":
+        return MongoBus(db)
+    raise ValueError(f"Unknown INVALIDATION_BUS {kind!r}, expected none or mongo")
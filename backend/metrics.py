@@ -0,0 +1,350 @@
+"""Request, MongoDB and serialization metrics in the Prometheus text format.
+
+``MetricsMiddleware`` records, per route template (``/api/cycles/{cycle_id}``,
+never the raw path), the request latency, the response size and the number
+of requests in flight. ``InstrumentedDatabase`` wraps a Motor database so
+that every operation is timed per collection, and ``timed`` measures
+pydantic validation and JSON serialization separately. Comparing
+``mongo_operation_duration_seconds`` with ``serialization_duration_seconds``
+and ``http_request_duration_seconds`` of a route tells where its time goes.
+
+``PoolMetricsListener`` is a pymongo connection pool listener reporting how
+long operations wait for a connection and how many are checked out, which
+shows when requests queue on an exhausted pool.
+
+Everything lives in ``REGISTRY`` and is rendered by ``REGISTRY.render()``.
+Updates are locked: pool events arrive on Motor's executor threads.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, List, Sequence, Tuple
+
+from pymongo import monitoring
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+def _label_text(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = []
+    for name, value in zip(names, values):
+        escaped = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        pairs.append(f'{name}="{escaped}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+def _format(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f"{self.name}{_label_text(self.labels, key)} {_format(value)}" for key, value in values]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1.0) -> None:
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        # labels -> (per-bucket counts, last one is +Inf), sum, count
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][bisect_left(self.buckets, value)] += 1
+            series[1] += value
+            series[2] += 1
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            snapshot = [(key, list(counts), total, count) for key, (counts, total, count) in self._series.items()]
+        lines = []
+        for key, counts, total, count in sorted(snapshot):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                labels = _label_text(self.labels + ("le",), key + (_format(bound),))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _label_text(self.labels, key)
+            lines.append(f"{self.name}_sum{labels} {_format(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+REQUEST_DURATION = REGISTRY.register(Histogram(
+    "http_request_duration_seconds", "Request latency by route template", ("method", "route", "status")))
+RESPONSE_SIZE = REGISTRY.register(Histogram(
+    "http_response_size_bytes", "Response body size by route template", ("method", "route"), SIZE_BUCKETS))
+IN_FLIGHT = REGISTRY.register(Gauge(
+    "http_requests_in_flight", "Requests being handled", ("method",)))
+MONGO_DURATION = REGISTRY.register(Histogram(
+    "mongo_operation_duration_seconds", "MongoDB operation latency", ("collection", "operation")))
+MONGO_ERRORS = REGISTRY.register(Counter(
+    "mongo_operation_errors_total", "MongoDB operations that raised", ("collection", "operation")))
+SERIALIZATION_DURATION = REGISTRY.register(Histogram(
+    "serialization_duration_seconds", "Time spent validating and serializing payloads", ("stage", "model")))
+RECORD_CACHE_LOOKUPS = REGISTRY.register(Counter(
+    "record_cache_lookups_total", "Record cache lookups by record kind and result", ("kind", "result")))
+POOL_WAIT = REGISTRY.register(Histogram(
+    "mongo_pool_wait_seconds", "Time spent waiting for a pooled connection", ("address",)))
+POOL_CHECKED_OUT = REGISTRY.register(Gauge(
+    "mongo_pool_checked_out_connections", "Connections currently checked out of the pool", ("address",)))
+POOL_CONNECTIONS = REGISTRY.register(Gauge(
+    "mongo_pool_open_connections", "Connections currently open in the pool", ("address",)))
+POOL_CHECKOUT_FAILURES = REGISTRY.register(Counter(
+    "mongo_pool_checkout_failures_total", "Connection checkouts that failed", ("address", "reason")))
+ADMISSION_DECISIONS = REGISTRY.register(Counter(
+    "admission_decisions_total", "Admission decisions by route template (see admission.py)", ("route", "decision")))
+ADMISSION_QUEUE_WAIT = REGISTRY.register(Histogram(
+    "admission_queue_wait_seconds", "Time admitted requests waited for a slot"))
+ADMISSION_QUEUE_DEPTH = REGISTRY.register(Gauge(
+    "admission_queue_depth", "Requests waiting for a slot"))
+
+
+@contextmanager
+def timed(histogram: Histogram, *labels: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        histogram.observe(time.perf_counter() - started, *labels)
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency, response size and in-flight requests."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = {"code": 500}
+        size = 0
+
+        async def send_wrapper(message):
+            nonlocal size
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        IN_FLIGHT.inc(method)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            IN_FLIGHT.dec(method)
+            # The router stores the matched route in the scope; unmatched paths share one label
+            route = scope.get("route")
+            template = getattr(route, "path", None) or "<unmatched>"
+            REQUEST_DURATION.observe(elapsed, method, template, str(status["code"]))
+            RESPONSE_SIZE.observe(size, method, template)
+
+
+# Collection methods that talk to the server and return a coroutine
+_TIMED_METHODS = {
+    "find_one", "insert_one", "insert_many", "update_one", "update_many", "replace_one",
+    "delete_one", "delete_many", "find_one_and_update", "find_one_and_delete",
+    "find_one_and_replace", "count_documents", "estimated_document_count", "distinct",
+    "bulk_write", "create_indexes", "create_index", "drop_index", "index_information",
+}
+
+
+class InstrumentedCursor:
+    """Times ``to_list`` of a find/aggregate cursor; chaining keeps the wrapper."""
+
+    def __init__(self, cursor, collection: str, operation: str):
+        self._cursor = cursor
+        self._collection = collection
+        self._operation = operation
+
+    async def to_list(self, length=None):
+        started = time.perf_counter()
+        try:
+            return await self._cursor.to_list(length)
+        except Exception:
+            MONGO_ERRORS.inc(self._collection, self._operation)
+            raise
+        finally:
+            MONGO_DURATION.observe(time.perf_counter() - started, self._collection, self._operation)
+
+    def __aiter__(self):
+        return self._cursor.__aiter__()
+
+    def __getattr__(self, name):
+        attr = getattr(self._cursor, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            return self if result is self._cursor else result
+        return call
+
+
+class InstrumentedCollection:
+    def __init__(self, collection):
+        self._collection = collection
+        self._name = collection.name
+
+    def find(self, *args, **kwargs):
+        return InstrumentedCursor(self._collection.find(*args, **kwargs), self._name, "find")
+
+    def aggregate(self, *args, **kwargs):
+        return InstrumentedCursor(self._collection.aggregate(*args, **kwargs), self._name, "aggregate")
+
+    def __getattr__(self, name):
+        attr = getattr(self._collection, name)
+        if name not in _TIMED_METHODS:
+            return attr
+
+        async def call(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await attr(*args, **kwargs)
+            except Exception:
+                MONGO_ERRORS.inc(self._name, name)
+                raise
+            finally:
+                MONGO_DURATION.observe(time.perf_counter() - started, self._name, name)
+        return call
+
+
+class InstrumentedDatabase:
+    """Motor database proxy whose collections time every operation."""
+
+    def __init__(self, database):
+        self._database = database
+        self._collections: Dict[str, InstrumentedCollection] = {}
+
+    def __getitem__(self, name: str) -> InstrumentedCollection:
+        collection = self._collections.get(name)
+        if collection is None:
+            collection = self._collections[name] = InstrumentedCollection(self._database[name])
+        return collection
+
+    def __getattr__(self, name: str):
+        # Real database attributes (command, name, ...) pass through, anything else is a collection
+        if name.startswith("_") or hasattr(type(self._database), name):
+            return getattr(self._database, name)
+        return self[name]
+
+
+def _address(event) -> str:
+    host, port = event.address
+    return f"{host}:{port}"
+
+
+class PoolMetricsListener(monitoring.ConnectionPoolListener):
+    """Feeds the ``mongo_pool_*`` metrics from pymongo's pool events.
+
+    A checkout starts and completes on the same thread, so its start time is
+    kept in a thread local until the connection (or the failure) arrives.
+    """
+
+    def __init__(self):
+        self._checkouts = threading.local()
+
+    def _wait(self, event) -> float:
+        started = getattr(self._checkouts, "started", None)
+        self._checkouts.started = None
+        return time.perf_counter() - started if started is not None else 0.0
+
+    def connection_check_out_started(self, event):
+        self._checkouts.started = time.perf_counter()
+
+    def connection_checked_out(self, event):
+        address = _address(event)
+        POOL_WAIT.observe(self._wait(event), address)
+        POOL_CHECKED_OUT.inc(address)
+
+    def connection_check_out_failed(self, event):
+        address = _address(event)
+        POOL_WAIT.observe(self._wait(event), address)
+        POOL_CHECKOUT_FAILURES.inc(address, event.reason)
+
+    def connection_checked_in(self, event):
+        POOL_CHECKED_OUT.dec(_address(event))
+
+    def connection_created(self, event):
+        POOL_CONNECTIONS.inc(_address(event))
+
+    def connection_closed(self, event):
+        POOL_CONNECTIONS.dec(_address(event))
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
@@ -0,0 +1,233 @@
+"""Online, resumable schema migrations.
+
+A migration rewrites the documents of some collections in place while the
+app keeps serving. Documents are processed in ``_id`` order, one batch at a
+time; after each batch the last ``_id`` is saved in ``schema_migrations`` so
+that an interrupted run resumes where it stopped. Each update is
+conditioned on the values it read, so a document the app changed in the
+meantime is left alone: the app only writes the new form, and a document
+still in the old form is picked up again by the next run.
+
+``schema_migrations`` holds one document per migration, with its version,
+status and counters; the schema version of the database is the highest
+version whose migration completed.
+
+    python migrations.py status
+    python migrations.py up --batch-size 1000 --pause 0.05
+"""
+import asyncio
+import logging
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import typer
+from dotenv import load_dotenv
+from pymongo import UpdateOne
+
+from database import create_client
+from dates import DATE_FIELDS, parse_day, to_bson
+from search import normalize_tags
+
+logger = logging.getLogger(__name__)
+
+COLLECTION = "schema_migrations"
+
+cli = typer.Typer(help="Schema migrations")
+
+
+class Migration:
+    """Base class: select documents in the old form and compute their update."""
+
+    version: int
+    name: str
+    description: str
+    collections: List[str]
+
+    def pending_filter(self, collection: str) -> dict:
+        """Documents of ``collection`` still needing this migration."""
+        raise NotImplementedError
+
+    def update(self, collection: str, doc: dict) -> Optional[UpdateOne]:
+        """The conditional update migrating ``doc``, or None if it cannot be migrated."""
+        raise NotImplementedError
+
+
+class NativeDates(Migration):
+    """Store the day fields (dates.DATE_FIELDS) as BSON dates instead of strings."""
+
+    version = 1
+    name = "native_dates"
+    description = "Day fields stored as BSON dates instead of YYYY-MM-DD strings"
+    collections = list(DATE_FIELDS)
+
+    def pending_filter(self, collection: str) -> dict:
+        return {"$or": [{field: {"$type": "string"}} for field in DATE_FIELDS[collection]]}
+
+    def update(self, collection: str, doc: dict) -> Optional[UpdateOne]:
+        condition, changes = {"_id": doc["_id"]}, {}
+        for field in DATE_FIELDS[collection]:
+            value = doc.get(field)
+            if not isinstance(value, str):
+                continue
+            try:
+                day = parse_day(value)
+            except ValueError:
+                return None
+            condition[field] = value
+            changes[field] = to_bson(day) if day else None
+        return UpdateOne(condition, {"$set": changes})
+
+
+class LowercaseTags(Migration):
+    """Store symptom tags lowercase, as the symptom models now write them (see search.py)."""
+
+    version = 2
+    name = "lowercase_tags"
+    description = "Symptom tags stored lowercase, so that tag search ignores case"
+    collections = ["symptoms"]
+
+    def pending_filter(self, collection: str) -> dict:
+        return {"symptoms": {"$regex": "[A-Z]"}}
+
+    def update(self, collection: str, doc: dict) -> Optional[UpdateOne]:
+        tags = doc.get("symptoms", [])
+        return UpdateOne({"_id": doc["_id"], "symptoms": tags}, {"$set": {"symptoms": normalize_tags(tags)}})
+
+
+MIGRATIONS: List[Migration] = [NativeDates(), LowercaseTags()]
+LATEST_VERSION = max(m.version for m in MIGRATIONS)
+
+
+async def migration_status(db) -> Dict[str, dict]:
+    docs = await db[COLLECTION].find({}).to_list(None)
+    return {doc["_id"]: doc for doc in docs}
+
+
+async def is_applied(db, name: str) -> bool:
+    doc = await db[COLLECTION].find_one({"_id": name, "status": "completed"})
+    return doc is not None
+
+
+async def schema_version(db) -> int:
+    done = [m.version for m in MIGRATIONS if await is_applied(db, m.name)]
+    return max(done, default=0)
+
+
+async def _save(db, migration: Migration, **fields) -> None:
+    await db[COLLECTION].update_one(
+        {"_id": migration.name}, {"$set": {"version": migration.version, **fields}}, upsert=True
+    )
+
+
+async def run_migration(db, migration: Migration, batch_size: int = 1000, pause: float = 0.0) -> dict:
+    """Apply ``migration`` to every pending document, resuming a previous run."""
+    state = (await db[COLLECTION].find_one({"_id": migration.name})) or {}
+    if state.get("status") == "completed":
+        return {"name": migration.name, **state}
+    positions = state.get("positions", {}) if state.get("status") == "running" else {}
+    migrated, failed = state.get("migrated", 0), state.get("failed", 0)
+    if not positions:
+        await _save(db, migration, status="running", description=migration.description,
+                    positions={}, migrated=0, failed=0, startedAt=datetime.utcnow(), finishedAt=None)
+        migrated = failed = 0
+
+    for collection in migration.collections:
+        after = positions.get(collection)
+        while True:
+            query = migration.pending_filter(collection)
+            if after is not None:
+                query = {"$and": [query, {"_id": {"$gt": after}}]}
+            docs = await db[collection].find(query).sort("_id", 1).limit(batch_size).to_list(batch_size)
+            if not docs:
+                break
+            updates = []
+            for doc in docs:
+                update = migration.update(collection, doc)
+                if update is None:
+                    failed += 1
+                    logger.warning(f"{migration.name}: cannot migrate {collection} {doc.get('id', doc['_id'])}")
+                else:
+                    updates.append(update)
+            if updates:
+                result = await db[collection].bulk_write(updates, ordered=False)
+                migrated += result.modified_count
+            after = docs[-1]["_id"]
+            positions[collection] = after
+            await _save(db, migration, positions=positions, migrated=migrated, failed=failed)
+            logger.info(f"{migration.name}: {collection} up to {after}, {migrated} migrated, {failed} failed")
+            if pause:
+                # Leave room for the app's own queries
+                await asyncio.sleep(pause)
+
+    # Unparseable documents stay behind as failures; anything else still pending was written
+    # in the old form during the run (by an older app version) and needs another run
+    remaining = 0
+    for collection in migration.collections:
+        remaining += await db[collection].count_documents(migration.pending_filter(collection))
+    status = "completed" if remaining == failed else "incomplete"
+    await _save(db, migration, status=status, remaining=remaining, migrated=migrated, failed=failed,
+                finishedAt=datetime.utcnow())
+    return {"name": migration.name, "status": status, "migrated": migrated, "failed": failed, "remaining": remaining}
+
+
+async def run_all(db, batch_size: int = 1000, pause: float = 0.0) -> List[dict]:
+    results = []
+    for migration in sorted(MIGRATIONS, key=lambda m: m.version):
+        result = await run_migration(db, migration, batch_size, pause)
+        results.append(result)
+        if result.get("status") != "completed":
+            break
+    return results
+
+
+def _connect():
+    load_dotenv(Path(__file__).parent / '.env')
+    client = create_client(os.environ['MONGO_URL'], os.environ)
+    return client, client[os.environ['DB_NAME']]
+
+
+@cli.command()
+def up(
+    batch_size: int = typer.Option(1000, min=1, help="documents per batch and checkpoint"),
+    pause: float = typer.Option(0.0, min=0.0, help="seconds to sleep between batches"),
+):
+    """Apply every pending migration, in version order."""
+    async def main():
+        client, db = _connect()
+        try:
+            return await run_all(db, batch_size, pause)
+        finally:
+            client.close()
+
+    results = asyncio.run(main())
+    for result in results:
+        typer.echo(f"{result['name']}: {result['status']} ({result.get('migrated', 0)} migrated, "
+                   f"{result.get('failed', 0)} failed)")
+    raise typer.Exit(0 if all(r.get("status") == "completed" for r in results) else 1)
+
+
+@cli.command()
+def status():
+    """Show the schema version and the state of every migration."""
+    async def main():
+        client, db = _connect()
+        try:
+            return await schema_version(db), await migration_status(db)
+        finally:
+            client.close()
+
+    version, states = asyncio.run(main())
+    typer.echo(f"Schema version: {version}")
+    for migration in MIGRATIONS:
+        state = states.get(migration.name, {})
+        typer.echo(f"{migration.version} {migration.name}: {state.get('status', 'pending')} - {migration.description}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    cli()
@@ -0,0 +1,155 @@
+"""Materialized per-day month grids for the calendar view.
+
+``build_month_grid`` merges the cycles, symptoms and notes of one month with
+the current predictions into one entry per day, keyed by date so that every
+record is visited once. Grids are kept in ``MonthGridCache`` until a write
+touches a day of that month.
+"""
+import calendar
+from collections import OrderedDict
+from datetime import date, timedelta
+from typing import Iterable, List, Optional, Tuple
+
+from predictions import parse_date
+
+NOTE_PREVIEW_LENGTH = 80
+
+
+def month_bounds(month: str) -> Tuple[date, date]:
+    """Return the first and last day of a ``YYYY-MM`` month."""
+    year, month_number = (int(part) for part in month.split("-"))
+    last_day = calendar.monthrange(year, month_number)[1]
+    return date(year, month_number, 1), date(year, month_number, last_day)
+
+
+def months_spanned(start, end=None) -> List[str]:
+    """List the ``YYYY-MM`` months touched by a date or an inclusive date range."""
+    start = parse_date(start)
+    end = parse_date(end) or start
+    if start is None:
+        return []
+    if end < start:
+        start, end = end, start
+    months = []
+    year, month_number = start.year, start.month
+    while (year, month_number) <= (end.year, end.month):
+        months.append(f"{year:04d}-{month_number:02d}")
+        year, month_number = (year + 1, 1) if month_number == 12 else (year, month_number + 1)
+    return months
+
+
+def prediction_months(predictions: Optional[dict]) -> List[str]:
+    """Months whose grid carries a flag derived from ``predictions``."""
+    if not predictions:
+        return []
+    months = set(months_spanned(predictions["fertileWindow"]["start"], predictions["fertileWindow"]["end"]))
+    months.update(months_spanned(predictions["nextPeriod"]))
+    return sorted(months)
+
+
+def _prediction_flag(day: date, predictions: Optional[dict]) -> Optional[str]:
+    if not predictions:
+        return None
+    if day == parse_date(predictions["nextPeriod"]):
+        return "period"
+    if day == parse_date(predictions["ovulation"]):
+        return "ovulation"
+    fertile = predictions["fertileWindow"]
+    if parse_date(fertile["start"]) <= day <= parse_date(fertile["end"]):
+        return "fertile"
+    return None
+
+
+def _day_key(value) -> Optional[str]:
+    """``YYYY-MM-DD`` of a stored day, whether a BSON date or a legacy string."""
+    day = parse_date(value)
+    return day.isoformat() if day else None
+
+
+def build_month_grid(month: str, cycles: Iterable[dict], symptoms: Iterable[dict],
+                     notes: Iterable[dict], predictions: Optional[dict]) -> dict:
+    """Build the day-by-day summary of ``month`` from pre-filtered records."""
+    first, last = month_bounds(month)
+    days = OrderedDict()
+    day = first
+    while day <= last:
+        days[day.isoformat()] = {
+            "date": day.isoformat(),
+            "cycle": None,
+            "symptoms": None,
+            "notes": None,
+            "prediction": _prediction_flag(day, predictions),
+        }
+        day += timedelta(days=1)
+
+    for cycle in cycles:
+        start = parse_date(cycle.get("startDate"))
+        if start is None:
+            continue
+        end = parse_date(cycle.get("endDate")) or start
+        day = max(start, first)
+        while day <= min(end, last):
+            entry = days[day.isoformat()]
+            if entry["cycle"] is None:
+                entry["cycle"] = {"id": cycle["id"], "flow": cycle.get("flow"), "isStart": day == start}
+            day += timedelta(days=1)
+
+    for symptom in symptoms:
+        entry = days.get(_day_key(symptom.get("date")))
+        if entry is None:
+            continue
+        if entry["symptoms"] is None:
+            entry["symptoms"] = {"ids": [], "symptoms": [], "intensity": symptom.get("intensity")}
+        summary = entry["symptoms"]
+        summary["ids"].append(symptom["id"])
+        summary["symptoms"].extend(s for s in symptom.get("symptoms", []) if s not in summary["symptoms"])
+
+    for note in notes:
+        entry = days.get(_day_key(note.get("date")))
+        if entry is None:
+            continue
+        if entry["notes"] is None:
+            entry["notes"] = {"ids": [], "preview": note.get("content", "")[:NOTE_PREVIEW_LENGTH]}
+        entry["notes"]["ids"].append(note["id"])
+
+    return {"month": month, "days": list(days.values())}
+
+
+class MonthGridCache:
+    """Bounded cache of built month grids, evicting the least recently used.
+
+    ``generation`` changes on every invalidation; a grid built from reads
+    that started before an invalidation is not stored, since it may be stale.
+    """
+
+    def __init__(self, max_months: int = 36):
+        self.max_months = max_months
+        self.generation = 0
+        self._grids: "OrderedDict[str, dict]" = OrderedDict()
+
+    def get(self, month: str) -> Optional[dict]:
+        grid = self._grids.get(month)
+        if grid is not None:
+            self._grids.move_to_end(month)
+        return grid
+
+    def put(self, month: str, grid: dict, generation: int) -> None:
+        if generation != self.generation:
+            return
+        self._grids[month] = grid
+        self._grids.move_to_end(month)
+        while len(self._grids) > self.max_months:
+            self._grids.popitem(last=False)
+
+    def invalidate(self, months: Iterable[str]) -> None:
+        self.generation += 1
+        for month in months:
+            self._grids.pop(month, None)
+
+    def invalidate_prefix(self, prefix: str) -> None:
+        """Drop every grid whose key starts with ``prefix``."""
+        self.invalidate([month for month in self._grids if month.startswith(prefix)])
+
+    def clear(self) -> None:
+        self.generation += 1
+        self._grids.clear()
@@ -0,0 +1,150 @@
+"""Cycle prediction engine.
+
+Predicts the next period, ovulation and fertile window from the gaps between
+consecutive cycle start dates. Recent gaps weigh more than old ones
+(exponential decay over a rolling window), and the weighted standard
+deviation of the gaps gives the confidence range around the next period.
+
+``CyclePredictor`` keeps the start dates sorted in memory so that inserting,
+moving or removing a single cycle only touches the rolling window instead of
+recomputing over the whole history.
+"""
+import bisect
+import math
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+DEFAULT_CYCLE_LENGTH = 28
+LUTEAL_PHASE_DAYS = 14
+FERTILE_DAYS_BEFORE_OVULATION = 5
+FERTILE_DAYS_AFTER_OVULATION = 1
+
+# Only the most recent gaps are used, each one weighing DECAY times the next
+WINDOW = 12
+DECAY = 0.8
+
+# Gaps outside this range are logging artifacts (duplicates, missed months)
+MIN_GAP_DAYS = 15
+MAX_GAP_DAYS = 90
+
+
+def parse_date(value) -> Optional[date]:
+    """Parse a stored day (BSON date or ``YYYY-MM-DD`` string), None if invalid."""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    try:
+        return date.fromisoformat(str(value)[:10])
+    except (TypeError, ValueError):
+        return None
+
+
+def cycle_gaps(start_dates: Iterable) -> List[int]:
+    """Plausible day gaps between consecutive distinct start dates, oldest first.
+
+    The length of a cycle is the gap to the next start. The predictions and
+    insights share this helper; analytics computes the same gaps with numpy.
+    """
+    starts = sorted({start for start in (parse_date(value) for value in start_dates) if start is not None})
+    gaps = [(b - a).days for a, b in zip(starts, starts[1:])]
+    return [g for g in gaps if MIN_GAP_DAYS <= g <= MAX_GAP_DAYS]
+
+
+def weighted_gap_stats(gaps: List[int]) -> Tuple[float, float]:
+    """Return the exponentially weighted mean and standard deviation of gaps.
+
+    ``gaps`` is ordered oldest first; the last gap gets weight 1.
+    """
+    weights = [DECAY ** (len(gaps) - 1 - i) for i in range(len(gaps))]
+    total = sum(weights)
+    mean = sum(w * g for w, g in zip(weights, gaps)) / total
+    variance = sum(w * (g - mean) ** 2 for w, g in zip(weights, gaps)) / total
+    return mean, math.sqrt(variance)
+
+
+def _confidence(sample_size: int, std_dev: float) -> str:
+    if sample_size >= 6 and std_dev <= 2:
+        return "high"
+    if sample_size >= 3 and std_dev <= 4:
+        return "medium"
+    return "low"
+
+
+def build_predictions(last_start: date, gaps: List[int]) -> dict:
+    """Compute the prediction payload from the last start date and recent gaps."""
+    if gaps:
+        mean, std_dev = weighted_gap_stats(gaps)
+    else:
+        mean, std_dev = float(DEFAULT_CYCLE_LENGTH), 0.0
+
+    cycle_length = round(mean)
+    next_period = last_start + timedelta(days=cycle_length)
+    ovulation = next_period - timedelta(days=LUTEAL_PHASE_DAYS)
+    spread = max(1, math.ceil(std_dev)) if gaps else 3
+
+    return {
+        "nextPeriod": next_period.isoformat(),
+        "nextPeriodRange": {
+            "start": (next_period - timedelta(days=spread)).isoformat(),
+            "end": (next_period + timedelta(days=spread)).isoformat(),
+        },
+        "ovulation": ovulation.isoformat(),
+        "fertileWindow": {
+            "start": (ovulation - timedelta(days=FERTILE_DAYS_BEFORE_OVULATION)).isoformat(),
+            "end": (ovulation + timedelta(days=FERTILE_DAYS_AFTER_OVULATION)).isoformat(),
+        },
+        "avgCycleLength": cycle_length,
+        "stdDev": round(std_dev, 2),
+        "sampleSize": len(gaps),
+        "confidence": _confidence(len(gaps), std_dev),
+    }
+
+
+class CyclePredictor:
+    """Incrementally maintained predictions for one cycle history."""
+
+    def __init__(self, cycles: Iterable[Tuple[str, str]] = ()):
+        self._start_by_id: Dict[str, date] = {}
+        self._sorted: List[Tuple[date, str]] = []
+        self._result: Optional[dict] = None
+        for cycle_id, start_date in cycles:
+            start = parse_date(start_date)
+            if start is not None:
+                self._start_by_id[cycle_id] = start
+                self._sorted.append((start, cycle_id))
+        self._sorted.sort()
+
+    def __len__(self) -> int:
+        return len(self._sorted)
+
+    def upsert(self, cycle_id: str, start_date) -> None:
+        """Insert a cycle or move an existing one to a new start date."""
+        self.remove(cycle_id)
+        start = parse_date(start_date)
+        if start is None:
+            return
+        self._start_by_id[cycle_id] = start
+        bisect.insort(self._sorted, (start, cycle_id))
+        self._result = None
+
+    def remove(self, cycle_id: str) -> None:
+        start = self._start_by_id.pop(cycle_id, None)
+        if start is None:
+            return
+        index = bisect.bisect_left(self._sorted, (start, cycle_id))
+        del self._sorted[index]
+        self._result = None
+
+    def recent_gaps(self) -> List[int]:
+        """Plausible day gaps between the last WINDOW + 1 start dates, oldest first."""
+        return cycle_gaps(start for start, _ in self._sorted[-(WINDOW + 1):])
+
+    def predict(self) -> Optional[dict]:
+        """Return the current predictions, or None when there are no cycles."""
+        if not self._sorted:
+            return None
+        # Only the rolling window is read, so refreshing after a change is O(WINDOW)
+        if self._result is None:
+            self._result = build_predictions(self._sorted[-1][0], self.recent_gaps())
+        return self._result
@@ -0,0 +1,167 @@
+"""Read-through cache of single records (preferences, records fetched by id).
+
+``RecordCache.get_or_load`` serves a record from its store or loads it once
+per key: concurrent misses of the same key share one load instead of each
+querying Mongo. Writers ``invalidate`` the keys they update or delete rather
+than storing the new version: two concurrent updates can finish in either
+order, and only a read after both sees the latest. A load that was
+overtaken by a write to its key returns its result but does not store it,
+so a slow read cannot put back a version older than the write.
+
+The store is pluggable. ``MemoryStore`` is a per-process LRU with a TTL;
+``RedisStore`` is shared by every worker pointing at the same server, so a
+write in one worker is seen by the others. Missing records are not cached.
+"""
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+import orjson
+
+from metrics import RECORD_CACHE_LOOKUPS
+
+
+class CacheStore:
+    """Interface of the record cache backends."""
+
+    # Whether every worker sees the same entries
+    shared = False
+
+    async def get(self, key: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    async def set(self, key: str, value: Any) -> None:
+        raise NotImplementedError
+
+    async def delete(self, *keys: str) -> None:
+        raise NotImplementedError
+
+    async def clear(self) -> None:
+        raise NotImplementedError
+
+
+class MemoryStore(CacheStore):
+    """In-process LRU store with a TTL; values are kept as they are, not copied."""
+
+    def __init__(self, max_entries: int = 4096, ttl_seconds: float = 60.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+
+    async def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if time.monotonic() - entry[1] > self.ttl_seconds:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    async def set(self, key: str, value: Any) -> None:
+        self._entries[key] = (value, time.monotonic())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def delete(self, *keys: str) -> None:
+        self.discard(*keys)
+
+    def discard(self, *keys: str) -> None:
+        for key in keys:
+            self._entries.pop(key, None)
+
+    async def clear(self) -> None:
+        self._entries.clear()
+
+
+class RedisStore(CacheStore):
+    """Store shared between workers, in Redis (``pip install redis``).
+
+    Values are stored as JSON, so datetimes come back as ISO strings; the
+    pydantic models parse them again when the record is served.
+    """
+
+    shared = True
+
+    def __init__(self, url: str, ttl_seconds: float = 60.0, prefix: str = "records:"):
+        try:
+            from redis import asyncio as redis
+        except ImportError:
+            raise RuntimeError("RECORD_CACHE_URL needs the redis package: pip install redis")
+        self._redis = redis.from_url(url)
+        self.ttl_seconds = ttl_seconds
+        self.prefix = prefix
+
+    async def get(self, key: str) -> Optional[Any]:
+        raw = await self._redis.get(self.prefix + key)
+        return orjson.loads(raw) if raw is not None else None
+
+    async def set(self, key: str, value: Any) -> None:
+        await self._redis.set(self.prefix + key, orjson.dumps(value), px=int(self.ttl_seconds * 1000))
+
+    async def delete(self, *keys: str) -> None:
+        if keys:
+            await self._redis.delete(*(self.prefix + key for key in keys))
+
+    async def clear(self) -> None:
+        async for key in self._redis.scan_iter(match=self.prefix + "*"):
+            await self._redis.delete(key)
+
+
+def _kind(key: str) -> str:
+    """Metrics label of a key: its first segment (the collection)."""
+    return key.split(":", 1)[0]
+
+
+class RecordCache:
+    def __init__(self, store: CacheStore):
+        self.store = store
+        self.hits = 0
+        self.misses = 0
+        self._loads: Dict[str, asyncio.Task] = {}
+
+    async def get_or_load(self, key: str, load: Callable[[], Awaitable[Optional[Any]]]) -> Optional[Any]:
+        value = await self.store.get(key)
+        if value is not None:
+            self.hits += 1
+            RECORD_CACHE_LOOKUPS.inc(_kind(key), "hit")
+            return value
+        self.misses += 1
+        RECORD_CACHE_LOOKUPS.inc(_kind(key), "miss")
+
+        task = self._loads.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._load(key, load))
+            self._loads[key] = task
+            task.add_done_callback(lambda done: self._loads.pop(key) if self._loads.get(key) is done else None)
+        # A cancelled request must not cancel the load the other waiters share
+        return await asyncio.shield(task)
+
+    async def _load(self, key: str, load: Callable[[], Awaitable[Optional[Any]]]) -> Optional[Any]:
+        value = await load()
+        # Only store the result if no write to the key happened while loading
+        if value is not None and self._loads.get(key) is asyncio.current_task():
+            await self.store.set(key, value)
+        return value
+
+    async def invalidate(self, *keys: str) -> None:
+        for key in keys:
+            self._loads.pop(key, None)
+        await self.store.delete(*keys)
+
+    def forget(self, *keys: str) -> None:
+        """Drop what this process holds for ``keys`` after another worker wrote them.
+
+        A shared store was already updated by the writer; a local one is
+        cleared here, and loads in flight are not stored in either case.
+        """
+        for key in keys:
+            self._loads.pop(key, None)
+        if not self.store.shared:
+            self.store.discard(*keys)
+
+    async def clear(self) -> None:
+        self._loads.clear()
+        await self.store.clear()
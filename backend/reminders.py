@@ -0,0 +1,300 @@
+"""Reminders driven by the notification preferences and the predictions.
+
+Each user has at most one pending reminder: the earliest of the enabled
+kinds (``notifications`` flags of the preferences)::
+
+    periodReminders     PERIOD_LEAD_DAYS before the predicted next period
+    ovulationReminders  OVULATION_LEAD_DAYS before the predicted ovulation
+    fertileWindow       on the first day of the predicted fertile window
+    dailyCheck          every day
+
+Reminders fire at ``REMINDER_HOUR`` UTC (the preferences have no time
+zone). The pending reminders live in the ``reminders`` collection, one
+document per user indexed on ``fireAt``, which is the source of truth for
+every worker. ``ReminderScheduler`` only keeps the reminders due within
+``HORIZON`` in a heap keyed by fire time, and reloads the next window from
+the ``fireAt`` index before the current one runs out. A window is loaded
+``REFILL_PAGE`` reminders at a time in (fireAt, userId) order, the next page
+once the heap has drained to half a page, so neither memory nor a tick
+depends on the number of users, even with every user due at
+``REMINDER_HOUR`` or a backlog overdue after downtime. A reminder is claimed by deleting
+its document, so when several workers run the scheduler each one is sent
+once; after sending, the user's next reminder is computed.
+
+Writes reschedule the users they affect (``request``): the cycle write
+handlers, because the predictions move, and the preference updates.
+Requests are collected and processed in the background, so a burst of
+writes of one user is rescheduled once. Users who have not written since
+reminders were enabled get theirs from ``python batch.py reminders``, which
+the server also runs once in the background at startup (see server.py).
+
+Reminders are handed to a ``ReminderSink``, chosen with REMINDER_SINK:
+
+    log   log each reminder (default)
+    none  do not run the scheduler
+"""
+import asyncio
+import heapq
+import logging
+from datetime import date, datetime, time, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from predictions import CyclePredictor, parse_date
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_NOTIFICATIONS = {
+    "periodReminders": True,
+    "ovulationReminders": True,
+    "fertileWindow": False,
+    "dailyCheck": False,
+}
+
+REMINDER_HOUR = 9
+PERIOD_LEAD_DAYS = 2
+OVULATION_LEAD_DAYS = 1
+# Reminders due within this window are held in memory
+HORIZON = timedelta(minutes=10)
+# Reminders overdue by more than this (the scheduler was down) are skipped, not sent late
+MAX_LATENESS = timedelta(hours=6)
+# Reminders being sent, and users being rescheduled, at the same time
+CONCURRENCY = 64
+# Reminders loaded into the heap per query
+REFILL_PAGE = 1000
+
+# (predictions, notifications) of a user
+Inputs = Tuple[Optional[dict], dict]
+Loader = Callable[[str], Awaitable[Inputs]]
+
+
+def _at(day: date, hour: int) -> datetime:
+    return datetime.combine(day, time(hour))
+
+
+def next_reminder(predictions: Optional[dict], notifications: Optional[dict], now: datetime,
+                  hour: int = REMINDER_HOUR) -> Optional[dict]:
+    """The first reminder after ``now`` among the enabled kinds, or None.
+
+    Returns ``{"kind", "day", "fireAt"}`` where ``day`` is the day the
+    reminder is about (``YYYY-MM-DD``).
+    """
+    enabled = {**DEFAULT_NOTIFICATIONS, **(notifications or {})}
+    candidates = []
+    if predictions:
+        events = [
+            ("periodReminders", predictions.get("nextPeriod"), PERIOD_LEAD_DAYS),
+            ("ovulationReminders", predictions.get("ovulation"), OVULATION_LEAD_DAYS),
+            ("fertileWindow", (predictions.get("fertileWindow") or {}).get("start"), 0),
+        ]
+        for kind, value, lead in events:
+            day = parse_date(value)
+            if enabled.get(kind) and day is not None:
+                candidates.append((_at(day - timedelta(days=lead), hour), kind, day))
+    if enabled.get("dailyCheck"):
+        today = now.date() if now < _at(now.date(), hour) else now.date() + timedelta(days=1)
+        candidates.append((_at(today, hour), "dailyCheck", today))
+
+    upcoming = [candidate for candidate in candidates if candidate[0] > now]
+    if not upcoming:
+        return None
+    fire_at, kind, day = min(upcoming)
+    return {"kind": kind, "day": day.isoformat(), "fireAt": fire_at}
+
+
+async def load_inputs(db, user_id: str) -> Inputs:
+    """Predictions and notification flags of ``user_id``, read from the database."""
+    cycles = await db.cycles.find({"userId": user_id}, {"_id": 0, "id": 1, "startDate": 1}).to_list(None)
+    preferences = await db.preferences.find_one({"userId": user_id}, {"_id": 0, "notifications": 1})
+    predictions = CyclePredictor((c["id"], c["startDate"]) for c in cycles).predict()
+    return predictions, (preferences or {}).get("notifications")
+
+
+class ReminderSink:
+    """Delivers due reminders; subclass for push, e-mail, ..."""
+
+    async def send(self, reminder: dict) -> None:
+        raise NotImplementedError
+
+
+class LogSink(ReminderSink):
+    async def send(self, reminder: dict) -> None:
+        logger.info(f"Reminder {reminder['kind']} for user {reminder['userId']} about {reminder['day']}")
+
+
+def create_sink(kind: Optional[str]) -> Optional[ReminderSink]:
+    kind = (kind or "log").lower()
+    if kind == "none":
+        return None
+    if kind == "log":
+        return LogSink()
+    raise ValueError(f"Unknown REMINDER_SINK {kind!r}, expected log or none")
+
+
+class ReminderScheduler:
+    def __init__(self, db, sink: ReminderSink, load: Loader, horizon: timedelta = HORIZON,
+                 hour: int = REMINDER_HOUR, concurrency: int = CONCURRENCY, page_size: int = REFILL_PAGE):
+        self._db = db
+        self.sink = sink
+        self._load = load
+        self.horizon = horizon
+        self.hour = hour
+        self.page_size = page_size
+        self.sent = 0
+        # (fireAt, userId); an entry is live only while _queued[userId] is its fireAt
+        self._heap: List[Tuple[datetime, str]] = []
+        self._queued: Dict[str, datetime] = {}
+        # End of the window loaded in the heap, None before the first refill
+        self._loaded_until: Optional[datetime] = None
+        # Last (fireAt, userId) loaded while the window has more pages, else None
+        self._loaded_to: Optional[Tuple[datetime, str]] = None
+        self._wake = asyncio.Event()
+        self._pending: Set[str] = set()
+        self._pending_added = asyncio.Event()
+        self._slots = asyncio.Semaphore(concurrency)
+        self._concurrency = concurrency
+        self._tasks: List[asyncio.Task] = []
+        self._sending: Set[asyncio.Task] = set()
+
+    def __len__(self) -> int:
+        return len(self._queued)
+
+    def request(self, user_id: str) -> None:
+        """Recompute the next reminder of ``user_id`` soon (after a write)."""
+        self._pending.add(user_id)
+        self._pending_added.set()
+
+    async def start(self) -> None:
+        self._tasks = [asyncio.create_task(self._run()), asyncio.create_task(self._reschedule_loop())]
+
+    async def stop(self) -> None:
+        for task in self._tasks + list(self._sending):
+            task.cancel()
+        await asyncio.gather(*self._tasks, *self._sending, return_exceptions=True)
+        self._tasks = []
+
+    async def reschedule(self, user_id: str, now: Optional[datetime] = None) -> Optional[dict]:
+        """Store the next reminder of ``user_id`` (or remove it when none is due) and return it."""
+        now = now or datetime.utcnow()
+        predictions, notifications = await self._load(user_id)
+        reminder = next_reminder(predictions, notifications, now, self.hour)
+        if reminder is None:
+            await self._db.reminders.delete_one({"userId": user_id})
+            self._queued.pop(user_id, None)
+            return None
+        await self._db.reminders.update_one(
+            {"userId": user_id}, {"$set": {**reminder, "updatedAt": now}}, upsert=True
+        )
+        if self._is_loaded(reminder["fireAt"], user_id):
+            self._enqueue(user_id, reminder["fireAt"])
+        else:
+            # Picked up by the refill that loads its window
+            self._queued.pop(user_id, None)
+        return reminder
+
+    def _enqueue(self, user_id: str, fire_at: datetime) -> None:
+        if self._queued.get(user_id) == fire_at:
+            return
+        self._queued[user_id] = fire_at
+        heapq.heappush(self._heap, (fire_at, user_id))
+        if self._heap[0] == (fire_at, user_id):
+            self._wake.set()
+
+    def _is_loaded(self, fire_at: datetime, user_id: str) -> bool:
+        """Whether a reminder falls in what the refills have loaded so far."""
+        if self._loaded_to is not None:
+            return (fire_at, user_id) <= self._loaded_to
+        return self._loaded_until is not None and fire_at < self._loaded_until
+
+    def _needs_refill(self, now: datetime) -> bool:
+        if self._loaded_until is None or now >= self._refill_at:
+            return True
+        return self._loaded_to is not None and len(self._queued) <= self.page_size // 2
+
+    async def _refill(self, now: datetime) -> None:
+        """Load the next page of the reminders due before ``now + horizon``."""
+        until = now + self.horizon
+        query = {"fireAt": {"$lt": until}}
+        if self._loaded_to is not None:
+            fire_at, user_id = self._loaded_to
+            query["$or"] = [{"fireAt": {"$gt": fire_at}}, {"fireAt": fire_at, "userId": {"$gt": user_id}}]
+        docs = await self._db.reminders.find(query, {"_id": 0, "userId": 1, "fireAt": 1}).sort(
+            [("fireAt", 1), ("userId", 1)]
+        ).limit(self.page_size).to_list(self.page_size)
+        for doc in docs:
+            self._enqueue(doc["userId"], doc["fireAt"])
+        self._loaded_until = until
+        # A full page may have more behind it, loaded once the heap drains
+        self._loaded_to = (docs[-1]["fireAt"], docs[-1]["userId"]) if len(docs) == self.page_size else None
+
+    async def _run(self) -> None:
+        while True:
+            self._wake.clear()
+            try:
+                now = datetime.utcnow()
+                if self._needs_refill(now):
+                    await self._refill(now)
+                while self._heap and self._heap[0][0] <= now:
+                    fire_at, user_id = heapq.heappop(self._heap)
+                    if self._queued.get(user_id) != fire_at:
+                        continue  # superseded by a reschedule
+                    del self._queued[user_id]
+                    await self._slots.acquire()
+                    task = asyncio.create_task(self._fire(user_id, fire_at, now))
+                    self._sending.add(task)
+                    task.add_done_callback(self._sent)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error scheduling reminders: {e}")
+
+            if self._loaded_until is None:
+                next_at = datetime.utcnow() + timedelta(seconds=1)
+            elif self._needs_refill(datetime.utcnow()):
+                next_at = datetime.utcnow()
+            else:
+                next_at = self._refill_at
+            if self._heap:
+                next_at = min(next_at, self._heap[0][0])
+            delay = max(0.0, (next_at - datetime.utcnow()).total_seconds())
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+
+    @property
+    def _refill_at(self) -> datetime:
+        # Half a window ahead, so reminders are in the heap well before they are due
+        return self._loaded_until - self.horizon / 2
+
+    def _sent(self, task: asyncio.Task) -> None:
+        self._sending.discard(task)
+        self._slots.release()
+
+    async def _fire(self, user_id: str, fire_at: datetime, now: datetime) -> None:
+        try:
+            # Whoever deletes the document sends it; a rescheduled one no longer matches fire_at
+            reminder = await self._db.reminders.find_one_and_delete(
+                {"userId": user_id, "fireAt": fire_at}, {"_id": 0}
+            )
+            if reminder is None:
+                return
+            if now - fire_at <= MAX_LATENESS:
+                await self.sink.send(reminder)
+                self.sent += 1
+            else:
+                logger.warning(f"Skipped reminder {reminder['kind']} of user {user_id}, due at {fire_at}")
+        except Exception as e:
+            logger.error(f"Error sending reminder to user {user_id}: {e}")
+        self.request(user_id)
+
+    async def _reschedule_loop(self) -> None:
+        while True:
+            await self._pending_added.wait()
+            self._pending_added.clear()
+            while self._pending:
+                batch = [self._pending.pop() for _ in range(min(len(self._pending), self._concurrency))]
+                results = await asyncio.gather(*(self.reschedule(user_id) for user_id in batch),
+                                               return_exceptions=True)
+                for user_id, result in zip(batch, results):
+                    if isinstance(result, Exception):
+                        logger.error(f"Error rescheduling reminders of user {user_id}: {result}")
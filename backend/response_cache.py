@@ -0,0 +1,82 @@
+"""Versioned response cache with ETag support.
+
+Each collection has a version counter that the write handlers bump. A cached
+read is keyed by its URL and stamped with the versions of the collections it
+was built from; the ETag is derived from those versions, so a client holding
+a current ETag gets a 304 without touching Mongo, and other clients get the
+already-serialized body. Entries are also bounded in number (LRU) and age
+(TTL).
+"""
+import hashlib
+import time
+import uuid
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Tuple
+
+# Versions restart at 0 with the process, so ETags include a per-boot id
+_BOOT_ID = uuid.uuid4().hex[:8]
+
+
+class CollectionVersions:
+    """Monotonic per-collection write counters, with the time of the last bump."""
+
+    def __init__(self):
+        self._versions: Dict[str, int] = {}
+        self._bumped_at: Dict[str, float] = {}
+        # Writes made before the process started are unknown, so they count as made at startup
+        self._started = time.monotonic()
+
+    def bump(self, collection: str) -> int:
+        self._versions[collection] = self._versions.get(collection, 0) + 1
+        self._bumped_at[collection] = time.monotonic()
+        return self._versions[collection]
+
+    def changed_within(self, collections: Iterable[str], seconds: float) -> bool:
+        """Whether any of ``collections`` may have been written in the last ``seconds``."""
+        since = time.monotonic() - seconds
+        return self._started > since or any(self._bumped_at.get(name, 0.0) > since for name in collections)
+
+    def get(self, collection: str) -> int:
+        return self._versions.get(collection, 0)
+
+    def etag(self, key: str, collections: Iterable[str]) -> str:
+        stamp = ",".join(f"{name}:{self.get(name)}" for name in collections)
+        digest = hashlib.sha1(f"{_BOOT_ID}|{key}|{stamp}".encode()).hexdigest()[:20]
+        return f'"{digest}"'
+
+
+class ResponseCache:
+    """LRU + TTL cache of serialized response bodies, validated by ETag."""
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 300.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[str, bytes, float]]" = OrderedDict()
+
+    def get(self, key: str, etag: str) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] != etag or time.monotonic() - entry[2] > self.ttl_seconds:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key: str, etag: str, body: bytes) -> None:
+        self._entries[key] = (etag, body, time.monotonic())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+def if_none_match(header: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header value matches ``etag``."""
+    if not header:
+        return False
+    candidates = [value.strip() for value in header.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
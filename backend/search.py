@@ -0,0 +1,157 @@
+"""Full-text search over a user's notes and symptom tags.
+
+Notes are matched by MongoDB's ``$text`` operator on the ``content`` text
+index (see indexes.py) and ranked by its relevance score. The index is
+prefixed with ``userId``, so a query only scores the documents of one user
+and its cost follows the number of hits, not the size of the collection.
+Symptom entries are matched on their tags (``back_pain``) through the
+multikey ``symptoms`` index: a query term matches a tag if it starts one of
+the tag's words ("head" finds "headache", "pain" finds "back_pain"), and an
+entry scores the share of query terms its tags match. Tags are stored
+lowercase (``normalize_tags``, applied by the symptom models) and query
+terms are lowercased, so matching ignores case. Those patterns are not
+anchored at the start of the tag, so they cannot seek the index: MongoDB
+tests them against every tag key of the user in it. The scan is
+intentional, since it reads index keys of one user only and a user has few
+symptom entries; matching words inside tags with a seek would need the words
+stored as a separate array. For the same reason every matching entry, up to
+``MAX_RESULTS``, is scored before the list is cut to the page: the newest
+entries are not necessarily the best matches.
+
+The text score is unbounded while the tag score is a share, so note scores
+are divided by the best note score before the two lists are merged by score
+(most recent first on ties): the best note and an entry matching every term
+both score 1. The merged list is paginated by offset, up to ``MAX_RESULTS``
+hits. Each hit carries a short snippet of
+its text and the ``[start, end)`` offsets of the matched words in it, so
+the client highlights them without parsing markup.
+"""
+import asyncio
+import re
+from datetime import date
+from typing import List, Optional, Tuple
+
+from dates import parse_day, range_filter
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+# Relevance ranking past this many hits is not worth paging through
+MAX_RESULTS = 1000
+SNIPPET_CHARS = 160
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+_NEGATED = re.compile(r"(?:^|\s)-\w+", re.UNICODE)
+# Suffixes dropped before comparing words, roughly what the text index stemmer does
+_SUFFIXES = ("ing", "es", "ed", "ly", "s")
+
+
+def normalize_tags(tags: List[str]) -> List[str]:
+    """Symptom tags as stored: lowercase, without duplicates, in their original order."""
+    return list(dict.fromkeys(tag.lower() for tag in tags))
+
+
+def query_terms(q: str) -> List[str]:
+    """Lowercased words of ``q`` to look for; ``-word`` exclusions and quotes are dropped."""
+    terms = []
+    for word in _WORD.findall(_NEGATED.sub(" ", q).lower()):
+        if word not in terms:
+            terms.append(word)
+    return terms
+
+
+def _stem(word: str) -> str:
+    for suffix in _SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            return word[:-len(suffix)]
+    return word
+
+
+def _matches(word: str, stems: List[str]) -> bool:
+    word = word.lower()
+    return any(word.startswith(stem) for stem in stems)
+
+
+def snippet(text: str, terms: List[str], size: int = SNIPPET_CHARS) -> Tuple[str, List[List[int]]]:
+    """A window of ``text`` around its first matched word, and the matched words' offsets in it."""
+    stems = [_stem(term) for term in terms]
+    words = [m for m in _WORD.finditer(text) if _matches(m.group(), stems)]
+    start = 0
+    if words and len(text) > size:
+        # Start a little before the first hit, on a word boundary
+        start = max(0, words[0].start() - size // 4)
+        if start:
+            space = text.find(" ", start)
+            start = space + 1 if 0 <= space < words[0].start() else start
+        start = min(start, max(0, len(text) - size))
+    end = min(len(text), start + size)
+    prefix = "…" if start > 0 else ""
+    suffix = "…" if end < len(text) else ""
+    highlights = [
+        [m.start() - start + len(prefix), m.end() - start + len(prefix)]
+        for m in words if m.start() >= start and m.end() <= end
+    ]
+    return prefix + text[start:end] + suffix, highlights
+
+
+def _note_hit(doc: dict, terms: List[str]) -> dict:
+    text, highlights = snippet(doc.get("content", ""), terms)
+    return {
+        "type": "note", "id": doc["id"], "date": parse_day(doc.get("date")), "score": doc.get("score", 0.0),
+        "snippet": text, "highlights": highlights,
+    }
+
+
+def _tag_pattern(term: str) -> str:
+    return "(?:^|_)" + re.escape(term)
+
+
+def _symptom_hit(doc: dict, terms: List[str]) -> Optional[dict]:
+    # Entries written before tags were normalized may still have capitals
+    tags = normalize_tags(doc.get("symptoms", []))
+    matched = [term for term in terms if any(re.search(_tag_pattern(term), tag) for tag in tags)]
+    if not matched:
+        return None
+    # Tags are stored lowercase in snake_case; show them as words
+    text, highlights = snippet(", ".join(tag.replace("_", " ") for tag in tags), matched)
+    return {
+        "type": "symptom", "id": doc["id"], "date": parse_day(doc.get("date")),
+        "score": len(matched) / len(terms), "snippet": text, "highlights": highlights,
+        "symptoms": tags,
+    }
+
+
+async def search(db, user_id: str, q: str, date_from: Optional[date] = None, date_to: Optional[date] = None,
+                 limit: int = DEFAULT_LIMIT, offset: int = 0, legacy: bool = True) -> dict:
+    """One page of hits for ``q``; ``next`` is the offset of the following page, or None."""
+    terms = query_terms(q)
+    if not terms:
+        return {"items": [], "next": None}
+    # Both sources must supply every hit that can rank before the end of the page
+    wanted = min(offset + limit + 1, MAX_RESULTS)
+    dates = range_filter("date", date_from, date_to, legacy=legacy)
+
+    notes_cursor = db.notes.find(
+        {"userId": user_id, "$text": {"$search": q}, **dates},
+        {"_id": 0, "id": 1, "date": 1, "content": 1, "score": {"$meta": "textScore"}},
+    ).sort([("score", {"$meta": "textScore"})]).limit(wanted)
+    # Tags and terms are both lowercase, so the patterns are case-sensitive; they scan the user's index keys
+    tags = [re.compile(_tag_pattern(term)) for term in terms]
+    # The tag score is only known once an entry is read, so every candidate is scored before the cut
+    symptoms_cursor = db.symptoms.find(
+        {"userId": user_id, "symptoms": {"$in": tags}, **dates},
+        {"_id": 0, "id": 1, "date": 1, "symptoms": 1},
+    ).sort([("date", -1)]).limit(MAX_RESULTS)
+    notes, symptoms = await asyncio.gather(notes_cursor.to_list(wanted), symptoms_cursor.to_list(MAX_RESULTS))
+
+    hits = [_note_hit(doc, terms) for doc in notes]
+    # The best note comes first in every page's read, so the scale is the same across pages
+    best = max((hit["score"] for hit in hits), default=0.0)
+    for hit in hits:
+        hit["score"] = hit["score"] / best if best > 0 else 0.0
+    hits += [hit for hit in (_symptom_hit(doc, terms) for doc in symptoms) if hit is not None]
+    hits.sort(key=lambda hit: (hit["score"], hit["date"] or date.min), reverse=True)
+    hits = hits[:wanted]
+
+    page = hits[offset:offset + limit]
+    more = len(hits) > offset + limit and offset + limit < MAX_RESULTS
+    return {"items": page, "next": offset + limit if more else None}
@@ -1,14 +1,54 @@
-from fastapi import FastAPI, APIRouter, HTTPException
+from fastapi import FastAPI, APIRouter, Depends, HTTPException, Query, Request
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
+from starlette.responses import Response, StreamingResponse
+from fastapi.responses import ORJSONResponse
+import orjson
+from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError, DuplicateKeyError
 import os
 import logging
 from pathlib import Path
-from pydantic import BaseModel, Field
-from typing import List, Optional
+from pydantic import AfterValidator, BaseModel, Field, ValidationError, create_model
+from typing import Any, Dict, List, Optional, Set, Tuple
+from typing_extensions import Annotated
+from enum import Enum
 import uuid
-from datetime import datetime
+import base64
+import json
+import tempfile
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from datetime import date, datetime
+from functools import lru_cache, partial
+
+import asyncio
+
+from admission import AdmissionConfig, AdmissionMiddleware
+from auth import JWTAuth
+from batch import REMINDERS_JOB, load_checkpoint, run_reminders
+from compression import DEFAULT_MINIMUM_SIZE, CompressionMiddleware
+from database import create_client, read_preference, warm_up
+from dates import Day, day_filter, range_filter
+from indexes import ensure_indexes
+from invalidation import InvalidationBus, create_bus
+from migrations import LATEST_VERSION, is_applied, run_all, schema_version
+from metrics import REGISTRY, SERIALIZATION_DURATION, InstrumentedDatabase, MetricsMiddleware, timed
+from predictions import CyclePredictor
+from record_cache import MemoryStore, RecordCache, RedisStore
+from reminders import DEFAULT_NOTIFICATIONS, ReminderScheduler, create_sink
+from derived import load_fresh, mark_stale
+from exporter import export_stream
+from response_cache import CollectionVersions, ResponseCache, if_none_match
+from sync import SyncTokenExpired, backfill_updated_at, collect_changes, decode_token, encode_token, tombstones_for
+from analytics import (
+    DEFAULT_HEATMAP_DAYS, DEFAULT_ROLLING_WINDOW, cycle_statistics, load_start_dates,
+    load_symptom_entries, symptom_heatmap,
+)
+from insights import DEFAULT_TOP_SYMPTOMS, compute_insights
+from search import DEFAULT_LIMIT as DEFAULT_SEARCH_LIMIT, MAX_LIMIT as MAX_SEARCH_LIMIT, normalize_tags, search
+from importer import DEFAULT_BATCH_SIZE, MAX_BATCH_SIZE, ImportJob, run_import
+from month_grid import MonthGridCache, build_month_grid, month_bounds, months_spanned, prediction_months
 
 # Configure logging first
 logging.basicConfig(
@@ -20,17 +60,123 @@ logger = logging.getLogger(__name__)
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# MongoDB connection
+# MongoDB connection, opened by the lifespan handler; pool settings are read
+# from the environment (see database.py). Tests and benchmarks may install
+# their own client and db before startup.
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+client = None
+db = None
+# Handle used by the list endpoints, with LIST_READ_PREFERENCE applied. Reads
+# from secondaries can lag behind writes by up to LIST_MAX_STALENESS seconds,
+# so a user's lists are read from the primary for that long after they change
+# (see list_reads): a lagging page would otherwise be cached and ETagged under
+# the new version.
+list_db = None
+LIST_MAX_STALENESS = max(90, int(os.environ.get("LIST_MAX_STALENESS_SECONDS") or 90))
+LIST_READ_PREFERENCE = read_preference(os.environ.get("LIST_READ_PREFERENCE"), LIST_MAX_STALENESS)
+
+# Fan-out of cache invalidations between worker processes (see invalidation.py).
+# INVALIDATION_BUS=mongo is required when running more than one worker.
+INVALIDATION_BUS = os.environ.get("INVALIDATION_BUS")
+invalidation_bus: InvalidationBus = InvalidationBus()
+
+# Reminders of the notification preferences (see reminders.py), sent through
+# REMINDER_SINK; REMINDER_SINK=none disables them. Created at startup.
+reminder_scheduler: Optional[ReminderScheduler] = None
+
+# Until the native_dates migration has completed, day filters also match the
+# YYYY-MM-DD strings of older documents (see dates.py); checked at startup.
+legacy_date_strings = True
+
+# Authentication: bearer tokens are verified with JWT_SECRET; requests without
+# one get a 401. DEFAULT_USER_ID is for development only: when set, it is the
+# user of requests without a token and the owner of documents stored before
+# records had a userId.
+DEFAULT_USER_ID = os.environ.get("DEFAULT_USER_ID") or None
+authenticate = JWTAuth(
+    secret=os.environ.get("JWT_SECRET"),
+    algorithms=os.environ.get("JWT_ALGORITHMS", "HS256").split(","),
+    anonymous_user=DEFAULT_USER_ID,
+    audience=os.environ.get("JWT_AUDIENCE") or None,
+)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global client, db, list_db, invalidation_bus, legacy_date_strings, reminder_scheduler
+    owns_client = client is None
+    if owns_client:
+        client = create_client(mongo_url, os.environ)
+        # Every operation is timed per collection, see metrics.py
+        db = InstrumentedDatabase(client[os.environ['DB_NAME']])
+    if list_db is None:
+        list_db = db
+        if LIST_READ_PREFERENCE is not None:
+            list_db = InstrumentedDatabase(
+                client.get_database(os.environ['DB_NAME'], read_preference=LIST_READ_PREFERENCE)
+            )
+    await warm_up(client, int(os.environ.get("MONGO_MIN_POOL_SIZE") or 1))
+
+    await bootstrap_indexes()
+    await backfill_sync_fields()
+    await assign_unowned_records()
+    migrations_pending = True
+    try:
+        legacy_date_strings = not await is_applied(db, "native_dates")
+        migrations_pending = await schema_version(db) < LATEST_VERSION
+    except Exception as e:
+        logger.error(f"Error reading the schema version: {e}")
+    # SCHEMA_MIGRATIONS=background migrates while serving; otherwise run `python migrations.py up`
+    migration_task = None
+    if os.environ.get("SCHEMA_MIGRATIONS", "off").lower() == "background" and migrations_pending:
+        migration_task = asyncio.create_task(run_migrations())
+
+    if INVALIDATION_BUS:
+        invalidation_bus = create_bus(INVALIDATION_BUS, db)
+    elif int(os.environ.get("WEB_CONCURRENCY") or 1) > 1:
+        logger.warning("Several workers without INVALIDATION_BUS: their caches can serve stale data")
+    await invalidation_bus.start(apply_remote_change)
+
+    reminder_sink = create_sink(os.environ.get("REMINDER_SINK"))
+    backfill_task = None
+    if reminder_sink is not None:
+        reminder_scheduler = ReminderScheduler(db, reminder_sink, reminder_inputs)
+        await reminder_scheduler.start()
+        # REMINDER_BACKFILL=off leaves the first backfill to `python batch.py reminders`
+        if os.environ.get("REMINDER_BACKFILL", "startup").lower() == "startup":
+            backfill_task = asyncio.create_task(backfill_reminders())
+    try:
+        yield
+    finally:
+        if migration_task is not None:
+            migration_task.cancel()
+        if backfill_task is not None:
+            backfill_task.cancel()
+            await asyncio.gather(backfill_task, return_exceptions=True)
+        if reminder_scheduler is not None:
+            await reminder_scheduler.stop()
+            reminder_scheduler = None
+        await invalidation_bus.stop()
+        await asyncio.gather(*_stale_marks, return_exceptions=True)
+        if owns_client:
+            client.close()
+            client = db = list_db = None
 
 # Create the main app without a prefix
-app = FastAPI()
+app = FastAPI(default_response_class=ORJSONResponse, lifespan=lifespan)
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
 
+# Pagination defaults for list endpoints
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+# Largest number of records accepted by a single bulk request
+MAX_BULK_SIZE = 5000
+
+# Records per collection returned by one sync call
+DEFAULT_SYNC_LIMIT = 500
+
 
 # Define Models
 class StatusCheck(BaseModel):
@@ -44,59 +190,207 @@ class StatusCheckCreate(BaseModel):
 # Cycle Tracking Models
 class Cycle(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
-    startDate: str
-    endDate: Optional[str] = None
+    userId: str
+    startDate: Day
+    endDate: Optional[Day] = None
     flow: str = "medium"  # light, medium, heavy
     length: int = 28
     createdAt: datetime = Field(default_factory=datetime.utcnow)
+    updatedAt: datetime = Field(default_factory=datetime.utcnow)
 
 class CycleCreate(BaseModel):
-    startDate: str
-    endDate: Optional[str] = None
+    startDate: Day
+    endDate: Optional[Day] = None
     flow: str = "medium"
     length: Optional[int] = 28
 
 class CycleUpdate(BaseModel):
-    startDate: Optional[str] = None
-    endDate: Optional[str] = None
+    startDate: Optional[Day] = None
+    endDate: Optional[Day] = None
     flow: Optional[str] = None
     length: Optional[int] = None
 
 # Symptom Tracking Models
+# Tags are stored lowercase so that tag search can ignore case (see search.py)
+SymptomTags = Annotated[List[str], AfterValidator(normalize_tags)]
+
 class Symptom(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
-    date: str
-    symptoms: List[str] = []
+    userId: str
+    date: Day
+    symptoms: SymptomTags = []
     intensity: str = "mild"  # mild, moderate, severe
     createdAt: datetime = Field(default_factory=datetime.utcnow)
+    updatedAt: datetime = Field(default_factory=datetime.utcnow)
 
 class SymptomCreate(BaseModel):
-    date: str
-    symptoms: List[str] = []
+    date: Day
+    symptoms: SymptomTags = []
     intensity: str = "mild"
 
+class SymptomUpdate(BaseModel):
+    date: Optional[Day] = None
+    symptoms: Optional[SymptomTags] = None
+    intensity: Optional[str] = None
+
 # Notes Models
 class Note(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
-    date: str
+    userId: str
+    date: Day
     content: str
     createdAt: datetime = Field(default_factory=datetime.utcnow)
+    updatedAt: datetime = Field(default_factory=datetime.utcnow)
 
 class NoteCreate(BaseModel):
-    date: str
+    date: Day
     content: str
 
+class NoteUpdate(BaseModel):
+    date: Optional[Day] = None
+    content: Optional[str] = None
+
+# Paginated list responses
+class CyclePage(BaseModel):
+    items: List[Cycle]
+    next: Optional[str] = None
+
+class SymptomPage(BaseModel):
+    items: List[Symptom]
+    next: Optional[str] = None
+
+class NotePage(BaseModel):
+    items: List[Note]
+    next: Optional[str] = None
+
+# Bulk Models
+class CollectionName(str, Enum):
+    cycles = "cycles"
+    symptoms = "symptoms"
+    notes = "notes"
+
+class BulkDelete(BaseModel):
+    ids: List[str]
+
+class BulkItemResult(BaseModel):
+    index: int
+    id: Optional[str] = None
+    status: str  # created, deleted, invalid, not_found, failed
+    error: Optional[str] = None
+
+class BulkResult(BaseModel):
+    succeeded: int
+    failed: int
+    results: List[BulkItemResult]
+
+# Sync Models
+class CycleChanges(BaseModel):
+    upserted: List[Cycle] = []
+    deleted: List[str] = []
+
+class SymptomChanges(BaseModel):
+    upserted: List[Symptom] = []
+    deleted: List[str] = []
+
+class NoteChanges(BaseModel):
+    upserted: List[Note] = []
+    deleted: List[str] = []
+
+# Calendar Models
+class CalendarCycle(BaseModel):
+    id: str
+    flow: Optional[str] = None
+    isStart: bool
+
+class CalendarSymptoms(BaseModel):
+    ids: List[str]
+    symptoms: List[str]
+    intensity: Optional[str] = None
+
+class CalendarNotes(BaseModel):
+    ids: List[str]
+    preview: str
+
+class CalendarDay(BaseModel):
+    date: str
+    cycle: Optional[CalendarCycle] = None
+    symptoms: Optional[CalendarSymptoms] = None
+    notes: Optional[CalendarNotes] = None
+    prediction: Optional[str] = None  # period, ovulation, fertile
+
+class CalendarMonth(BaseModel):
+    month: str
+    days: List[CalendarDay]
+
+# Prediction Models
+class DateRange(BaseModel):
+    start: str
+    end: str
+
+class Predictions(BaseModel):
+    nextPeriod: str
+    nextPeriodRange: DateRange
+    ovulation: str
+    fertileWindow: DateRange
+    avgCycleLength: int
+    stdDev: float
+    sampleSize: int
+    confidence: str  # low, medium, high
+
+# Insight Models
+class SymptomCount(BaseModel):
+    symptom: str
+    count: int
+
+class Insights(BaseModel):
+    totalCycles: int
+    avgCycleLength: Optional[float] = None
+    minLength: Optional[int] = None
+    maxLength: Optional[int] = None
+    lengthVariation: Optional[int] = None
+    regularity: Optional[str] = None  # regular, somewhat_irregular, irregular
+    mostCommonFlow: Optional[str] = None
+    flowCounts: Dict[str, int]
+    topSymptoms: List[SymptomCount]
+    symptomEntries: int
+    noteCount: int
+    latestNote: Optional[Note] = None
+
+# Analytics Models
+class CycleLengthEntry(BaseModel):
+    startDate: str
+    length: Optional[float] = None  # None for the latest cycle and logging artifacts
+    rollingAvg: Optional[float] = None
+    irregular: bool
+
+class CycleAnalytics(BaseModel):
+    cycleCount: int
+    sampleSize: int
+    meanLength: Optional[float] = None
+    variance: Optional[float] = None
+    stdDev: Optional[float] = None
+    coefficientOfVariation: Optional[float] = None
+    minLength: Optional[int] = None
+    maxLength: Optional[int] = None
+    irregularCount: int
+    rollingWindow: int
+    cycles: List[CycleLengthEntry]
+
+class SymptomHeatmap(BaseModel):
+    days: List[int]
+    symptoms: List[str]
+    counts: List[List[int]]  # counts[i][j]: symptoms[i] on cycle day days[j]
+    totals: List[int]
+    phases: Dict[str, List[int]]  # per phase, counts aligned with symptoms
+    unassigned: int
+
 # User Preferences Models
 class UserPreferences(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    userId: str
     theme: str = "neutral"
     language: str = "en"
-    notifications: dict = {
-        "periodReminders": True,
-        "ovulationReminders": True,
-        "fertileWindow": False,
-        "dailyCheck": False
-    }
+    notifications: dict = DEFAULT_NOTIFICATIONS
     createdAt: datetime = Field(default_factory=datetime.utcnow)
     updatedAt: datetime = Field(default_factory=datetime.utcnow)
 
@@ -105,6 +399,363 @@ class UserPreferencesUpdate(BaseModel):
     language: Optional[str] = None
     notifications: Optional[dict] = None
 
+# === PAGINATION HELPERS ===
+def encode_cursor(doc: dict) -> str:
+    """Build an opaque keyset cursor from the last document of a page."""
+    payload = {"c": doc["createdAt"].isoformat(), "i": doc["id"]}
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> dict:
+    """Turn a cursor back into a (createdAt, id) keyset filter."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded))
+        created_at = datetime.fromisoformat(payload["c"])
+        last_id = payload["i"]
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return {
+        "$or": [
+            {"createdAt": {"$lt": created_at}},
+            {"createdAt": created_at, "id": {"$lt": last_id}},
+        ]
+    }
+
+async def fetch_page(collection, user_id: str, date_field: str, limit: int, cursor: Optional[str],
+                     date_from: Optional[date], date_to: Optional[date], fields: Optional[Tuple[str, ...]] = None):
+    """Fetch one page of ``user_id``'s documents ordered by (createdAt, id) descending.
+
+    Returns the documents of the page and the cursor for the next one
+    (None when the end of the collection has been reached). With ``fields``
+    only those fields are read, plus the keyset fields of the cursor.
+    """
+    conditions = [range_filter(date_field, date_from, date_to, legacy=legacy_date_strings)]
+    if cursor:
+        conditions.append(decode_cursor(cursor))
+    query = {"userId": user_id, "$and": [c for c in conditions if c]}
+    if not query["$and"]:
+        del query["$and"]
+
+    # Fetch one extra document to know whether another page exists
+    projection = {"_id": 0}
+    if fields is not None:
+        projection = {"_id": 0, "id": 1, "createdAt": 1, **{name: 1 for name in fields}}
+    docs = await collection.find(query, projection).sort(
+        [("createdAt", -1), ("id", -1)]
+    ).limit(limit + 1).to_list(limit + 1)
+
+    next_cursor = None
+    if len(docs) > limit:
+        docs = docs[:limit]
+        next_cursor = encode_cursor(docs[-1])
+    return docs, next_cursor
+
+# === SPARSE FIELDSETS ===
+def parse_fields(model, fields: Optional[str]) -> Optional[Tuple[str, ...]]:
+    """Field names selected by a ``fields=a,b`` parameter, id included; None selects all."""
+    if not fields:
+        return None
+    names = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = sorted(name for name in names if name not in model.model_fields)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    # In declaration order, so the items keep the usual field order
+    return tuple(name for name in model.model_fields if name in names or name == "id")
+
+@lru_cache(maxsize=256)
+def sparse_page_model(model, fields: Tuple[str, ...]):
+    """Page model whose items only have ``fields`` of ``model``, validated and serialized as in ``model``."""
+    item = create_model(
+        f"{model.__name__}Fields", **{name: (model.model_fields[name].annotation, model.model_fields[name])
+                                      for name in fields}
+    )
+    return create_model(f"{model.__name__}FieldsPage", items=(List[item], ...), next=(Optional[str], None))
+
+# === PREDICTION CACHE ===
+# One predictor per user, loaded lazily from the user's cycle history and then
+# kept current by the cycle write handlers. The least recently used are evicted.
+MAX_CACHED_PREDICTORS = int(os.environ.get("PREDICTOR_CACHE_SIZE", "1000"))
+_predictors: "OrderedDict[str, CyclePredictor]" = OrderedDict()
+_predictor_loads: Dict[str, asyncio.Task] = {}
+# Cycle writes of users whose predictor is loading; a load overtaken by one is redone
+_predictor_writes: Dict[str, int] = {}
+
+async def _load_predictor(user_id: str) -> CyclePredictor:
+    while True:
+        writes = _predictor_writes.get(user_id, 0)
+        cycles = await db.cycles.find(
+            {"userId": user_id}, {"_id": 0, "id": 1, "startDate": 1}
+        ).to_list(None)
+        # A write landing during the read may be missing from it, and
+        # refresh_prediction had no predictor to apply it to yet
+        if _predictor_writes.get(user_id, 0) == writes:
+            break
+    predictor = CyclePredictor((c["id"], c["startDate"]) for c in cycles)
+    _predictors[user_id] = predictor
+    while len(_predictors) > MAX_CACHED_PREDICTORS:
+        _predictors.popitem(last=False)
+    return predictor
+
+async def get_predictor(user_id: str) -> CyclePredictor:
+    predictor = _predictors.get(user_id)
+    if predictor is not None:
+        _predictors.move_to_end(user_id)
+        return predictor
+    # Concurrent requests of the same user share one load
+    load = _predictor_loads.get(user_id)
+    if load is None:
+        load = asyncio.ensure_future(_load_predictor(user_id))
+        _predictor_loads[user_id] = load
+        load.add_done_callback(lambda _: _load_finished(user_id))
+    return await load
+
+def _load_finished(user_id: str):
+    _predictor_loads.pop(user_id, None)
+    _predictor_writes.pop(user_id, None)
+
+def _cycles_written(user_id: str):
+    """Count a cycle write of ``user_id`` against the predictor load in flight, if any."""
+    if user_id in _predictor_loads:
+        _predictor_writes[user_id] = _predictor_writes.get(user_id, 0) + 1
+
+def forget_calendar_grids(user_id: str):
+    """Drop every cached grid of ``user_id`` after a cycle change its predictor did not see.
+
+    Without a loaded predictor (never loaded, or evicted since its grids were
+    built) the months carrying prediction flags are unknown, so all of them go.
+    """
+    calendar_cache.invalidate_prefix(calendar_key(user_id, ""))
+
+def refresh_prediction(user_id: str, cycles: List[dict], deleted: bool = False):
+    """Apply changed (or removed) ``cycles`` to the user's cached predictor, if it is loaded."""
+    _cycles_written(user_id)
+    predictor = _predictors.get(user_id)
+    if predictor is None:
+        forget_calendar_grids(user_id)
+        return
+    before = prediction_months(predictor.predict())
+    for cycle in cycles:
+        if deleted:
+            predictor.remove(cycle["id"])
+        elif cycle.get("startDate") is not None:
+            predictor.upsert(cycle["id"], cycle["startDate"])
+    after = prediction_months(predictor.predict())
+    if before != after:
+        calendar_cache.invalidate(calendar_key(user_id, month) for month in before + after)
+
+# === REMINDERS ===
+def reschedule_reminders(user_id: str):
+    """Have the next reminder of ``user_id`` recomputed after a cycle or preferences change."""
+    if reminder_scheduler is not None:
+        reminder_scheduler.request(user_id)
+
+async def reminder_inputs(user_id: str):
+    """Predictions and notification flags of ``user_id``, from the predictor and record caches."""
+    async def load_preferences():
+        return await db.preferences.find_one({"userId": user_id}, {"_id": 0})
+
+    predictor, preferences = await asyncio.gather(
+        get_predictor(user_id),
+        record_cache.get_or_load(record_key("preferences", user_id), load_preferences),
+    )
+    return predictor.predict(), (preferences or {}).get("notifications")
+
+# === CALENDAR CACHE ===
+# Grids are cached per user under "<userId>:<YYYY-MM>"
+calendar_cache = MonthGridCache(max_months=int(os.environ.get("CALENDAR_CACHE_SIZE", "1024")))
+
+def calendar_key(user_id: str, month: str) -> str:
+    return f"{user_id}:{month}"
+
+def format_validation_error(error: ValidationError) -> str:
+    """Render a pydantic error as a compact `field: message` list."""
+    return "; ".join(
+        f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}" for err in error.errors()
+    )
+
+# === RESPONSE CACHE ===
+# Write handlers bump the version of the (user, collection) they touch; cached
+# reads are served (or answered with 304) while the versions they depend on hold.
+collection_versions = CollectionVersions()
+response_cache = ResponseCache(
+    max_entries=int(os.environ.get("RESPONSE_CACHE_SIZE", "1024")),
+    ttl_seconds=float(os.environ.get("RESPONSE_CACHE_TTL", "300")),
+)
+
+def versioned(user_id: str, collection: str) -> str:
+    """Name under which the versions of one user's collection are counted."""
+    return f"{user_id}:{collection}"
+
+# === RECORD CACHE ===
+# Preferences and records fetched by id. RECORD_CACHE_URL (redis://...) shares
+# the cache between workers, otherwise every process keeps its own LRU.
+def _record_cache_store():
+    ttl = float(os.environ.get("RECORD_CACHE_TTL", "60"))
+    url = os.environ.get("RECORD_CACHE_URL")
+    if url:
+        return RedisStore(url, ttl_seconds=ttl)
+    return MemoryStore(max_entries=int(os.environ.get("RECORD_CACHE_SIZE", "4096")), ttl_seconds=ttl)
+
+record_cache = RecordCache(_record_cache_store())
+
+def record_key(collection: str, user_id: str, record_id: Optional[str] = None) -> str:
+    """Record cache key; preferences have one record per user and no id."""
+    return f"{collection}:{user_id}" if record_id is None else f"{collection}:{user_id}:{record_id}"
+
+def validate(model, data):
+    """``model.model_validate(data)``, timed as the validation stage."""
+    with timed(SERIALIZATION_DURATION, "validate", model.__name__):
+        return model.model_validate(data)
+
+def dump_json(payload) -> bytes:
+    """Serialize a validated model or plain data with orjson, without re-validating."""
+    with timed(SERIALIZATION_DURATION, "serialize", type(payload).__name__):
+        if isinstance(payload, BaseModel):
+            payload = payload.model_dump(mode="json")
+        return orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS)
+
+def json_response(payload, status_code: int = 200) -> Response:
+    return Response(content=dump_json(payload), status_code=status_code, media_type="application/json")
+
+def list_reads(user_id: str, collections: tuple):
+    """The database to read ``user_id``'s ``collections`` from for a cached response.
+
+    ``list_db`` unless one of them changed within LIST_MAX_STALENESS seconds,
+    when a secondary may not have the write yet.
+    """
+    if list_db is db or collection_versions.changed_within(
+            [versioned(user_id, name) for name in collections], LIST_MAX_STALENESS):
+        return db
+    return list_db
+
+async def cached_response(request: Request, user_id: str, collections: tuple, build) -> Response:
+    """Serve ``await build()`` as JSON with an ETag over the user's ``collections`` versions."""
+    key = f"{user_id}|{request.url.path}?{request.query_params}"
+    etag = collection_versions.etag(key, [versioned(user_id, name) for name in collections])
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if if_none_match(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    body = response_cache.get(key, etag)
+    if body is None:
+        body = dump_json(await build())
+        response_cache.put(key, etag, body)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+async def write_tombstones(user_id: str, collection: str, ids: List[str]):
+    """Record deletes so that delta sync clients can drop the records."""
+    if ids:
+        await db.tombstones.insert_many(tombstones_for(user_id, collection, ids))
+
+# === WRITE PROPAGATION ===
+# Model classes and the date field used for range filters, per collection
+COLLECTIONS = {
+    "cycles": {"create": CycleCreate, "model": Cycle, "date_field": "startDate"},
+    "symptoms": {"create": SymptomCreate, "model": Symptom, "date_field": "date"},
+    "notes": {"create": NoteCreate, "model": Note, "date_field": "date"},
+}
+
+def record_changed(user_id: str, collection: str, doc: dict, previous: Optional[dict] = None,
+                   deleted: bool = False):
+    """Propagate a create/update/delete of one of ``user_id``'s records to the derived caches.
+
+    ``doc`` is the new version (or the removed one when ``deleted``) and
+    ``previous`` the version replaced by an update.
+    """
+    records_changed(user_id, collection, [doc], [previous] if previous else [], deleted=deleted)
+
+def records_changed(user_id: str, collection: str, docs: List[dict], previous: Optional[List[dict]] = None,
+                    deleted: bool = False):
+    """``record_changed`` for many records written by one request.
+
+    The collection version is bumped once, the predictor refreshed once and
+    a single bus event carries every id, however many records changed.
+    """
+    if not docs:
+        return
+    collection_versions.bump(versioned(user_id, collection))
+    if collection == "cycles":
+        refresh_prediction(user_id, docs, deleted=deleted)
+        reschedule_reminders(user_id)
+    date_field = COLLECTIONS[collection]["date_field"]
+    months = sorted({
+        month
+        for record in [*(previous or []), *docs]
+        for month in months_spanned(record.get(date_field), record.get("endDate"))
+    })
+    calendar_cache.invalidate(calendar_key(user_id, month) for month in months)
+    invalidation_bus.publish({
+        "userId": user_id, "collection": collection, "ids": [doc["id"] for doc in docs], "months": months,
+    })
+
+def apply_remote_change(event: dict):
+    """Drop what this worker cached about a change another worker made (see record_changed)."""
+    user_id, collection = event["userId"], event["collection"]
+    collection_versions.bump(versioned(user_id, collection))
+    calendar_cache.invalidate(calendar_key(user_id, month) for month in event.get("months", []))
+    if collection == "cycles":
+        # Reloaded on the next request; its predicted months are flagged in cached grids
+        _cycles_written(user_id)
+        predictor = _predictors.pop(user_id, None)
+        if predictor is not None:
+            calendar_cache.invalidate(
+                calendar_key(user_id, month) for month in prediction_months(predictor.predict())
+            )
+        else:
+            forget_calendar_grids(user_id)
+    if collection == "preferences":
+        record_cache.forget(record_key("preferences", user_id))
+    else:
+        record_cache.forget(*(record_key(collection, user_id, record_id) for record_id in event.get("ids", [])))
+
+def preferences_changed(user_id: str):
+    collection_versions.bump(versioned(user_id, "preferences"))
+    reschedule_reminders(user_id)
+    invalidation_bus.publish({"userId": user_id, "collection": "preferences", "ids": [], "months": []})
+
+# Derived-document counter bumps of updates in flight (see mark_stale_later)
+_stale_marks: Set[asyncio.Task] = set()
+
+def mark_stale_later(user_id: str):
+    """``mark_stale`` without waiting for it.
+
+    Until the bump lands, one round trip after the write, the derived
+    document computed before the write can still be served as fresh.
+    """
+    task = asyncio.create_task(mark_stale(db, user_id))
+    _stale_marks.add(task)
+    task.add_done_callback(_stale_mark_done)
+
+def _stale_mark_done(task: asyncio.Task):
+    _stale_marks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(f"Error marking derived data stale: {task.exception()}")
+
+async def update_record(user_id: str, collection: str, record_id: str, update_data: dict) -> Optional[dict]:
+    """Apply ``update_data`` to one of ``user_id``'s records in a single round trip.
+
+    Returns the updated document, or None when the record does not exist.
+    The previous version comes back from the same atomic operation, so the
+    months it covered are invalidated along with the new ones. The derived
+    document is marked stale in the background (``mark_stale_later``).
+    """
+    update_data["updatedAt"] = datetime.utcnow()
+    previous = await db[collection].find_one_and_update(
+        {"id": record_id, "userId": user_id},
+        {"$set": update_data},
+        projection={"_id": 0},
+        return_document=ReturnDocument.BEFORE,
+    )
+    if previous is None:
+        return None
+    updated = {**previous, **update_data}
+    # Not written through: of two concurrent updates, the last to get here may carry the older version
+    await record_cache.invalidate(record_key(collection, user_id, record_id))
+    mark_stale_later(user_id)
+    record_changed(user_id, collection, updated, previous=previous)
+    return updated
+
 # Add your routes to the router instead of directly to app
 @api_router.get("/")
 async def root():
@@ -112,9 +763,9 @@ async def root():
 
 @api_router.post("/status", response_model=StatusCheck)
 async def create_status_check(input: StatusCheckCreate):
-    status_dict = input.dict()
+    status_dict = input.model_dump()
     status_obj = StatusCheck(**status_dict)
-    _ = await db.status_checks.insert_one(status_obj.dict())
+    _ = await db.status_checks.insert_one(status_obj.model_dump())
     return status_obj
 
 @api_router.get("/status", response_model=List[StatusCheck])
@@ -122,35 +773,137 @@ async def get_status_checks():
     status_checks = await db.status_checks.find().to_list(1000)
     return [StatusCheck(**status_check) for status_check in status_checks]
 
+# === BULK ENDPOINTS ===
+# Registered before the per-id routes so that /{collection}/bulk is not taken for an id
+@api_router.post("/{collection}/bulk", response_model=BulkResult)
+async def bulk_create(collection: CollectionName, items: List[Dict[str, Any]], user_id: str = Depends(authenticate)):
+    if len(items) > MAX_BULK_SIZE:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BULK_SIZE} items per request")
+    spec = COLLECTIONS[collection.value]
+    results: List[BulkItemResult] = []
+    docs, doc_indexes = [], []
+    for index, item in enumerate(items):
+        try:
+            doc = spec["model"](**spec["create"](**item).model_dump(), userId=user_id).model_dump()
+        except ValidationError as e:
+            results.append(BulkItemResult(index=index, status="invalid", error=format_validation_error(e)))
+            continue
+        docs.append(doc)
+        doc_indexes.append(index)
+        results.append(BulkItemResult(index=index, id=doc["id"], status="created"))
+
+    failed_positions = set()
+    if docs:
+        try:
+            await db[collection.value].insert_many(docs, ordered=False)
+        except BulkWriteError as e:
+            # With ordered=False every other document is still inserted
+            for write_error in e.details.get("writeErrors", []):
+                position = write_error["index"]
+                failed_positions.add(position)
+                result = results[doc_indexes[position]]
+                result.status = "failed"
+                result.error = write_error.get("errmsg")
+        except Exception as e:
+            logger.error(f"Error bulk inserting {collection.value}: {e}")
+            raise HTTPException(status_code=500, detail=f"Failed to create {collection.value}")
+
+    if len(failed_positions) < len(docs):
+        await mark_stale(db, user_id)
+    records_changed(user_id, collection.value,
+                    [doc for position, doc in enumerate(docs) if position not in failed_positions])
+
+    succeeded = sum(1 for r in results if r.status == "created")
+    logger.info(f"Bulk created {succeeded} of {len(items)} {collection.value}")
+    return BulkResult(succeeded=succeeded, failed=len(items) - succeeded, results=results)
+
+@api_router.delete("/{collection}/bulk", response_model=BulkResult)
+async def bulk_delete(collection: CollectionName, payload: BulkDelete, user_id: str = Depends(authenticate)):
+    if len(payload.ids) > MAX_BULK_SIZE:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BULK_SIZE} items per request")
+    spec = COLLECTIONS[collection.value]
+    try:
+        # Read the dates first so the derived caches can be invalidated afterwards
+        projection = {"_id": 0, "id": 1, spec["date_field"]: 1, "endDate": 1}
+        existing = await db[collection.value].find(
+            {"userId": user_id, "id": {"$in": payload.ids}}, projection
+        ).to_list(None)
+        if existing:
+            deleted_ids = [doc["id"] for doc in existing]
+            await db[collection.value].delete_many({"userId": user_id, "id": {"$in": deleted_ids}})
+            await write_tombstones(user_id, collection.value, deleted_ids)
+            await record_cache.invalidate(*(record_key(collection.value, user_id, i) for i in deleted_ids))
+            await mark_stale(db, user_id)
+    except Exception as e:
+        logger.error(f"Error bulk deleting {collection.value}: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to delete {collection.value}")
+
+    records_changed(user_id, collection.value, existing, deleted=True)
+
+    found = {doc["id"] for doc in existing}
+    results = [
+        BulkItemResult(index=index, id=item_id, status="deleted" if item_id in found else "not_found")
+        for index, item_id in enumerate(payload.ids)
+    ]
+    succeeded = sum(1 for r in results if r.status == "deleted")
+    return BulkResult(succeeded=succeeded, failed=len(results) - succeeded, results=results)
+
 # === CYCLE ENDPOINTS ===
 @api_router.post("/cycles", response_model=Cycle)
-async def create_cycle(cycle_data: CycleCreate):
+async def create_cycle(cycle_data: CycleCreate, user_id: str = Depends(authenticate)):
     try:
-        cycle_dict = cycle_data.dict()
-        cycle_obj = Cycle(**cycle_dict)
-        result = await db.cycles.insert_one(cycle_obj.dict())
+        cycle_dict = cycle_data.model_dump()
+        cycle_obj = Cycle(**cycle_dict, userId=user_id)
+        cycle_doc = cycle_obj.model_dump()
+        result = await db.cycles.insert_one(cycle_doc)
+        cycle_doc.pop("_id", None)
+        await mark_stale(db, user_id)
+        record_changed(user_id, "cycles", cycle_doc)
         logger.info(f"Created cycle with ID: {cycle_obj.id}")
-        return cycle_obj
+        return json_response(cycle_obj)
     except Exception as e:
         logger.error(f"Error creating cycle: {e}")
         raise HTTPException(status_code=500, detail="Failed to create cycle")
 
-@api_router.get("/cycles", response_model=List[Cycle])
-async def get_cycles():
+@api_router.get("/cycles", response_model=CyclePage)
+async def get_cycles(
+    request: Request,
+    user_id: str = Depends(authenticate),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    date_from: Optional[date] = Query(None, alias="from"),
+    date_to: Optional[date] = Query(None, alias="to"),
+    fields: Optional[str] = Query(None, description="comma-separated fields to return, e.g. startDate,endDate"),
+):
+    selected = parse_fields(Cycle, fields)
+    page_model = CyclePage if selected is None else sparse_page_model(Cycle, selected)
+
+    async def build():
+        cycles, next_cursor = await fetch_page(
+            list_reads(user_id, ("cycles",)).cycles, user_id,
+            COLLECTIONS["cycles"]["date_field"], limit, cursor, date_from, date_to, selected
+        )
+        # One validation pass over the page; no per-document model construction
+        return validate(page_model, {"items": cycles, "next": next_cursor})
+
     try:
-        cycles = await db.cycles.find().sort("createdAt", -1).to_list(1000)
-        return [Cycle(**cycle) for cycle in cycles]
+        return await cached_response(request, user_id, ("cycles",), build)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching cycles: {e}")
         raise HTTPException(status_code=500, detail="Failed to fetch cycles")
 
 @api_router.get("/cycles/{cycle_id}", response_model=Cycle)
-async def get_cycle(cycle_id: str):
+async def get_cycle(cycle_id: str, user_id: str = Depends(authenticate)):
     try:
-        cycle = await db.cycles.find_one({"id": cycle_id})
+        cycle = await record_cache.get_or_load(
+            record_key("cycles", user_id, cycle_id),
+            lambda: db.cycles.find_one({"id": cycle_id, "userId": user_id}, {"_id": 0}),
+        )
         if not cycle:
             raise HTTPException(status_code=404, detail="Cycle not found")
-        return Cycle(**cycle)
+        return json_response(validate(Cycle, cycle))
     except HTTPException:
         raise
     except Exception as e:
@@ -158,22 +911,16 @@ async def get_cycle(cycle_id: str):
         raise HTTPException(status_code=500, detail="Failed to fetch cycle")
 
 @api_router.put("/cycles/{cycle_id}", response_model=Cycle)
-async def update_cycle(cycle_id: str, cycle_data: CycleUpdate):
+async def update_cycle(cycle_id: str, cycle_data: CycleUpdate, user_id: str = Depends(authenticate)):
     try:
-        update_data = {k: v for k, v in cycle_data.dict().items() if v is not None}
+        update_data = cycle_data.model_dump(exclude_none=True)
         if not update_data:
             raise HTTPException(status_code=400, detail="No data provided for update")
-        
-        result = await db.cycles.update_one(
-            {"id": cycle_id},
-            {"$set": update_data}
-        )
-        
-        if result.matched_count == 0:
+
+        updated_cycle = await update_record(user_id, "cycles", cycle_id, update_data)
+        if updated_cycle is None:
             raise HTTPException(status_code=404, detail="Cycle not found")
-        
-        updated_cycle = await db.cycles.find_one({"id": cycle_id})
-        return Cycle(**updated_cycle)
+        return json_response(validate(Cycle, updated_cycle))
     except HTTPException:
         raise
     except Exception as e:
@@ -181,11 +928,17 @@ async def update_cycle(cycle_id: str, cycle_data: CycleUpdate):
         raise HTTPException(status_code=500, detail="Failed to update cycle")
 
 @api_router.delete("/cycles/{cycle_id}")
-async def delete_cycle(cycle_id: str):
+async def delete_cycle(cycle_id: str, user_id: str = Depends(authenticate)):
     try:
-        result = await db.cycles.delete_one({"id": cycle_id})
-        if result.deleted_count == 0:
+        deleted = await db.cycles.find_one_and_delete(
+            {"id": cycle_id, "userId": user_id}, projection={"_id": 0, "id": 1, "startDate": 1, "endDate": 1}
+        )
+        if deleted is None:
             raise HTTPException(status_code=404, detail="Cycle not found")
+        await write_tombstones(user_id, "cycles", [cycle_id])
+        await record_cache.invalidate(record_key("cycles", user_id, cycle_id))
+        await mark_stale(db, user_id)
+        record_changed(user_id, "cycles", deleted, deleted=True)
         return {"message": "Cycle deleted successfully"}
     except HTTPException:
         raise
@@ -193,47 +946,215 @@ async def delete_cycle(cycle_id: str):
         logger.error(f"Error deleting cycle: {e}")
         raise HTTPException(status_code=500, detail="Failed to delete cycle")
 
+# === PREDICTION ENDPOINTS ===
+@api_router.get("/predictions", response_model=Optional[Predictions])
+async def get_predictions(request: Request, user_id: str = Depends(authenticate)):
+    async def build():
+        if user_id not in _predictors:
+            # Cold cache: serve the batch job's result while it is current
+            derived = await load_fresh(db, user_id)
+            if derived is not None:
+                return derived["predictions"]
+        predictor = await get_predictor(user_id)
+        return predictor.predict()
+
+    try:
+        return await cached_response(request, user_id, ("cycles",), build)
+    except Exception as e:
+        logger.error(f"Error computing predictions: {e}")
+        raise HTTPException(status_code=500, detail="Failed to compute predictions")
+
+# === CALENDAR ENDPOINTS ===
+@api_router.get("/calendar", response_model=CalendarMonth)
+async def get_calendar(
+    request: Request,
+    month: str = Query(..., pattern=r"^\d{4}-(0[1-9]|1[0-2])$"),
+    user_id: str = Depends(authenticate),
+):
+    async def build():
+        grid = calendar_cache.get(calendar_key(user_id, month))
+        if grid is not None:
+            return grid
+
+        generation = calendar_cache.generation
+        first, last = month_bounds(month)
+        cycle_query = {"userId": user_id, **day_filter(lambda first, last: {
+            "startDate": {"$lte": last},
+            "$or": [
+                {"endDate": {"$gte": first}},
+                {"endDate": {"$in": [None, ""]}, "startDate": {"$gte": first}},
+            ],
+        }, first, last, legacy=legacy_date_strings)}
+        day_query = {"userId": user_id, **range_filter("date", first, last, legacy=legacy_date_strings)}
+        cycles, symptoms, notes, predictor = await asyncio.gather(
+            db.cycles.find(cycle_query, {"_id": 0, "id": 1, "startDate": 1, "endDate": 1, "flow": 1}).to_list(None),
+            db.symptoms.find(day_query, {"_id": 0, "id": 1, "date": 1, "symptoms": 1, "intensity": 1}).to_list(None),
+            db.notes.find(day_query, {"_id": 0, "id": 1, "date": 1, "content": 1}).to_list(None),
+            get_predictor(user_id),
+        )
+        grid = build_month_grid(month, cycles, symptoms, notes, predictor.predict())
+        calendar_cache.put(calendar_key(user_id, month), grid, generation)
+        return grid
+
+    try:
+        return await cached_response(request, user_id, ("cycles", "symptoms", "notes"), build)
+    except Exception as e:
+        logger.error(f"Error building calendar: {e}")
+        raise HTTPException(status_code=500, detail="Failed to build calendar")
+
+# === INSIGHT ENDPOINTS ===
+@api_router.get("/insights", response_model=Insights)
+async def get_insights(
+    request: Request,
+    date_from: Optional[date] = Query(None, alias="from"),
+    date_to: Optional[date] = Query(None, alias="to"),
+    top: int = Query(DEFAULT_TOP_SYMPTOMS, ge=1, le=50),
+    user_id: str = Depends(authenticate),
+):
+    async def build():
+        if date_from is None and date_to is None and top == DEFAULT_TOP_SYMPTOMS:
+            derived = await load_fresh(db, user_id)
+            if derived is not None:
+                return validate(Insights, derived["insights"])
+        return validate(Insights, await compute_insights(db, user_id, date_from, date_to, top,
+                                                         legacy=legacy_date_strings))
+
+    try:
+        return await cached_response(request, user_id, ("cycles", "symptoms", "notes"), build)
+    except Exception as e:
+        logger.error(f"Error computing insights: {e}")
+        raise HTTPException(status_code=500, detail="Failed to compute insights")
+
+# === ANALYTICS ENDPOINTS ===
+# The statistics are computed with numpy/pandas on a worker thread
+@api_router.get("/analytics/cycles", response_model=CycleAnalytics)
+async def get_cycle_analytics(
+    request: Request,
+    window: int = Query(DEFAULT_ROLLING_WINDOW, ge=2, le=12),
+    user_id: str = Depends(authenticate),
+):
+    async def build():
+        start_dates = await load_start_dates(db, user_id)
+        return validate(CycleAnalytics, await asyncio.to_thread(cycle_statistics, start_dates, window))
+
+    try:
+        return await cached_response(request, user_id, ("cycles",), build)
+    except Exception as e:
+        logger.error(f"Error computing cycle analytics: {e}")
+        raise HTTPException(status_code=500, detail="Failed to compute cycle analytics")
+
+@api_router.get("/analytics/symptoms", response_model=SymptomHeatmap)
+async def get_symptom_heatmap(
+    request: Request,
+    max_day: int = Query(DEFAULT_HEATMAP_DAYS, alias="maxDay", ge=1, le=90),
+    user_id: str = Depends(authenticate),
+):
+    async def build():
+        start_dates, entries = await asyncio.gather(
+            load_start_dates(db, user_id), load_symptom_entries(db, user_id)
+        )
+        return validate(
+            SymptomHeatmap,
+            await asyncio.to_thread(symptom_heatmap, start_dates, entries, max_day)
+        )
+
+    try:
+        return await cached_response(request, user_id, ("cycles", "symptoms"), build)
+    except Exception as e:
+        logger.error(f"Error computing symptom heatmap: {e}")
+        raise HTTPException(status_code=500, detail="Failed to compute symptom heatmap")
+
 # === SYMPTOM ENDPOINTS ===
 @api_router.post("/symptoms", response_model=Symptom)
-async def create_symptom(symptom_data: SymptomCreate):
+async def create_symptom(symptom_data: SymptomCreate, user_id: str = Depends(authenticate)):
     try:
-        symptom_dict = symptom_data.dict()
-        symptom_obj = Symptom(**symptom_dict)
-        result = await db.symptoms.insert_one(symptom_obj.dict())
+        symptom_dict = symptom_data.model_dump()
+        symptom_obj = Symptom(**symptom_dict, userId=user_id)
+        symptom_doc = symptom_obj.model_dump()
+        result = await db.symptoms.insert_one(symptom_doc)
+        symptom_doc.pop("_id", None)
+        await mark_stale(db, user_id)
+        record_changed(user_id, "symptoms", symptom_doc)
         logger.info(f"Created symptom with ID: {symptom_obj.id}")
-        return symptom_obj
+        return json_response(symptom_obj)
     except Exception as e:
         logger.error(f"Error creating symptom: {e}")
         raise HTTPException(status_code=500, detail="Failed to create symptom")
 
-@api_router.get("/symptoms", response_model=List[Symptom])
-async def get_symptoms():
+@api_router.get("/symptoms", response_model=SymptomPage)
+async def get_symptoms(
+    request: Request,
+    user_id: str = Depends(authenticate),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    date_from: Optional[date] = Query(None, alias="from"),
+    date_to: Optional[date] = Query(None, alias="to"),
+    fields: Optional[str] = Query(None, description="comma-separated fields to return, e.g. date,symptoms"),
+):
+    selected = parse_fields(Symptom, fields)
+    page_model = SymptomPage if selected is None else sparse_page_model(Symptom, selected)
+
+    async def build():
+        symptoms, next_cursor = await fetch_page(
+            list_reads(user_id, ("symptoms",)).symptoms, user_id,
+            COLLECTIONS["symptoms"]["date_field"], limit, cursor, date_from, date_to, selected
+        )
+        # One validation pass over the page; no per-document model construction
+        return validate(page_model, {"items": symptoms, "next": next_cursor})
+
     try:
-        symptoms = await db.symptoms.find().sort("createdAt", -1).to_list(1000)
-        return [Symptom(**symptom) for symptom in symptoms]
+        return await cached_response(request, user_id, ("symptoms",), build)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching symptoms: {e}")
         raise HTTPException(status_code=500, detail="Failed to fetch symptoms")
 
 @api_router.get("/symptoms/{symptom_id}", response_model=Symptom)
-async def get_symptom(symptom_id: str):
+async def get_symptom(symptom_id: str, user_id: str = Depends(authenticate)):
     try:
-        symptom = await db.symptoms.find_one({"id": symptom_id})
+        symptom = await record_cache.get_or_load(
+            record_key("symptoms", user_id, symptom_id),
+            lambda: db.symptoms.find_one({"id": symptom_id, "userId": user_id}, {"_id": 0}),
+        )
         if not symptom:
             raise HTTPException(status_code=404, detail="Symptom not found")
-        return Symptom(**symptom)
+        return json_response(validate(Symptom, symptom))
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Error fetching symptom: {e}")
         raise HTTPException(status_code=500, detail="Failed to fetch symptom")
 
+@api_router.patch("/symptoms/{symptom_id}", response_model=Symptom)
+async def update_symptom(symptom_id: str, symptom_data: SymptomUpdate, user_id: str = Depends(authenticate)):
+    try:
+        update_data = symptom_data.model_dump(exclude_none=True)
+        if not update_data:
+            raise HTTPException(status_code=400, detail="No data provided for update")
+
+        updated_symptom = await update_record(user_id, "symptoms", symptom_id, update_data)
+        if updated_symptom is None:
+            raise HTTPException(status_code=404, detail="Symptom not found")
+        return json_response(validate(Symptom, updated_symptom))
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error updating symptom: {e}")
+        raise HTTPException(status_code=500, detail="Failed to update symptom")
+
 @api_router.delete("/symptoms/{symptom_id}")
-async def delete_symptom(symptom_id: str):
+async def delete_symptom(symptom_id: str, user_id: str = Depends(authenticate)):
     try:
-        result = await db.symptoms.delete_one({"id": symptom_id})
-        if result.deleted_count == 0:
+        deleted = await db.symptoms.find_one_and_delete(
+            {"id": symptom_id, "userId": user_id}, projection={"_id": 0, "id": 1, "date": 1}
+        )
+        if deleted is None:
             raise HTTPException(status_code=404, detail="Symptom not found")
+        await write_tombstones(user_id, "symptoms", [symptom_id])
+        await record_cache.invalidate(record_key("symptoms", user_id, symptom_id))
+        await mark_stale(db, user_id)
+        record_changed(user_id, "symptoms", deleted, deleted=True)
         return {"message": "Symptom deleted successfully"}
     except HTTPException:
         raise
@@ -243,45 +1164,95 @@ async def delete_symptom(symptom_id: str):
 
 # === NOTES ENDPOINTS ===
 @api_router.post("/notes", response_model=Note)
-async def create_note(note_data: NoteCreate):
+async def create_note(note_data: NoteCreate, user_id: str = Depends(authenticate)):
     try:
-        note_dict = note_data.dict()
-        note_obj = Note(**note_dict)
-        result = await db.notes.insert_one(note_obj.dict())
+        note_dict = note_data.model_dump()
+        note_obj = Note(**note_dict, userId=user_id)
+        note_doc = note_obj.model_dump()
+        result = await db.notes.insert_one(note_doc)
+        note_doc.pop("_id", None)
+        await mark_stale(db, user_id)
+        record_changed(user_id, "notes", note_doc)
         logger.info(f"Created note with ID: {note_obj.id}")
-        return note_obj
+        return json_response(note_obj)
     except Exception as e:
         logger.error(f"Error creating note: {e}")
         raise HTTPException(status_code=500, detail="Failed to create note")
 
-@api_router.get("/notes", response_model=List[Note])
-async def get_notes():
+@api_router.get("/notes", response_model=NotePage)
+async def get_notes(
+    request: Request,
+    user_id: str = Depends(authenticate),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    date_from: Optional[date] = Query(None, alias="from"),
+    date_to: Optional[date] = Query(None, alias="to"),
+    fields: Optional[str] = Query(None, description="comma-separated fields to return, e.g. date,content"),
+):
+    selected = parse_fields(Note, fields)
+    page_model = NotePage if selected is None else sparse_page_model(Note, selected)
+
+    async def build():
+        notes, next_cursor = await fetch_page(
+            list_reads(user_id, ("notes",)).notes, user_id,
+            COLLECTIONS["notes"]["date_field"], limit, cursor, date_from, date_to, selected
+        )
+        # One validation pass over the page; no per-document model construction
+        return validate(page_model, {"items": notes, "next": next_cursor})
+
     try:
-        notes = await db.notes.find().sort("createdAt", -1).to_list(1000)
-        return [Note(**note) for note in notes]
+        return await cached_response(request, user_id, ("notes",), build)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching notes: {e}")
         raise HTTPException(status_code=500, detail="Failed to fetch notes")
 
 @api_router.get("/notes/{note_id}", response_model=Note)
-async def get_note(note_id: str):
+async def get_note(note_id: str, user_id: str = Depends(authenticate)):
     try:
-        note = await db.notes.find_one({"id": note_id})
+        note = await record_cache.get_or_load(
+            record_key("notes", user_id, note_id),
+            lambda: db.notes.find_one({"id": note_id, "userId": user_id}, {"_id": 0}),
+        )
         if not note:
             raise HTTPException(status_code=404, detail="Note not found")
-        return Note(**note)
+        return json_response(validate(Note, note))
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Error fetching note: {e}")
         raise HTTPException(status_code=500, detail="Failed to fetch note")
 
+@api_router.patch("/notes/{note_id}", response_model=Note)
+async def update_note(note_id: str, note_data: NoteUpdate, user_id: str = Depends(authenticate)):
+    try:
+        update_data = note_data.model_dump(exclude_none=True)
+        if not update_data:
+            raise HTTPException(status_code=400, detail="No data provided for update")
+
+        updated_note = await update_record(user_id, "notes", note_id, update_data)
+        if updated_note is None:
+            raise HTTPException(status_code=404, detail="Note not found")
+        return json_response(validate(Note, updated_note))
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error updating note: {e}")
+        raise HTTPException(status_code=500, detail="Failed to update note")
+
 @api_router.delete("/notes/{note_id}")
-async def delete_note(note_id: str):
+async def delete_note(note_id: str, user_id: str = Depends(authenticate)):
     try:
-        result = await db.notes.delete_one({"id": note_id})
-        if result.deleted_count == 0:
+        deleted = await db.notes.find_one_and_delete(
+            {"id": note_id, "userId": user_id}, projection={"_id": 0, "id": 1, "date": 1}
+        )
+        if deleted is None:
             raise HTTPException(status_code=404, detail="Note not found")
+        await write_tombstones(user_id, "notes", [note_id])
+        await record_cache.invalidate(record_key("notes", user_id, note_id))
+        await mark_stale(db, user_id)
+        record_changed(user_id, "notes", deleted, deleted=True)
         return {"message": "Note deleted successfully"}
     except HTTPException:
         raise
@@ -289,45 +1260,253 @@ async def delete_note(note_id: str):
         logger.error(f"Error deleting note: {e}")
         raise HTTPException(status_code=500, detail="Failed to delete note")
 
+# === SEARCH ENDPOINTS ===
+class SearchHit(BaseModel):
+    type: str  # note, symptom
+    id: str
+    date: Optional[Day] = None
+    score: float  # 0 to 1, comparable between notes and symptoms
+    snippet: str
+    highlights: List[List[int]]  # [start, end) character offsets of matched words in snippet
+    symptoms: Optional[List[str]] = None
+
+class SearchPage(BaseModel):
+    items: List[SearchHit]
+    next: Optional[str] = None
+
+def encode_offset(offset: int) -> str:
+    """Opaque cursor of a relevance-ranked page, which can only be paged by offset."""
+    return base64.urlsafe_b64encode(json.dumps({"o": offset}).encode()).decode().rstrip("=")
+
+def decode_offset(cursor: str) -> int:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        offset = json.loads(base64.urlsafe_b64decode(padded))["o"]
+        if not isinstance(offset, int) or offset < 0:
+            raise ValueError(offset)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return offset
+
+@api_router.get("/search", response_model=SearchPage)
+async def search_records(
+    request: Request,
+    q: str = Query(..., min_length=1, max_length=200),
+    date_from: Optional[date] = Query(None, alias="from"),
+    date_to: Optional[date] = Query(None, alias="to"),
+    limit: int = Query(DEFAULT_SEARCH_LIMIT, ge=1, le=MAX_SEARCH_LIMIT),
+    cursor: Optional[str] = None,
+    user_id: str = Depends(authenticate),
+):
+    offset = decode_offset(cursor) if cursor else 0
+
+    async def build():
+        page = await search(list_reads(user_id, ("notes", "symptoms")), user_id, q, date_from, date_to, limit, offset,
+                            legacy=legacy_date_strings)
+        next_offset = page["next"]
+        return validate(SearchPage, {
+            "items": page["items"], "next": encode_offset(next_offset) if next_offset is not None else None,
+        })
+
+    try:
+        return await cached_response(request, user_id, ("notes", "symptoms"), build)
+    except Exception as e:
+        logger.error(f"Error searching records: {e}")
+        raise HTTPException(status_code=500, detail="Failed to search")
+
+# === SYNC ENDPOINTS ===
+class SyncResponse(BaseModel):
+    cycles: CycleChanges
+    symptoms: SymptomChanges
+    notes: NoteChanges
+    preferences: Optional[UserPreferences] = None
+    next: str
+    hasMore: bool
+
+@api_router.get("/sync", response_model=SyncResponse)
+async def sync_changes(
+    since: Optional[str] = None,
+    limit: int = Query(DEFAULT_SYNC_LIMIT, ge=1, le=MAX_PAGE_SIZE),
+    user_id: str = Depends(authenticate),
+):
+    try:
+        positions = decode_token(since) if since else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid sync token")
+    try:
+        changes, next_positions, has_more = await collect_changes(db, user_id, positions, limit)
+        response = SyncResponse(**changes, next=encode_token(next_positions), hasMore=has_more)
+        return json_response(response)
+    except SyncTokenExpired:
+        raise HTTPException(status_code=410, detail="Sync token expired, perform a full sync")
+    except Exception as e:
+        logger.error(f"Error collecting changes: {e}")
+        raise HTTPException(status_code=500, detail="Failed to sync changes")
+
+# === EXPORT ENDPOINTS ===
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+@api_router.get("/export")
+async def export_data(
+    export_format: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$"),
+    gzip: bool = False,
+    user_id: str = Depends(authenticate),
+):
+    filename = f"cycle-tracker-export.{export_format}"
+    media_type = EXPORT_MEDIA_TYPES[export_format]
+    if gzip:
+        filename += ".gz"
+        media_type = "application/gzip"
+    logger.info(f"Starting {export_format} export (gzip={gzip})")
+    return StreamingResponse(
+        export_stream(db, user_id, export_format, compress=gzip),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+# === IMPORT ENDPOINTS ===
+# Most recent import jobs, oldest evicted first
+MAX_TRACKED_IMPORTS = 100
+import_jobs: "OrderedDict[str, ImportJob]" = OrderedDict()
+_import_tasks = set()
+# Seconds between two saves of a running job's progress, for the other workers
+IMPORT_PROGRESS_INTERVAL = 1.0
+
+async def save_import_job(job: ImportJob):
+    """Store the job's state so that a status request reaching another worker can answer it."""
+    await db.import_jobs.replace_one({"id": job.id}, {**job.to_dict(), "userId": job.user_id}, upsert=True)
+
+async def _save_import_progress(job: ImportJob):
+    while True:
+        await asyncio.sleep(IMPORT_PROGRESS_INTERVAL)
+        try:
+            await save_import_job(job)
+        except Exception as e:
+            logger.error(f"Error saving progress of import {job.id}: {e}")
+
+async def _run_import_job(job: ImportJob, path: str):
+    progress = asyncio.create_task(_save_import_progress(job))
+    try:
+        # Before and after, so a batch run during the import cannot leave a fresh-looking result
+        await mark_stale(db, job.user_id)
+        await run_import(db, job, path, COLLECTIONS, partial(records_changed, job.user_id),
+                         format_validation_error)
+        await mark_stale(db, job.user_id)
+        logger.info(f"Import {job.id} completed: {job.inserted} inserted, "
+                    f"{job.duplicates} duplicates, {job.invalid} invalid")
+    except Exception as e:
+        logger.error(f"Error running import {job.id}: {e}")
+    finally:
+        progress.cancel()
+        try:
+            await save_import_job(job)
+        except Exception as e:
+            logger.error(f"Error saving import {job.id}: {e}")
+
+@api_router.post("/import", status_code=202)
+async def import_data(
+    request: Request,
+    import_format: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$"),
+    batch_size: int = Query(DEFAULT_BATCH_SIZE, ge=1, le=MAX_BATCH_SIZE),
+    user_id: str = Depends(authenticate),
+):
+    # Spool the request body to disk chunk by chunk; parsing happens in the background
+    try:
+        total_bytes = 0
+        with tempfile.NamedTemporaryFile(delete=False, suffix=f".{import_format}") as upload:
+            async for chunk in request.stream():
+                upload.write(chunk)
+                total_bytes += len(chunk)
+    except Exception as e:
+        logger.error(f"Error receiving import upload: {e}")
+        raise HTTPException(status_code=500, detail="Failed to receive upload")
+
+    job = ImportJob(user_id, import_format, total_bytes, batch_size)
+    try:
+        await save_import_job(job)
+    except Exception as e:
+        logger.error(f"Error saving import job: {e}")
+        os.unlink(upload.name)
+        raise HTTPException(status_code=500, detail="Failed to start import")
+    import_jobs[job.id] = job
+    while len(import_jobs) > MAX_TRACKED_IMPORTS:
+        import_jobs.popitem(last=False)
+
+    task = asyncio.create_task(_run_import_job(job, upload.name))
+    _import_tasks.add(task)
+    task.add_done_callback(_import_tasks.discard)
+    return job.to_dict()
+
+@api_router.get("/import/{job_id}")
+async def get_import_job(job_id: str, user_id: str = Depends(authenticate)):
+    job = import_jobs.get(job_id)
+    if job is not None and job.user_id == user_id:
+        return job.to_dict()
+    # Started by another worker
+    try:
+        saved = await db.import_jobs.find_one({"id": job_id, "userId": user_id}, {"_id": 0, "userId": 0})
+    except Exception as e:
+        logger.error(f"Error fetching import job: {e}")
+        raise HTTPException(status_code=500, detail="Failed to fetch import job")
+    if saved is None:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    return saved
+
 # === USER PREFERENCES ENDPOINTS ===
+async def upsert_preferences(user_id: str, update_data: dict) -> dict:
+    """Apply ``update_data`` to the user's preferences, creating them with defaults if missing.
+
+    One atomic round trip; the unique index on userId makes concurrent first
+    writes collide instead of creating duplicates, and the loser retries as
+    a plain update.
+    """
+    defaults = {key: value for key, value in UserPreferences(userId=user_id).model_dump().items()
+                if key not in update_data}
+    update = {"$setOnInsert": defaults}
+    if update_data:
+        update["$set"] = update_data
+    for attempt in range(2):
+        try:
+            return await db.preferences.find_one_and_update(
+                {"userId": user_id}, update, projection={"_id": 0},
+                upsert=True, return_document=ReturnDocument.AFTER,
+            )
+        except DuplicateKeyError:
+            if attempt:
+                raise
+
 @api_router.get("/preferences", response_model=UserPreferences)
-async def get_user_preferences():
-    try:
-        preferences = await db.preferences.find_one()
+async def get_user_preferences(request: Request, user_id: str = Depends(authenticate)):
+    async def load():
+        preferences = await db.preferences.find_one({"userId": user_id}, {"_id": 0})
         if not preferences:
             # Create default preferences if none exist
-            default_prefs = UserPreferences()
-            await db.preferences.insert_one(default_prefs.dict())
-            return default_prefs
-        return UserPreferences(**preferences)
+            preferences = await upsert_preferences(user_id, {})
+            preferences_changed(user_id)
+        return preferences
+
+    async def build():
+        return validate(UserPreferences, await record_cache.get_or_load(record_key("preferences", user_id), load))
+
+    try:
+        return await cached_response(request, user_id, ("preferences",), build)
     except Exception as e:
         logger.error(f"Error fetching preferences: {e}")
         raise HTTPException(status_code=500, detail="Failed to fetch preferences")
 
 @api_router.put("/preferences", response_model=UserPreferences)
-async def update_user_preferences(prefs_data: UserPreferencesUpdate):
+async def update_user_preferences(prefs_data: UserPreferencesUpdate, user_id: str = Depends(authenticate)):
     try:
-        update_data = {k: v for k, v in prefs_data.dict().items() if v is not None}
+        update_data = prefs_data.model_dump(exclude_none=True)
         if not update_data:
             raise HTTPException(status_code=400, detail="No data provided for update")
         
         update_data["updatedAt"] = datetime.utcnow()
-        
-        # Check if preferences exist
-        existing_prefs = await db.preferences.find_one()
-        if not existing_prefs:
-            # Create new preferences
-            new_prefs = UserPreferences(**update_data)
-            await db.preferences.insert_one(new_prefs.dict())
-            return new_prefs
-        else:
-            # Update existing preferences
-            result = await db.preferences.update_one(
-                {"id": existing_prefs["id"]},
-                {"$set": update_data}
-            )
-            updated_prefs = await db.preferences.find_one({"id": existing_prefs["id"]})
-            return UserPreferences(**updated_prefs)
+
+        preferences = await upsert_preferences(user_id, update_data)
+        await record_cache.invalidate(record_key("preferences", user_id))
+        preferences_changed(user_id)
+        return json_response(validate(UserPreferences, preferences))
     except HTTPException:
         raise
     except Exception as e:
@@ -337,14 +1516,102 @@ async def update_user_preferences(prefs_data: UserPreferencesUpdate):
 # Include the router in the main app
 app.include_router(api_router)
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return Response(content=REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+def client_key(scope) -> str:
+    """Rate limit key of a request: its user with a valid token, else its remote address.
+
+    The user resolved here is kept in the request state and reused by the
+    ``authenticate`` dependency, so the token is verified once. Behind a reverse proxy, run uvicorn with --proxy-headers (and
+    --forwarded-allow-ips) so the address is the client's.
+    """
+    user_id = authenticate.user_of(scope)
+    if user_id is not None:
+        return f"user:{user_id}"
+    client_address = scope.get("client")
+    return f"ip:{client_address[0]}" if client_address else "ip:unknown"
+
+# Rate limits and load shedding (see admission.py); inside CORS so rejections carry its headers
+app.add_middleware(
+    AdmissionMiddleware, routes=app.routes, identify=client_key, config=AdmissionConfig.from_env(os.environ)
+)
+
+# gzip/brotli negotiated by Accept-Encoding, for bodies over COMPRESSION_MIN_SIZE (see compression.py)
+app.add_middleware(
+    CompressionMiddleware, minimum_size=int(os.environ.get("COMPRESSION_MIN_SIZE") or DEFAULT_MINIMUM_SIZE)
+)
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Retry-After"],
 )
 
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    client.close()
+# Added last so it is the outermost middleware and times everything below it
+app.add_middleware(MetricsMiddleware)
+
+async def run_migrations():
+    global legacy_date_strings
+    try:
+        results = await run_all(db, pause=0.05)
+        for result in results:
+            logger.info(f"Migration {result['name']}: {result['status']}")
+        legacy_date_strings = not await is_applied(db, "native_dates")
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        logger.error(f"Error running schema migrations: {e}")
+
+async def backfill_reminders():
+    # Users who have not written since reminders were enabled have none yet.
+    # Each worker may run it, rescheduling is idempotent; an interrupted run
+    # resumes from its checkpoint at the next startup.
+    try:
+        checkpoint = await load_checkpoint(db, REMINDERS_JOB)
+        if checkpoint and checkpoint.get("status") == "completed":
+            return
+        summary = await run_reminders(db, concurrency=8, scheduler=reminder_scheduler)
+        logger.info(f"Reminder backfill: {summary['scheduled']} reminders for {summary['processed']} users")
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        logger.error(f"Error backfilling reminders: {e}")
+
+async def bootstrap_indexes():
+    # INDEX_MODE: "create" (default) reconciles indexes, "check" only reports, "off" skips
+    mode = os.environ.get("INDEX_MODE", "create").lower()
+    if mode == "off":
+        return
+    try:
+        await ensure_indexes(db, check_only=(mode == "check"))
+    except Exception as e:
+        logger.error(f"Error ensuring indexes: {e}")
+
+async def backfill_sync_fields():
+    try:
+        updated = await backfill_updated_at(db)
+        if updated:
+            logger.info(f"Backfilled updatedAt on {updated} documents")
+    except Exception as e:
+        logger.error(f"Error backfilling updatedAt: {e}")
+
+async def assign_unowned_records():
+    # Documents stored before records had a userId belong to DEFAULT_USER_ID
+    if not DEFAULT_USER_ID:
+        return
+    try:
+        assigned = 0
+        for collection in [*COLLECTIONS, "preferences", "tombstones"]:
+            result = await db[collection].update_many(
+                {"userId": {"$exists": False}}, {"$set": {"userId": DEFAULT_USER_ID}}
+            )
+            assigned += result.modified_count
+        if assigned:
+            logger.info(f"Assigned {assigned} unowned documents to user {DEFAULT_USER_ID}")
+    except Exception as e:
+        logger.error(f"Error assigning unowned documents: {e}")
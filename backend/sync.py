@@ -0,0 +1,135 @@
+"""Change-log based delta sync.
+
+Every cycle, symptom and note carries an ``updatedAt`` timestamp, and deletes
+leave a tombstone in the ``tombstones`` collection. ``collect_changes``
+returns what was created, updated or deleted for one user after the
+positions stored in the client's sync token, together with the token to use
+next time.
+
+A token holds one ``(updatedAt, id)`` keyset position per stream. When a
+stream was read to the end its position is set ``SYNC_LAG`` in the past, so
+that writes still in flight during a sync are picked up by the next one.
+Changes may therefore be delivered more than once and clients must apply
+them idempotently (upsert by ``id``).
+"""
+import base64
+import json
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+SYNC_COLLECTIONS = ["cycles", "symptoms", "notes"]
+SYNC_LAG = timedelta(seconds=5)
+
+# Tombstones expire after this long; older tokens must do a full sync
+TOMBSTONE_RETENTION = timedelta(days=90)
+
+Position = Tuple[datetime, str]
+
+
+class SyncTokenExpired(Exception):
+    """The token predates the tombstone retention window."""
+
+
+def encode_token(positions: Dict[str, Position]) -> str:
+    payload = {"v": 1, "p": {name: [t.isoformat(), i] for name, (t, i) in positions.items()}}
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_token(token: str) -> Dict[str, Position]:
+    """Return the stream positions in ``token``; raises ValueError when malformed."""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded))
+        if payload.get("v") != 1:
+            raise ValueError("Unsupported sync token version")
+        return {name: (datetime.fromisoformat(t), i) for name, (t, i) in payload["p"].items()}
+    except (KeyError, TypeError) as e:
+        raise ValueError(f"Malformed sync token: {e}")
+
+
+def tombstones_for(user_id: str, collection: str, ids: List[str]) -> List[dict]:
+    now = datetime.utcnow()
+    return [
+        {"id": record_id, "userId": user_id, "collection": collection, "deletedAt": now}
+        for record_id in ids
+    ]
+
+
+async def backfill_updated_at(db) -> int:
+    """Give documents written before ``updatedAt`` existed their createdAt."""
+    updated = 0
+    for collection in SYNC_COLLECTIONS:
+        result = await db[collection].update_many(
+            {"updatedAt": {"$exists": False}}, [{"$set": {"updatedAt": "$createdAt"}}]
+        )
+        updated += result.modified_count
+    return updated
+
+
+def _after(user_id: str, field: str, position: Optional[Position]) -> dict:
+    if position is None:
+        return {"userId": user_id}
+    at, last_id = position
+    return {"userId": user_id, "$or": [{field: {"$gt": at}}, {field: at, "id": {"$gt": last_id}}]}
+
+
+async def _read_stream(collection, user_id: str, field: str, position: Optional[Position], limit: int,
+                       now: datetime) -> Tuple[List[dict], Position, bool]:
+    docs = await collection.find(_after(user_id, field, position), {"_id": 0}).sort(
+        [(field, 1), ("id", 1)]
+    ).limit(limit).to_list(limit)
+    if len(docs) == limit:
+        return docs, (docs[-1][field], docs[-1]["id"]), True
+    # Read to the end: restart slightly in the past to catch in-flight writes
+    caught_up = (now - SYNC_LAG, "")
+    if position is not None and position > caught_up:
+        caught_up = position
+    return docs, caught_up, False
+
+
+async def collect_changes(db, user_id: str, positions: Optional[Dict[str, Position]],
+                          limit: int) -> Tuple[dict, Dict[str, Position], bool]:
+    """Gather the changes of ``user_id`` after ``positions`` (everything when None).
+
+    At most ``limit`` records are read per collection, and ``limit``
+    tombstones overall. Returns the changes, the next positions and whether
+    more changes are pending.
+    """
+    now = datetime.utcnow()
+    positions = positions or {}
+    tombstone_position = positions.get("tombstones")
+    if tombstone_position is not None and tombstone_position[0] < now - TOMBSTONE_RETENTION:
+        raise SyncTokenExpired()
+
+    next_positions: Dict[str, Position] = {}
+    has_more = False
+    changes = {}
+
+    for collection in SYNC_COLLECTIONS:
+        upserted, next_positions[collection], truncated = await _read_stream(
+            db[collection], user_id, "updatedAt", positions.get(collection), limit, now
+        )
+        has_more = has_more or truncated
+        changes[collection] = {"upserted": upserted, "deleted": []}
+
+    # A full sync has nothing to delete; start the tombstone stream from now
+    if not positions:
+        next_positions["tombstones"] = (now - SYNC_LAG, "")
+    else:
+        tombstones, next_positions["tombstones"], truncated = await _read_stream(
+            db.tombstones, user_id, "deletedAt", positions.get("tombstones"), limit, now
+        )
+        has_more = has_more or truncated
+        for tombstone in tombstones:
+            if tombstone["collection"] in changes:
+                changes[tombstone["collection"]]["deleted"].append(tombstone["id"])
+
+    preferences = await db.preferences.find_one(
+        _after(user_id, "updatedAt", positions.get("preferences")), {"_id": 0}
+    )
+    changes["preferences"] = preferences
+    next_positions["preferences"] = (now - SYNC_LAG, "")
+    if positions.get("preferences") and positions["preferences"] > next_positions["preferences"]:
+        next_positions["preferences"] = positions["preferences"]
+    return changes, next_positions, has_more
@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Load test for the API, run in-process against a local Mongo stand-in.
+
+Boots the FastAPI app on an ASGI transport (no network, no uvicorn), seeds a
+benchmark user with a fixed-seed dataset of each requested size and drives
+concurrent requests at every scenario, reporting latency percentiles and
+throughput. Uses a local mongod when --mongo-url is given, mongomock-motor
+otherwise.
+
+Usage:
+    python benchmarks/load_test.py --sizes 100 1000 --requests 500 --concurrency 32
+    python benchmarks/load_test.py --mongo-url mongodb://localhost:27017 --output results.json
+    python benchmarks/load_test.py --compare baseline.json --threshold 0.25
+"""
+
+import argparse
+import asyncio
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import orjson
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+# Configure the app before it is imported; the benchmark authenticates with its own key
+JWT_SECRET = "load-test-secret-load-test-secret"
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "load_test")
+os.environ["JWT_SECRET"] = JWT_SECRET
+os.environ["INDEX_MODE"] = "create"
+# One client drives every request, far above any per-client rate limit
+os.environ["RATE_LIMIT_RPS"] = "0"
+
+import httpx  # noqa: E402
+import jwt  # noqa: E402
+
+import server  # noqa: E402
+
+BENCH_USER = "load-test-user"
+SCENARIOS = ["list", "list_paged", "get_by_id", "create", "update", "delete", "preferences_get", "preferences_put"]
+LATENCY_KEYS = ["p50_ms", "p95_ms", "p99_ms"]
+
+
+def connect(mongo_url):
+    if mongo_url:
+        from database import create_client
+        client = create_client(mongo_url, os.environ)
+        backend = "mongod"
+    else:
+        from mongomock_motor import AsyncMongoMockClient
+        client = AsyncMongoMockClient()
+        backend = "mongomock-motor"
+    return client, client[os.environ["DB_NAME"]], backend
+
+
+async def seed(db, size, rng):
+    """Insert ``size`` cycles, symptoms and notes for the benchmark user."""
+    for name in ["cycles", "symptoms", "notes", "preferences", "tombstones", "derived"]:
+        await db[name].delete_many({})
+    start = datetime(2015, 1, 1)
+    cycles, symptoms, notes = [], [], []
+    for i in range(size):
+        day = start + timedelta(days=28 * i + rng.randint(-3, 3))
+        cycles.append(server.Cycle(userId=BENCH_USER, startDate=day.date().isoformat(),
+                                   flow=rng.choice(["light", "medium", "heavy"])).model_dump())
+        symptoms.append(server.Symptom(userId=BENCH_USER, date=(day + timedelta(days=1)).date().isoformat(),
+                                       symptoms=rng.sample(["cramps", "headache", "fatigue", "bloating"], 2)).model_dump())
+        notes.append(server.Note(userId=BENCH_USER, date=(day + timedelta(days=2)).date().isoformat(),
+                                 content=f"note {i}").model_dump())
+    for name, docs in [("cycles", cycles), ("symptoms", symptoms), ("notes", notes)]:
+        if docs:
+            await db[name].insert_many(docs)
+    return [doc["id"] for doc in cycles]
+
+
+async def seed_deletable(db, count):
+    """Extra notes for the delete scenario, inserted right before it runs."""
+    notes = [server.Note(userId=BENCH_USER, date="2031-01-01", content=f"delete {i}").model_dump()
+             for i in range(count)]
+    await db.notes.insert_many(notes)
+    return [doc["id"] for doc in notes]
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return None
+    index = max(0, min(len(sorted_values) - 1, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+async def drive(client, make_request, total, concurrency):
+    """Send ``total`` requests with at most ``concurrency`` in flight."""
+    latencies, errors = [], 0
+    counter = iter(range(total))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            method, url, kwargs = make_request(i)
+            started = time.perf_counter()
+            response = await client.request(method, url, **kwargs)
+            latencies.append((time.perf_counter() - started) * 1000)
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "requests": total,
+        "errors": errors,
+        "rps": round(total / elapsed, 1),
+        "mean_ms": round(sum(latencies) / len(latencies), 3),
+        "p50_ms": round(percentile(latencies, 0.50), 3),
+        "p95_ms": round(percentile(latencies, 0.95), 3),
+        "p99_ms": round(percentile(latencies, 0.99), 3),
+    }
+
+
+def scenario_requests(name, cycle_ids, note_ids, rng, pages):
+    """Return a function building the i-th request of scenario ``name``."""
+    if name == "list":
+        # Same URL every time: measures the response cache path
+        return lambda i: ("GET", "/api/cycles", {"params": {"limit": 100}})
+    if name == "list_paged":
+        # Distinct URLs: requests miss the response cache until the pages repeat
+        return lambda i: ("GET", "/api/notes", {"params": {"limit": 50, **pages[i % len(pages)]}})
+    if name == "get_by_id":
+        return lambda i: ("GET", f"/api/cycles/{rng.choice(cycle_ids)}", {})
+    if name == "create":
+        return lambda i: ("POST", "/api/notes", {"json": {"date": "2030-01-01", "content": f"load {i}"}})
+    if name == "update":
+        return lambda i: ("PUT", f"/api/cycles/{rng.choice(cycle_ids)}", {"json": {"flow": rng.choice(["light", "heavy"])}})
+    if name == "delete":
+        return lambda i: ("DELETE", f"/api/notes/{note_ids[i]}", {})
+    if name == "preferences_get":
+        return lambda i: ("GET", "/api/preferences", {})
+    if name == "preferences_put":
+        return lambda i: ("PUT", "/api/preferences", {"json": {"theme": rng.choice(["neutral", "earthy"])}})
+    raise ValueError(name)
+
+
+async def note_pages(client, count):
+    """Cursor parameters of the first ``count`` pages of the notes list."""
+    pages, params = [{}], {"limit": 50}
+    while len(pages) < count:
+        body = (await client.get("/api/notes", params=params)).json()
+        if not body["next"]:
+            break
+        params = {"limit": 50, "cursor": body["next"]}
+        pages.append({"cursor": body["next"]})
+    return pages
+
+
+async def run(args):
+    mongo_client, db, backend = connect(args.mongo_url)
+    server.client, server.db = mongo_client, db
+    token = jwt.encode({"sub": BENCH_USER}, JWT_SECRET, algorithm="HS256")
+    headers = {"Authorization": f"Bearer {token}"}
+    rng = random.Random(args.seed)
+
+    results = []
+    async with server.app.router.lifespan_context(server.app):
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", headers=headers) as client:
+            for size in args.sizes:
+                cycle_ids = await seed(db, size, rng)
+                pages = await note_pages(client, max(1, min(args.requests, size // 50)))
+                # Start each dataset size from cold in-process caches
+                server.response_cache.clear()
+                server.calendar_cache.clear()
+                server._predictors.clear()
+                await server.record_cache.clear()
+                for name in args.scenarios:
+                    note_ids = await seed_deletable(db, args.requests) if name == "delete" else []
+                    make_request = scenario_requests(name, cycle_ids, note_ids, rng, pages)
+                    stats = await drive(client, make_request, args.requests, args.concurrency)
+                    results.append({"size": size, "scenario": name, **stats})
+                    print(f"{size:>8} {name:<16} {stats['rps']:>9} rps  p50 {stats['p50_ms']:>8} ms  "
+                          f"p95 {stats['p95_ms']:>8} ms  p99 {stats['p99_ms']:>8} ms  errors {stats['errors']}",
+                          file=sys.stderr)
+
+    return {
+        "meta": {
+            "timestamp": datetime.utcnow().isoformat(),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "backend": backend,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, cwd=BACKEND_DIR, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(report, baseline, threshold):
+    """List (size, scenario, metric, old, new) entries that regressed by more than ``threshold``."""
+    previous = {(r["size"], r["scenario"]): r for r in baseline["results"]}
+    regressions = []
+    for result in report["results"]:
+        old = previous.get((result["size"], result["scenario"]))
+        if old is None:
+            continue
+        for key in LATENCY_KEYS:
+            if result[key] > old[key] * (1 + threshold):
+                regressions.append((result["size"], result["scenario"], key, old[key], result[key]))
+        if result["rps"] < old["rps"] * (1 - threshold):
+            regressions.append((result["size"], result["scenario"], "rps", old["rps"], result["rps"]))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000],
+                        help="records per collection to seed, one run each")
+    parser.add_argument("--requests", type=int, default=200, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=16, help="requests in flight")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument("--mongo-url", help="use this mongod instead of mongomock-motor")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--compare", help="baseline JSON report; exit 1 on regressions")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="allowed relative slowdown before a result counts as a regression")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    body = orjson.dumps(report, option=orjson.OPT_INDENT_2)
+    if args.output:
+        Path(args.output).write_bytes(body)
+    else:
+        sys.stdout.write(body.decode() + "\n")
+
+    if args.compare:
+        regressions = compare(report, orjson.loads(Path(args.compare).read_bytes()), args.threshold)
+        for size, scenario, key, old, new in regressions:
+            print(f"REGRESSION {scenario} @ {size}: {key} {old} -> {new}", file=sys.stderr)
+        raise SystemExit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Serialization benchmark for the list endpoints.
+
+Compares the CPU cost of turning a page of Mongo documents into a JSON body:
+  legacy - Cycle(**doc) per document, FastAPI re-validation against
+           response_model, then the stdlib json encoder
+  fast   - one model_validate over the page, model_dump, then orjson
+
+Runs without a database. Usage:
+    python benchmarks/serialization.py [--sizes 100 1000 10000] [--repeat 20]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from bson import ObjectId
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "benchmark")
+
+import orjson  # noqa: E402
+from pydantic import TypeAdapter  # noqa: E402
+
+from server import Cycle, CyclePage, dump_json  # noqa: E402
+
+
+def make_documents(count):
+    """Cycle documents shaped like the stored ones, _id included"""
+    start = datetime(2020, 1, 1)
+    docs = []
+    for i in range(count):
+        created = start + timedelta(days=28 * i)
+        docs.append({
+            "_id": ObjectId(),
+            "id": str(uuid.uuid4()),
+            "userId": "benchmark",
+            "startDate": created,
+            "endDate": created + timedelta(days=5),
+            "flow": "medium",
+            "length": 28,
+            "createdAt": created,
+            "updatedAt": created,
+        })
+    return docs
+
+
+LEGACY_ADAPTER = TypeAdapter(list[Cycle])
+
+
+def legacy_path(docs):
+    items = [Cycle(**doc) for doc in docs]
+    # What FastAPI does with response_model=List[Cycle]
+    validated = LEGACY_ADAPTER.validate_python(items)
+    return json.dumps(LEGACY_ADAPTER.dump_python(validated, mode="json")).encode()
+
+
+def fast_path(docs):
+    return dump_json(CyclePage.model_validate({"items": docs, "next": None}))
+
+
+def cpu_ms_per_call(func, docs, repeat):
+    func(docs)  # warm up
+    start = time.process_time()
+    for _ in range(repeat):
+        func(docs)
+    return (time.process_time() - start) * 1000 / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    results = []
+    for size in args.sizes:
+        docs = make_documents(size)
+        # The fast path queries with {"_id": 0}, so it never sees ObjectIds
+        projected = [{k: v for k, v in doc.items() if k != "_id"} for doc in docs]
+        legacy = cpu_ms_per_call(legacy_path, docs, args.repeat)
+        fast = cpu_ms_per_call(fast_path, projected, args.repeat)
+        results.append({"documents": size, "legacy_cpu_ms": round(legacy, 3),
+                        "fast_cpu_ms": round(fast, 3), "speedup": round(legacy / fast, 2)})
+
+    if args.json:
+        print(orjson.dumps(results).decode())
+        return
+
+    print(f"{'documents':>10} {'legacy ms':>12} {'fast ms':>10} {'speedup':>8}")
+    for row in results:
+        print(f"{row['documents']:>10} {row['legacy_cpu_ms']:>12} {row['fast_cpu_ms']:>10} {row['speedup']:>7}x")
+
+
+if __name__ == "__main__":
+    main()
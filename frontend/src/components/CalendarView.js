@@ -1,4 +1,4 @@
-import React, { useState, useMemo } from 'react';
+import React, { useState, useEffect, useMemo } from 'react';
 import { ChevronLeft, ChevronRight, Plus, Heart, Droplets } from 'lucide-react';
 import { useCycle } from '../contexts/CycleContext';
 import { useTheme } from '../contexts/ThemeContext';
@@ -9,14 +9,37 @@ import { Badge } from './ui/badge';
 import TodayWidget from './TodayWidget';
 
 const CalendarView = () => {
-  const { cycles, symptoms, notes, getPredictions } = useCycle();
+  const { cycles, symptoms, notes, getPredictions, fetchCalendarMonth } = useCycle();
   const { colors } = useTheme();
   const { t } = useLanguage();
   const [currentDate, setCurrentDate] = useState(new Date());
   const [selectedDate, setSelectedDate] = useState(null);
+  const [monthGrid, setMonthGrid] = useState({});
 
   const predictions = getPredictions();
 
+  const toDateKey = (date) => {
+    const month = String(date.getMonth() + 1).padStart(2, '0');
+    const day = String(date.getDate()).padStart(2, '0');
+    return `${date.getFullYear()}-${month}-${day}`;
+  };
+
+  const monthKey = toDateKey(currentDate).slice(0, 7);
+
+  // Reload the visible month whenever it changes or local data is modified
+  useEffect(() => {
+    let cancelled = false;
+    fetchCalendarMonth(monthKey)
+      .then((grid) => {
+        if (cancelled) return;
+        const byDate = {};
+        grid.days.forEach((day) => { byDate[day.date] = day; });
+        setMonthGrid(byDate);
+      })
+      .catch((error) => console.error('Error loading calendar month:', error));
+    return () => { cancelled = true; };
+  }, [monthKey, cycles, symptoms, notes]);
+
   const getDaysInMonth = (date) => {
     const year = date.getFullYear();
     const month = date.getMonth();
@@ -42,40 +65,7 @@ const CalendarView = () => {
 
   const getDateInfo = (date) => {
     if (!date) return null;
-    
-    const dateStr = date.toISOString().split('T')[0];
-    const cycleInfo = cycles.find(cycle => {
-      const start = new Date(cycle.startDate);
-      const end = new Date(cycle.endDate);
-      return date >= start && date <= end;
-    });
-    
-    const symptomInfo = symptoms.find(symptom => symptom.date === dateStr);
-    const noteInfo = notes.find(note => note.date === dateStr);
-    
-    let prediction = null;
-    if (predictions) {
-      const dateTime = date.getTime();
-      const nextPeriod = predictions.nextPeriod.getTime();
-      const ovulation = predictions.ovulation.getTime();
-      const fertileStart = predictions.fertileWindow.start.getTime();
-      const fertileEnd = predictions.fertileWindow.end.getTime();
-      
-      if (Math.abs(dateTime - nextPeriod) < 24 * 60 * 60 * 1000) {
-        prediction = 'period';
-      } else if (Math.abs(dateTime - ovulation) < 24 * 60 * 60 * 1000) {
-        prediction = 'ovulation';
-      } else if (dateTime >= fertileStart && dateTime <= fertileEnd) {
-        prediction = 'fertile';
-      }
-    }
-    
-    return {
-      cycle: cycleInfo,
-      symptoms: symptomInfo,
-      notes: noteInfo,
-      prediction
-    };
+    return monthGrid[toDateKey(date)] || null;
   };
 
   const getDayStyles = (date) => {
@@ -427,7 +417,7 @@ const CalendarView = () => {
                         Notes
                       </h4>
                       <p className="text-sm" style={{ color: colors.textSecondary }}>
-                        {info.notes.content}
+                        {notes.find(note => note.id === info.notes.ids[0])?.content || info.notes.preview}
                       </p>
                     </div>
                   )}
@@ -1,4 +1,4 @@
-import React from 'react';
+import React, { useState, useEffect } from 'react';
 import { TrendingUp, Calendar, Heart, MessageSquare, Droplets, Target } from 'lucide-react';
 import { useCycle } from '../contexts/CycleContext';
 import { useTheme } from '../contexts/ThemeContext';
@@ -6,60 +6,32 @@ import { Card, CardContent, CardHeader, CardTitle } from './ui/card';
 import { Badge } from './ui/badge';
 import { Progress } from './ui/progress';
 
+const REGULARITY_LABELS = {
+  regular: 'Regular',
+  somewhat_irregular: 'Somewhat Irregular',
+  irregular: 'Irregular'
+};
+
 const Insights = () => {
-  const { cycles, symptoms, notes, getPredictions } = useCycle();
+  const { cycles, symptoms, notes, getPredictions, fetchInsights } = useCycle();
   const { colors } = useTheme();
   const predictions = getPredictions();
+  const [stats, setStats] = useState(null);
 
-  const getInsights = () => {
-    if (cycles.length === 0) return null;
-
-    const sortedCycles = [...cycles].sort((a, b) => new Date(a.startDate) - new Date(b.startDate));
-    const totalCycles = cycles.length;
-    const avgCycleLength = cycles.reduce((sum, cycle) => sum + (cycle.length || 28), 0) / totalCycles;
-    
-    // Flow analysis
-    const flowCounts = cycles.reduce((acc, cycle) => {
-      acc[cycle.flow] = (acc[cycle.flow] || 0) + 1;
-      return acc;
-    }, {});
-    
-    const mostCommonFlow = Object.entries(flowCounts)
-      .sort(([,a], [,b]) => b - a)[0]?.[0] || 'medium';
-
-    // Symptom analysis
-    const allSymptoms = symptoms.flatMap(s => s.symptoms);
-    const symptomCounts = allSymptoms.reduce((acc, symptom) => {
-      acc[symptom] = (acc[symptom] || 0) + 1;
-      return acc;
-    }, {});
-    
-    const topSymptoms = Object.entries(symptomCounts)
-      .sort(([,a], [,b]) => b - a)
-      .slice(0, 3)
-      .map(([symptom, count]) => ({ symptom, count }));
-
-    // Cycle regularity
-    const cycleLengths = cycles.map(c => c.length || 28);
-    const minLength = Math.min(...cycleLengths);
-    const maxLength = Math.max(...cycleLengths);
-    const lengthVariation = maxLength - minLength;
-    
-    const regularity = lengthVariation <= 7 ? 'Regular' : lengthVariation <= 14 ? 'Somewhat Irregular' : 'Irregular';
-
-    return {
-      totalCycles,
-      avgCycleLength: Math.round(avgCycleLength),
-      mostCommonFlow,
-      topSymptoms,
-      regularity,
-      lengthVariation,
-      minLength,
-      maxLength
-    };
-  };
+  // Statistics are aggregated server-side; refetch whenever local data changes
+  useEffect(() => {
+    let cancelled = false;
+    fetchInsights({ top: 3 })
+      .then((data) => { if (!cancelled) setStats(data); })
+      .catch((error) => console.error('Error loading insights:', error));
+    return () => { cancelled = true; };
+  }, [cycles, symptoms, notes]);
 
-  const insights = getInsights();
+  const insights = stats && stats.totalCycles > 0 ? {
+    ...stats,
+    avgCycleLength: Math.round(stats.avgCycleLength),
+    regularity: REGULARITY_LABELS[stats.regularity]
+  } : null;
 
   if (!insights) {
     return (
@@ -178,8 +150,8 @@ const Insights = () => {
               </h4>
               <div className="space-y-2">
                 {['light', 'medium', 'heavy'].map(flow => {
-                  const count = cycles.filter(c => c.flow === flow).length;
-                  const percentage = (count / cycles.length) * 100;
+                  const count = insights.flowCounts[flow] || 0;
+                  const percentage = (count / insights.totalCycles) * 100;
                   return (
                     <div key={flow} className="flex items-center justify-between">
                       <span className="text-sm capitalize" style={{ color: colors.text }}>
@@ -246,7 +218,7 @@ const Insights = () => {
               </h4>
               <div className="text-center py-4">
                 <div className="text-3xl font-bold" style={{ color: colors.accent }}>
-                  {symptoms.length}
+                  {insights.symptomEntries}
                 </div>
                 <div className="text-sm" style={{ color: colors.textSecondary }}>
                   Total symptom entries
@@ -326,24 +298,24 @@ const Insights = () => {
           <CardContent>
             <div className="text-center py-4">
               <div className="text-3xl font-bold mb-2" style={{ color: colors.accent }}>
-                {notes.length}
+                {insights.noteCount}
               </div>
               <div className="text-sm" style={{ color: colors.textSecondary }}>
                 Total notes written
               </div>
             </div>
             
-            {notes.length > 0 && (
+            {insights.latestNote && (
               <div className="mt-4">
                 <h4 className="font-semibold mb-2" style={{ color: colors.text }}>
                   Recent Note
                 </h4>
                 <div className="p-3 rounded-lg" style={{ backgroundColor: colors.background }}>
                   <p className="text-sm" style={{ color: colors.textSecondary }}>
-                    {notes[notes.length - 1]?.content}
+                    {insights.latestNote.content}
                   </p>
                   <p className="text-xs mt-2" style={{ color: colors.textSecondary }}>
-                    {new Date(notes[notes.length - 1]?.date).toLocaleDateString()}
+                    {new Date(insights.latestNote.date).toLocaleDateString()}
                   </p>
                 </div>
               </div>
@@ -1,10 +1,12 @@
 import React, { useState, useEffect } from 'react';
-import { Palette, Bell, Shield, Download, Trash2, Globe, Smartphone } from 'lucide-react';
+import { Palette, Bell, Shield, Download, Trash2, Globe, Smartphone, KeyRound } from 'lucide-react';
 import { useTheme } from '../contexts/ThemeContext';
-import { useCycle } from '../contexts/CycleContext';
+import { useCycle, clearStoredRecords } from '../contexts/CycleContext';
 import { useLanguage } from '../contexts/LanguageContext';
+import { clearAuthToken, getAuthToken, getCurrentUserId, setAuthToken } from '../lib/auth';
 import { Card, CardContent, CardHeader, CardTitle } from './ui/card';
 import { Button } from './ui/button';
+import { Input } from './ui/input';
 import { Switch } from './ui/switch';
 import { Label } from './ui/label';
 import { Badge } from './ui/badge';
@@ -22,6 +24,8 @@ const Settings = () => {
     fertileWindow: false,
     dailyCheck: false
   });
+  const [authToken, setAuthTokenInput] = useState('');
+  const signedIn = Boolean(getAuthToken());
 
   // Load notification preferences from backend
   useEffect(() => {
@@ -80,10 +84,22 @@ const Settings = () => {
     toast.success(t('dataExportedSuccess'));
   };
 
+  // Every context loads its data for the new user on the reload
+  const signIn = () => {
+    if (!authToken.trim()) {
+      return;
+    }
+    setAuthToken(authToken);
+    window.location.reload();
+  };
+
+  const signOut = () => {
+    clearAuthToken();
+    window.location.reload();
+  };
+
   const clearAllData = () => {
-    localStorage.removeItem('cycleTracker_cycles');
-    localStorage.removeItem('cycleTracker_symptoms');
-    localStorage.removeItem('cycleTracker_notes');
+    clearStoredRecords();
     localStorage.removeItem('cycleTracker_theme');
     localStorage.removeItem('cycleTracker_language');
     toast.success(t('allDataCleared'));
@@ -102,6 +118,45 @@ const Settings = () => {
       </div>
 
       <div className="space-y-6">
+        {/* Account */}
+        <Card className="shadow-xl border-0" style={{ backgroundColor: colors.surface }}>
+          <CardHeader>
+            <CardTitle className="flex items-center gap-2" style={{ color: colors.text }}>
+              <KeyRound size={20} />
+              {t('account')}
+            </CardTitle>
+          </CardHeader>
+          <CardContent className="space-y-3">
+            <p className="text-sm" style={{ color: colors.textSecondary }}>
+              {signedIn ? `${t('signedInAs')} ${getCurrentUserId()}` : t('notSignedIn')}
+            </p>
+            <div>
+              <Label htmlFor="auth-token" className="text-base font-medium" style={{ color: colors.text }}>
+                {t('accessToken')}
+              </Label>
+              <Input
+                id="auth-token"
+                type="password"
+                value={authToken}
+                onChange={(e) => setAuthTokenInput(e.target.value)}
+                placeholder={t('accessTokenPlaceholder')}
+                className="mt-2"
+                style={{ borderColor: colors.accent }}
+              />
+            </div>
+            <div className="flex gap-2">
+              <Button onClick={signIn} disabled={!authToken.trim()} style={{ backgroundColor: colors.primary }}>
+                {t('signIn')}
+              </Button>
+              {signedIn && (
+                <Button variant="outline" onClick={signOut}>
+                  {t('signOut')}
+                </Button>
+              )}
+            </div>
+          </CardContent>
+        </Card>
+
         {/* Language Settings */}
         <Card className="shadow-xl border-0" style={{ backgroundColor: colors.surface }}>
           <CardHeader>
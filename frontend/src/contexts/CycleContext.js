@@ -1,11 +1,77 @@
-import React, { createContext, useContext, useState, useEffect } from 'react';
+import React, { createContext, useContext, useState, useEffect, useMemo } from 'react';
 import axios from 'axios';
+import { getCurrentUserId } from '../lib/auth';
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 const API = `${BACKEND_URL}/api`;
 
 const CycleContext = createContext();
 
+// Local copy of the data, refreshed incrementally through /sync. Each user
+// has their own keys, so accounts sharing a browser never see each other's records.
+const RECORD_TYPES = ['cycles', 'symptoms', 'notes'];
+const storageKey = (name, userId = getCurrentUserId()) => `cycleTracker_${userId}_${name}`;
+
+// Unkeyed copies left by earlier versions: their owner is unknown, so they are dropped
+const LEGACY_KEYS = ['cycleTracker_cycles', 'cycleTracker_symptoms', 'cycleTracker_notes', 'cycleTracker_syncToken'];
+
+const readStored = () => {
+  const data = {};
+  RECORD_TYPES.forEach(name => {
+    const saved = localStorage.getItem(storageKey(name));
+    data[name] = saved ? JSON.parse(saved) : [];
+  });
+  return data;
+};
+
+// Forget the signed-in user's local copy; the next load does a full sync
+export const clearStoredRecords = () => {
+  [...RECORD_TYPES, 'syncToken'].forEach(name => localStorage.removeItem(storageKey(name)));
+  LEGACY_KEYS.forEach(key => localStorage.removeItem(key));
+};
+
+// Upsert changed records by id and drop deleted ones, newest first
+const applyChanges = (records, { upserted, deleted }) => {
+  const byId = new Map(records.map(record => [record.id, record]));
+  upserted.forEach(record => byId.set(record.id, record));
+  deleted.forEach(id => byId.delete(id));
+  return [...byId.values()].sort((a, b) => new Date(b.createdAt) - new Date(a.createdAt));
+};
+
+const syncFromServer = async () => {
+  LEGACY_KEYS.forEach(key => localStorage.removeItem(key));
+  const userId = getCurrentUserId();
+  let token = localStorage.getItem(storageKey('syncToken', userId));
+  let data = token ? readStored() : { cycles: [], symptoms: [], notes: [] };
+  let hasMore = true;
+
+  while (hasMore) {
+    let response;
+    try {
+      response = await axios.get(`${API}/sync`, { params: token ? { since: token } : {} });
+    } catch (error) {
+      // Expired or unreadable token: start over with a full sync
+      if (token && [400, 410].includes(error.response?.status)) {
+        token = null;
+        data = { cycles: [], symptoms: [], notes: [] };
+        continue;
+      }
+      throw error;
+    }
+    RECORD_TYPES.forEach(name => {
+      data[name] = applyChanges(data[name], response.data[name]);
+    });
+    token = response.data.next;
+    hasMore = response.data.hasMore;
+  }
+
+  RECORD_TYPES.forEach(name => {
+    localStorage.setItem(storageKey(name, userId), JSON.stringify(data[name]));
+  });
+  localStorage.setItem(storageKey('syncToken', userId), token);
+  return data;
+};
+
 export const useCycle = () => {
   const context = useContext(CycleContext);
   if (!context) {
@@ -18,9 +84,19 @@ export const CycleProvider = ({ children }) => {
   const [cycles, setCycles] = useState([]);
   const [symptoms, setSymptoms] = useState([]);
   const [notes, setNotes] = useState([]);
+  const [predictions, setPredictions] = useState(null);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
 
+  const loadPredictions = async () => {
+    try {
+      const response = await axios.get(`${API}/predictions`);
+      setPredictions(response.data);
+    } catch (error) {
+      console.error('Error loading predictions:', error);
+    }
+  };
+
   // Load data from API
   useEffect(() => {
     const loadData = async () => {
@@ -28,28 +104,22 @@ export const CycleProvider = ({ children }) => {
         setLoading(true);
         setError(null);
         
-        // Fetch all data concurrently
-        const [cyclesResponse, symptomsResponse, notesResponse] = await Promise.all([
-          axios.get(`${API}/cycles`),
-          axios.get(`${API}/symptoms`),
-          axios.get(`${API}/notes`)
-        ]);
-
-        setCycles(cyclesResponse.data);
-        setSymptoms(symptomsResponse.data);
-        setNotes(notesResponse.data);
+        // Only changes since the last visit are transferred
+        const data = await syncFromServer();
+
+        setCycles(data.cycles);
+        setSymptoms(data.symptoms);
+        setNotes(data.notes);
+        await loadPredictions();
       } catch (error) {
         console.error('Error loading data:', error);
         setError('Failed to load data');
         
-        // Fallback to localStorage if API fails
-        const savedCycles = localStorage.getItem('cycleTracker_cycles');
-        const savedSymptoms = localStorage.getItem('cycleTracker_symptoms');
-        const savedNotes = localStorage.getItem('cycleTracker_notes');
-
-        if (savedCycles) setCycles(JSON.parse(savedCycles));
-        if (savedSymptoms) setSymptoms(JSON.parse(savedSymptoms));
-        if (savedNotes) setNotes(JSON.parse(savedNotes));
+        // Fallback to this user's local copy if the API fails
+        const saved = readStored();
+        setCycles(saved.cycles);
+        setSymptoms(saved.symptoms);
+        setNotes(saved.notes);
       } finally {
         setLoading(false);
       }
@@ -62,6 +132,7 @@ export const CycleProvider = ({ children }) => {
     try {
       const response = await axios.post(`${API}/cycles`, cycleData);
       setCycles(prev => [response.data, ...prev]);
+      loadPredictions();
       return response.data;
     } catch (error) {
       console.error('Error adding cycle:', error);
@@ -75,6 +146,7 @@ export const CycleProvider = ({ children }) => {
       setCycles(prev => prev.map(cycle => 
         cycle.id === id ? response.data : cycle
       ));
+      loadPredictions();
       return response.data;
     } catch (error) {
       console.error('Error updating cycle:', error);
@@ -86,6 +158,7 @@ export const CycleProvider = ({ children }) => {
     try {
       await axios.delete(`${API}/cycles/${id}`);
       setCycles(prev => prev.filter(cycle => cycle.id !== id));
+      loadPredictions();
     } catch (error) {
       console.error('Error deleting cycle:', error);
       throw new Error('Failed to delete cycle');
@@ -134,34 +207,37 @@ export const CycleProvider = ({ children }) => {
     }
   };
 
-  const getPredictions = () => {
-    if (cycles.length === 0) return null;
-
-    const sortedCycles = [...cycles].sort((a, b) => new Date(a.startDate) - new Date(b.startDate));
-    const lastCycle = sortedCycles[sortedCycles.length - 1];
-    
-    // Calculate average cycle length
-    const avgCycleLength = cycles.reduce((sum, cycle) => sum + (cycle.length || 28), 0) / cycles.length;
-    
-    const nextPeriodDate = new Date(lastCycle.startDate);
-    nextPeriodDate.setDate(nextPeriodDate.getDate() + Math.round(avgCycleLength));
-    
-    const ovulationDate = new Date(nextPeriodDate);
-    ovulationDate.setDate(ovulationDate.getDate() - 14);
-    
-    const fertileStart = new Date(ovulationDate);
-    fertileStart.setDate(fertileStart.getDate() - 5);
-    
-    const fertileEnd = new Date(ovulationDate);
-    fertileEnd.setDate(fertileEnd.getDate() + 1);
+  // Per-day summary of one month (YYYY-MM), materialized by the backend
+  const fetchCalendarMonth = async (month) => {
+    const response = await axios.get(`${API}/calendar`, { params: { month } });
+    return response.data;
+  };
+
+  // Aggregated statistics for the insight cards, computed by the backend
+  const fetchInsights = async (params = {}) => {
+    const response = await axios.get(`${API}/insights`, { params });
+    return response.data;
+  };
 
+  // Predictions are computed server-side; convert the ISO dates once per change
+  const parsedPredictions = useMemo(() => {
+    if (!predictions) return null;
     return {
-      nextPeriod: nextPeriodDate,
-      ovulation: ovulationDate,
-      fertileWindow: { start: fertileStart, end: fertileEnd },
-      avgCycleLength: Math.round(avgCycleLength)
+      ...predictions,
+      nextPeriod: new Date(predictions.nextPeriod),
+      nextPeriodRange: {
+        start: new Date(predictions.nextPeriodRange.start),
+        end: new Date(predictions.nextPeriodRange.end)
+      },
+      ovulation: new Date(predictions.ovulation),
+      fertileWindow: {
+        start: new Date(predictions.fertileWindow.start),
+        end: new Date(predictions.fertileWindow.end)
+      }
     };
-  };
+  }, [predictions]);
+
+  const getPredictions = () => parsedPredictions;
 
   const value = {
     cycles,
@@ -176,7 +252,9 @@ export const CycleProvider = ({ children }) => {
     deleteSymptom,
     addNote,
     deleteNote,
-    getPredictions
+    getPredictions,
+    fetchCalendarMonth,
+    fetchInsights
   };
 
   return (
@@ -157,6 +157,15 @@ const translations = {
     exportData: 'Export Data',
     clearAllData: 'Clear All Data',
     
+    // Account
+    account: 'Account',
+    signedInAs: 'Signed in as',
+    notSignedIn: 'Not signed in. Paste the access token issued for your account.',
+    accessToken: 'Access token',
+    accessTokenPlaceholder: 'Paste your access token',
+    signIn: 'Sign in',
+    signOut: 'Sign out',
+
     // Language
     language: 'Language',
     selectLanguage: 'Select Language',
@@ -367,6 +376,15 @@ const translations = {
     exportData: 'Exporter les Données',
     clearAllData: 'Effacer Toutes les Données',
     
+    // Account
+    account: 'Compte',
+    signedInAs: 'Connecté en tant que',
+    notSignedIn: "Non connecté. Collez le jeton d'accès délivré pour votre compte.",
+    accessToken: "Jeton d'accès",
+    accessTokenPlaceholder: "Collez votre jeton d'accès",
+    signIn: 'Se connecter',
+    signOut: 'Se déconnecter',
+
     // Language
     language: 'Langue',
     selectLanguage: 'Sélectionner la Langue',
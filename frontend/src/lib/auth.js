@@ -0,0 +1,32 @@
+// Bearer token sent with every API request (see index.js). It is the one
+// saved from Settings, or else REACT_APP_AUTH_TOKEN from the build
+// environment, for single-user and development deployments. The backend
+// verifies it; without one, requests get 401 unless the backend sets
+// DEFAULT_USER_ID (development only).
+const AUTH_TOKEN_KEY = 'cycleTracker_authToken';
+
+export const getAuthToken = () =>
+  localStorage.getItem(AUTH_TOKEN_KEY) || process.env.REACT_APP_AUTH_TOKEN || null;
+
+export const setAuthToken = (token) => {
+  localStorage.setItem(AUTH_TOKEN_KEY, token.trim());
+};
+
+export const clearAuthToken = () => {
+  localStorage.removeItem(AUTH_TOKEN_KEY);
+};
+
+// The token's subject, used to keep each user's local data apart. The
+// signature is not checked here: the backend does that on every request.
+export const getCurrentUserId = () => {
+  const token = getAuthToken();
+  if (!token) {
+    return 'anonymous';
+  }
+  try {
+    const payload = token.split('.')[1].replace(/-/g, '+').replace(/_/g, '/');
+    return JSON.parse(atob(payload)).sub || 'anonymous';
+  } catch (error) {
+    return 'anonymous';
+  }
+};
@@ -0,0 +1,73 @@
+"""Shared fixtures: the backend on mongomock-motor, served in-process.
+
+Like benchmarks/load_test.py, the app runs on an ASGI transport (no network,
+no uvicorn) against an in-memory Mongo stand-in, so the suite needs neither
+a mongod nor a deployed backend.
+"""
+import asyncio
+import os
+import sys
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+# Configure the app before it is imported
+JWT_SECRET = "test-secret-test-secret-test-secret"
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ["DB_NAME"] = "test_suite"
+os.environ["JWT_SECRET"] = JWT_SECRET
+os.environ["INDEX_MODE"] = "off"
+os.environ["RATE_LIMIT_RPS"] = "0"
+os.environ["REMINDER_SINK"] = "none"
+os.environ.pop("DEFAULT_USER_ID", None)
+
+import httpx  # noqa: E402
+import jwt  # noqa: E402
+from mongomock_motor import AsyncMongoMockClient  # noqa: E402
+
+import server  # noqa: E402
+
+
+@pytest.fixture
+def mongo():
+    return AsyncMongoMockClient()
+
+
+@pytest.fixture
+def db(mongo):
+    return mongo[os.environ["DB_NAME"]]
+
+
+@pytest.fixture
+def auth():
+    """Headers authenticating as a user: ``auth("alice")``."""
+    def headers(user_id: str) -> dict:
+        return {"Authorization": f"Bearer {jwt.encode({'sub': user_id}, JWT_SECRET)}"}
+    return headers
+
+
+@pytest.fixture
+def app(mongo, db):
+    """The app over ``db``, with empty caches: ``async with app() as client``."""
+    server.client = mongo
+    server.db = server.list_db = server.InstrumentedDatabase(db)
+    server._predictors.clear()
+    server._predictor_loads.clear()
+    server._predictor_writes.clear()
+    server.calendar_cache.clear()
+    server.response_cache.clear()
+    asyncio.run(server.record_cache.clear())
+
+    @asynccontextmanager
+    async def serve():
+        async with server.app.router.lifespan_context(server.app):
+            transport = httpx.ASGITransport(app=server.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                yield client
+
+    yield serve
+    server.client = server.db = server.list_db = None
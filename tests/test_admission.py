@@ -0,0 +1,72 @@
+import asyncio
+
+import httpx
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+from admission import AdmissionConfig, AdmissionMiddleware, TokenBuckets
+
+
+def test_token_bucket_refills_at_rate_up_to_burst():
+    buckets = TokenBuckets(rate=2, burst=4)
+    assert [buckets.take("a", now=0.0) for _ in range(4)] == [0, 0, 0, 0]
+    assert buckets.take("a", now=0.0) == 0.5
+    # Half a second buys one token back; other keys have their own bucket
+    assert buckets.take("a", now=0.5) == 0
+    assert buckets.take("b", now=0.5) == 0
+    # A long idle period refills to the burst, not beyond
+    assert [buckets.take("a", now=100.0) for _ in range(5)] == [0, 0, 0, 0, 0.5]
+    # Costs above the burst are capped, so they can still be served
+    assert buckets.take("c", cost=10, now=0.0) == 0
+
+
+def _app(config: AdmissionConfig, endpoint) -> httpx.AsyncClient:
+    inner = Starlette(routes=[Route("/api/ping", endpoint)])
+    app = AdmissionMiddleware(inner, inner.routes, lambda scope: "client", config)
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+
+def test_empty_bucket_gets_429_with_retry_after():
+    async def ping(request):
+        return PlainTextResponse("pong")
+
+    async def main():
+        async with _app(AdmissionConfig(rate=1, burst=2, max_concurrency=0), ping) as client:
+            statuses = [(await client.get("/api/ping")).status_code for _ in range(2)]
+            rejected = await client.get("/api/ping")
+            assert statuses == [200, 200]
+            assert rejected.status_code == 429
+            assert rejected.headers["retry-after"] == "1"
+
+    asyncio.run(main())
+
+
+def test_overload_is_shed_with_503():
+    release = asyncio.Event()
+
+    async def slow(request):
+        await release.wait()
+        return PlainTextResponse("done")
+
+    async def main():
+        config = AdmissionConfig(rate=0, max_concurrency=1, queue_size=1, max_wait=0.05)
+        async with _app(config, slow) as client:
+            held = asyncio.ensure_future(client.get("/api/ping"))
+            await asyncio.sleep(0.01)
+            queued = asyncio.ensure_future(client.get("/api/ping"))
+            await asyncio.sleep(0.01)
+            # The queue is full: shed at once
+            full = await client.get("/api/ping")
+            # The queued request waits max_wait for the slot, then is shed too
+            timed_out = await queued
+            release.set()
+            served = await held
+
+            assert (full.status_code, timed_out.status_code, served.status_code) == (503, 503, 200)
+            assert full.headers["retry-after"] == "1"
+
+            # The slot is free again
+            assert (await client.get("/api/ping")).status_code == 200
+
+    asyncio.run(main())
@@ -0,0 +1,47 @@
+import asyncio
+
+from batch import load_checkpoint, run_derive, save_checkpoint
+from derived import iter_user_ids, load_fresh, mark_stale
+
+
+async def _seed(db):
+    await db.cycles.insert_many([{"id": f"c-{user}", "userId": user, "startDate": "2024-01-01"}
+                                 for user in ["carol", "alice", "carol"]])
+    await db.symptoms.insert_many([{"id": f"s-{user}", "userId": user, "date": "2024-01-02", "symptoms": ["cramps"]}
+                                   for user in ["bob", "alice"]])
+    await db.notes.insert_one({"id": "n-dave", "userId": "dave", "date": "2024-01-03", "content": "x"})
+
+
+def test_user_ids_are_merged_across_collections_in_pages(db):
+    async def main():
+        await _seed(db)
+        pages = [page async for page in iter_user_ids(db, page_size=3)]
+        assert pages == [["alice", "bob", "carol"], ["dave"]]
+        assert [page async for page in iter_user_ids(db, after="bob")] == [["carol", "dave"]]
+
+    asyncio.run(main())
+
+
+def test_derive_resumes_after_the_checkpoint_and_goes_stale_on_writes(db):
+    async def main():
+        await _seed(db)
+        # A run that stopped after bob
+        await save_checkpoint(db, status="running", lastUserId="bob", processed=2, failed=0)
+
+        summary = await run_derive(db, page_size=1)
+        assert (summary["processed"], summary["failed"]) == (4, 0)
+        assert (await load_checkpoint(db))["status"] == "completed"
+        assert await load_fresh(db, "alice") is None
+        carol = await load_fresh(db, "carol")
+        assert carol["predictions"]["nextPeriod"] == "2024-01-29"
+        assert carol["insights"]["totalCycles"] == 2
+
+        await mark_stale(db, "carol")
+        assert await load_fresh(db, "carol") is None
+
+        # A completed run starts over
+        summary = await run_derive(db)
+        assert summary["processed"] == 4
+        assert await load_fresh(db, "alice") is not None
+
+    asyncio.run(main())
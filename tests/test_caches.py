@@ -0,0 +1,51 @@
+import asyncio
+
+import server
+from record_cache import MemoryStore, RecordCache
+
+
+def test_load_overtaken_by_a_write_is_not_stored():
+    async def main():
+        cache = RecordCache(MemoryStore())
+        loading = asyncio.Event()
+        release = asyncio.Event()
+
+        async def slow_load():
+            loading.set()
+            await release.wait()
+            return {"theme": "old"}
+
+        read = asyncio.ensure_future(cache.get_or_load("preferences:alice", slow_load))
+        await loading.wait()
+        await cache.invalidate("preferences:alice")
+        release.set()
+
+        # The slow read returns what it read, but does not cache it over the write
+        assert await read == {"theme": "old"}
+
+        async def load_written():
+            return {"theme": "new"}
+        assert await cache.get_or_load("preferences:alice", load_written) == {"theme": "new"}
+
+    asyncio.run(main())
+
+
+def test_remote_change_drops_what_this_worker_cached(app, auth):
+    async def main():
+        async with app() as client:
+            headers = auth("alice")
+            cycle = (await client.post("/api/cycles", json={"startDate": "2024-01-01"}, headers=headers)).json()
+            await client.get(f"/api/cycles/{cycle['id']}", headers=headers)
+            await client.get("/api/predictions", headers=headers)
+            etag = (await client.get("/api/cycles", headers=headers)).headers["etag"]
+            assert "alice" in server._predictors
+
+            # Another worker wrote a cycle of alice
+            server.apply_remote_change({"userId": "alice", "collection": "cycles", "ids": [cycle["id"]],
+                                        "months": ["2024-01"]})
+            assert "alice" not in server._predictors
+            assert await server.record_cache.store.get(server.record_key("cycles", "alice", cycle["id"])) is None
+            response = await client.get("/api/cycles", headers={**headers, "If-None-Match": etag})
+            assert response.status_code == 200
+
+    asyncio.run(main())
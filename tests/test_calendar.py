@@ -0,0 +1,29 @@
+import asyncio
+
+import server
+
+
+def _flags(grid: dict) -> dict:
+    return {day["date"]: day["prediction"] for day in grid["days"] if day["prediction"]}
+
+
+def test_cycle_write_after_predictor_eviction_refreshes_prediction_flags(app, auth, monkeypatch):
+    monkeypatch.setattr(server, "MAX_CACHED_PREDICTORS", 1)
+
+    async def main():
+        async with app() as client:
+            alice, bob = auth("alice"), auth("bob")
+            await client.post("/api/cycles", json={"startDate": "2024-01-01"}, headers=alice)
+            january = (await client.get("/api/calendar", params={"month": "2024-01"}, headers=alice)).json()
+            assert _flags(january)["2024-01-29"] == "period"
+
+            # Bob's request evicts alice's predictor; her January grid stays cached
+            await client.get("/api/predictions", headers=bob)
+            assert "alice" not in server._predictors
+
+            await client.post("/api/cycles", json={"startDate": "2024-02-05"}, headers=alice)
+            assert (await client.get("/api/predictions", headers=alice)).json()["nextPeriod"] == "2024-03-11"
+            january = (await client.get("/api/calendar", params={"month": "2024-01"}, headers=alice)).json()
+            assert _flags(january) == {}
+
+    asyncio.run(main())
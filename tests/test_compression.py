@@ -0,0 +1,46 @@
+import asyncio
+
+from compression import negotiate
+
+
+def test_negotiate_follows_q_values():
+    assert negotiate("gzip, br", ["br", "gzip"]) == "br"
+    assert negotiate("br;q=0.5, gzip", ["br", "gzip"]) == "gzip"
+    assert negotiate("gzip;q=0, *", ["gzip"]) is None
+    assert negotiate("*;q=0.1", ["gzip"]) == "gzip"
+    assert negotiate("identity", ["br", "gzip"]) is None
+
+
+def test_304_carries_the_validators_of_the_200(app, auth):
+    async def main():
+        async with app() as client:
+            headers = auth("alice")
+            for day in range(1, 29):
+                await client.post("/api/notes", json={"date": f"2024-02-{day:02d}", "content": "x" * 80},
+                                  headers=headers)
+
+            for encoding in ["gzip", "identity"]:
+                request_headers = {**headers, "Accept-Encoding": encoding}
+                full = await client.get("/api/notes", headers=request_headers)
+                assert full.status_code == 200
+                assert full.headers["etag"].startswith("W/")
+                assert full.headers["vary"] == "Accept-Encoding"
+                assert full.headers.get("content-encoding") == (encoding if encoding == "gzip" else None)
+
+                cached = await client.get("/api/notes", headers={**request_headers, "If-None-Match": full.headers["etag"]})
+                assert cached.status_code == 304
+                assert cached.headers["etag"] == full.headers["etag"]
+                assert cached.headers["vary"] == "Accept-Encoding"
+
+    asyncio.run(main())
+
+
+def test_small_bodies_are_not_compressed(app, auth):
+    async def main():
+        async with app() as client:
+            response = await client.get("/api/cycles", headers={**auth("alice"), "Accept-Encoding": "gzip"})
+            assert response.status_code == 200
+            assert "content-encoding" not in response.headers
+
+    asyncio.run(main())
+
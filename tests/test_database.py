@@ -0,0 +1,41 @@
+import asyncio
+
+import pytest
+
+import server
+from database import pool_options, read_preference
+from metrics import InstrumentedDatabase
+
+
+def test_pool_options_come_from_the_environment():
+    assert pool_options({}) == {}
+    assert pool_options({"MONGO_MAX_POOL_SIZE": "50", "MONGO_WAIT_QUEUE_TIMEOUT_MS": "",
+                         "MONGO_COMPRESSORS": "zstd, snappy"}) == {"maxPoolSize": 50, "compressors": ["zstd", "snappy"]}
+
+
+def test_read_preference_is_bounded_by_staleness():
+    assert read_preference(None) is None and read_preference("Primary") is None
+    assert read_preference("secondaryPreferred", 90).document == {"mode": "secondaryPreferred",
+                                                                  "maxStalenessSeconds": 90}
+    with pytest.raises(ValueError):
+        read_preference("fastest")
+
+
+def test_lists_read_the_primary_while_a_secondary_may_lag(app, auth, mongo, monkeypatch):
+    async def main():
+        async with app() as client:
+            # A secondary that has not replicated anything yet
+            server.list_db = InstrumentedDatabase(mongo["lagging_secondary"])
+            headers = auth("alice")
+            await client.post("/api/cycles", json={"startDate": "2024-01-01"}, headers=headers)
+
+            fresh = await client.get("/api/cycles", headers=headers)
+            assert len(fresh.json()["items"]) == 1
+
+            # Once no write is recent enough to be missing, the secondary serves the list
+            monkeypatch.setattr(server, "LIST_MAX_STALENESS", 0)
+            assert server.list_reads("alice", ("cycles",)) is server.list_db
+            lagging = await client.get("/api/cycles", params={"limit": 10}, headers=headers)
+            assert lagging.json()["items"] == []
+
+    asyncio.run(main())
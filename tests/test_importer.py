@@ -0,0 +1,67 @@
+import asyncio
+import json
+
+from importer import ImportJob, run_import
+from server import COLLECTIONS, Cycle
+
+
+def _upload(tmp_path, rows) -> str:
+    path = tmp_path / "upload.ndjson"
+    path.write_text("\n".join(json.dumps(row) for row in rows))
+    return str(path)
+
+
+async def _import(db, user_id: str, path: str) -> ImportJob:
+    job = ImportJob(user_id, "ndjson", 1, 500)
+    await run_import(db, job, path, COLLECTIONS, lambda collection, docs: None)
+    return job
+
+
+def test_import_restores_another_users_export(db, tmp_path):
+    rows = [{"type": "cycle", "data": {"id": f"cycle-{i}", "startDate": day}}
+            for i, day in enumerate(["2024-01-01", "2024-01-29"])]
+
+    async def main():
+        await db.cycles.insert_many([Cycle(userId="alice", id=row["data"]["id"],
+                                           startDate=row["data"]["startDate"]).model_dump() for row in rows])
+
+        job = await _import(db, "bob", _upload(tmp_path, rows))
+        assert (job.inserted, job.duplicates) == (2, 0)
+        bob = await db.cycles.find({"userId": "bob"}).to_list(None)
+        # Ids are unique across users, so bob's copies get new ones
+        assert len(bob) == 2 and not {doc["id"] for doc in bob} & {"cycle-0", "cycle-1"}
+
+        # Importing again is a no-op for both users
+        job = await _import(db, "bob", _upload(tmp_path, rows))
+        assert (job.inserted, job.duplicates) == (0, 2)
+        job = await _import(db, "alice", _upload(tmp_path, rows))
+        assert (job.inserted, job.duplicates) == (0, 2)
+        assert await db.cycles.count_documents({}) == 4
+
+    asyncio.run(main())
+
+
+def test_import_reports_rows_in_batches(db, tmp_path):
+    rows = [{"type": "note", "date": f"2024-01-{day:02d}", "content": f"note {day}"} for day in range(1, 6)]
+    rows.append({"type": "note", "date": "2024-01-01", "content": "note 1"})
+    batches = []
+
+    async def main():
+        job = ImportJob("alice", "ndjson", 1, 2)
+        await run_import(db, job, _upload(tmp_path, rows), COLLECTIONS,
+                         lambda collection, docs: batches.append((collection, len(docs))))
+        assert (job.inserted, job.duplicates, job.status) == (5, 1, "completed")
+
+    asyncio.run(main())
+    assert batches == [("notes", 2), ("notes", 2), ("notes", 1)]
+
+
+def test_repeated_long_notes_in_one_upload_are_duplicates(db, tmp_path):
+    text = "x" * 100_000
+    rows = [{"type": "note", "date": "2024-01-01", "content": content} for content in [text, text, text + "y"]]
+
+    async def main():
+        job = await _import(db, "alice", _upload(tmp_path, rows))
+        assert (job.inserted, job.duplicates) == (2, 1)
+
+    asyncio.run(main())
@@ -0,0 +1,57 @@
+import asyncio
+
+from pymongo import ASCENDING, IndexModel
+
+import indexes
+from indexes import INDEXES, ensure_indexes
+
+
+def _without_text_indexes(monkeypatch):
+    # mongomock does not report text indexes the way MongoDB does; see the next test for those
+    monkeypatch.setattr(indexes, "INDEXES", {name: wanted for name, wanted in INDEXES.items() if name != "notes"})
+
+
+def test_missing_indexes_are_created_once(db, monkeypatch):
+    _without_text_indexes(monkeypatch)
+
+    async def main():
+        report = await ensure_indexes(db)
+        assert "cycles.createdAt_desc" in report["created"] and "tombstones.deletedAt_ttl" in report["created"]
+        assert report["rebuilt"] == report["missing"] == []
+
+        again = await ensure_indexes(db, check_only=True)
+        assert again == {"created": [], "rebuilt": [], "missing": [], "unmanaged": []}
+
+    asyncio.run(main())
+
+
+def test_changed_definitions_are_rebuilt_and_extras_reported(db, monkeypatch):
+    _without_text_indexes(monkeypatch)
+
+    async def main():
+        await db.cycles.create_indexes([IndexModel([("startDate", ASCENDING)], name="startDate"),
+                                        IndexModel([("flow", ASCENDING)], name="legacy_flow")])
+
+        check = await ensure_indexes(db, check_only=True)
+        assert "cycles.startDate" in check["missing"]
+        assert check["unmanaged"] == ["cycles.legacy_flow"]
+        # Check-only leaves the database alone
+        assert list((await db.cycles.index_information())["startDate"]["key"]) == [("startDate", 1)]
+
+        report = await ensure_indexes(db)
+        assert report["rebuilt"] == ["cycles.startDate"]
+        assert list((await db.cycles.index_information())["startDate"]["key"]) == [("userId", 1), ("startDate", 1)]
+
+    asyncio.run(main())
+
+
+def test_text_index_matches_as_the_server_reports_it():
+    wanted = next(index for index in INDEXES["notes"] if index.document["name"] == "content_text")
+    reported = {
+        "key": [("userId", 1.0), ("_fts", "text"), ("_ftsx", 1)],
+        "weights": {"content": 1},
+        "default_language": "english",
+    }
+    assert indexes._matches(reported, wanted)
+    assert not indexes._matches({**reported, "default_language": "none"}, wanted)
+    assert not indexes._matches({**reported, "weights": {"title": 1}}, wanted)
@@ -0,0 +1,38 @@
+import asyncio
+
+from metrics import Histogram, Registry
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = Registry()
+    histogram = registry.register(Histogram("op_seconds", "Op latency", ("op",), buckets=(0.1, 1.0)))
+    for value in [0.05, 0.5, 0.5, 3.0]:
+        histogram.observe(value, "find")
+
+    assert registry.render().splitlines() == [
+        "# HELP op_seconds Op latency",
+        "# TYPE op_seconds histogram",
+        'op_seconds_bucket{op="find",le="0.1"} 1',
+        'op_seconds_bucket{op="find",le="1"} 3',
+        'op_seconds_bucket{op="find",le="+Inf"} 4',
+        'op_seconds_sum{op="find"} 4.05',
+        'op_seconds_count{op="find"} 4',
+    ]
+
+
+def test_requests_are_labelled_by_route_template(app, auth):
+    async def main():
+        async with app() as client:
+            headers = auth("alice")
+            cycle = (await client.post("/api/cycles", json={"startDate": "2024-01-01"}, headers=headers)).json()
+            assert (await client.get(f"/api/cycles/{cycle['id']}", headers=headers)).status_code == 200
+            await client.get("/no/such/path")
+
+            text = (await client.get("/metrics")).text
+            assert 'http_request_duration_seconds_count{method="GET",route="/api/cycles/{cycle_id}",status="200"}' in text
+            assert cycle["id"] not in text
+            assert 'route="<unmatched>",status="404"' in text
+            assert 'mongo_operation_duration_seconds_count{collection="cycles",operation="insert_one"}' in text
+            assert 'serialization_duration_seconds_count{stage=' in text
+
+    asyncio.run(main())
@@ -0,0 +1,70 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+import migrations
+from migrations import LowercaseTags, NativeDates, is_applied, run_migration
+
+
+class Interrupted(Exception):
+    pass
+
+
+def test_interrupted_migration_resumes_from_its_checkpoint(db, monkeypatch):
+    save = migrations._save
+
+    async def crash_after_first_checkpoint(db, migration, **fields):
+        await save(db, migration, **fields)
+        if fields.get("positions"):
+            raise Interrupted()
+
+    async def main():
+        await db.notes.insert_many([
+            {"id": f"note-{day}", "userId": "alice", "date": f"2024-01-{day:02d}", "content": "x"}
+            for day in range(1, 6)
+        ])
+
+        monkeypatch.setattr(migrations, "_save", crash_after_first_checkpoint)
+        with pytest.raises(Interrupted):
+            await run_migration(db, NativeDates(), batch_size=2)
+        monkeypatch.setattr(migrations, "_save", save)
+
+        state = await db[migrations.COLLECTION].find_one({"_id": "native_dates"})
+        assert state["status"] == "running" and state["migrated"] == 2
+        assert not await is_applied(db, "native_dates")
+
+        result = await run_migration(db, NativeDates(), batch_size=2)
+        # The counters carry on from the checkpoint instead of restarting
+        assert (result["status"], result["migrated"], result["failed"]) == ("completed", 5, 0)
+        assert await is_applied(db, "native_dates")
+        dates = [doc["date"] for doc in await db.notes.find({}).to_list(None)]
+        assert all(isinstance(value, datetime) for value in dates)
+
+    asyncio.run(main())
+
+
+def test_unparseable_days_are_left_as_failures(db):
+    async def main():
+        await db.notes.insert_many([
+            {"id": "good", "userId": "alice", "date": "2024-01-01", "content": "x"},
+            {"id": "bad", "userId": "alice", "date": "not a day", "content": "x"},
+        ])
+        result = await run_migration(db, NativeDates())
+        assert (result["status"], result["migrated"], result["failed"]) == ("completed", 1, 1)
+        assert (await db.notes.find_one({"id": "bad"}))["date"] == "not a day"
+
+    asyncio.run(main())
+
+
+def test_symptom_tags_are_lowercased(db):
+    async def main():
+        await db.symptoms.insert_many([
+            {"id": "mixed", "userId": "alice", "date": "2024-01-01", "symptoms": ["Back_Pain", "back_pain", "Cramps"]},
+            {"id": "lower", "userId": "alice", "date": "2024-01-02", "symptoms": ["headache"]},
+        ])
+        result = await run_migration(db, LowercaseTags())
+        assert (result["status"], result["migrated"], result["failed"]) == ("completed", 1, 0)
+        assert (await db.symptoms.find_one({"id": "mixed"}))["symptoms"] == ["back_pain", "cramps"]
+
+    asyncio.run(main())
@@ -0,0 +1,62 @@
+import asyncio
+
+import server
+
+
+def test_cycle_write_during_predictor_load_is_not_lost(app, auth):
+    async def main():
+        async with app() as client:
+            headers = auth("alice")
+            await client.post("/api/cycles", json={"startDate": "2024-01-01"}, headers=headers)
+
+            # Hold the predictor's first read of the history until a cycle write has landed
+            cycles = server.db.cycles
+            find, reads, release = cycles.find, [], asyncio.Event()
+
+            class HeldCursor:
+                def __init__(self, cursor):
+                    self.cursor = cursor
+
+                async def to_list(self, length):
+                    docs = await self.cursor.to_list(length)
+                    reads.append(len(docs))
+                    if len(reads) == 1:
+                        await release.wait()
+                    return docs
+
+            cycles.find = lambda *args, **kwargs: HeldCursor(find(*args, **kwargs))
+            try:
+                first = asyncio.ensure_future(client.get("/api/predictions", headers=headers))
+                while not reads:
+                    await asyncio.sleep(0.01)
+                await client.post("/api/cycles", json={"startDate": "2024-01-29"}, headers=headers)
+                release.set()
+                await first
+            finally:
+                del cycles.find
+
+            predictions = (await client.get("/api/predictions", headers=headers)).json()
+            assert reads == [1, 2]
+            assert predictions["sampleSize"] == 1
+            assert predictions["nextPeriod"] == "2024-02-26"
+            assert server._predictor_writes == {}
+
+    asyncio.run(main())
+
+
+def test_bulk_create_refreshes_the_loaded_predictor(app, auth):
+    async def main():
+        async with app() as client:
+            headers = auth("alice")
+            await client.post("/api/cycles", json={"startDate": "2024-01-01"}, headers=headers)
+            assert (await client.get("/api/predictions", headers=headers)).json()["sampleSize"] == 0
+
+            items = [{"startDate": day} for day in ["2024-01-29", "2024-02-26", "2024-03-25"]]
+            response = await client.post("/api/cycles/bulk", json=items, headers=headers)
+            assert response.json()["succeeded"] == 3
+
+            predictions = (await client.get("/api/predictions", headers=headers)).json()
+            assert predictions["sampleSize"] == 3
+            assert predictions["nextPeriod"] == "2024-04-22"
+
+    asyncio.run(main())
@@ -0,0 +1,90 @@
+import asyncio
+from datetime import datetime
+
+from batch import REMINDERS_JOB, load_checkpoint, run_reminders
+from reminders import ReminderScheduler, ReminderSink, load_inputs, next_reminder
+
+PREDICTIONS = {
+    "nextPeriod": "2024-03-01",
+    "ovulation": "2024-02-16",
+    "fertileWindow": {"start": "2024-02-11", "end": "2024-02-17"},
+}
+
+
+def test_next_reminder_is_the_earliest_enabled_kind():
+    now = datetime(2024, 2, 1)
+    assert next_reminder(PREDICTIONS, None, now) == {
+        "kind": "ovulationReminders", "day": "2024-02-16", "fireAt": datetime(2024, 2, 15, 9),
+    }
+    fertile = next_reminder(PREDICTIONS, {"fertileWindow": True}, now)
+    assert (fertile["kind"], fertile["fireAt"]) == ("fertileWindow", datetime(2024, 2, 11, 9))
+    daily = next_reminder(PREDICTIONS, {"dailyCheck": True}, datetime(2024, 2, 1, 10))
+    assert (daily["kind"], daily["fireAt"]) == ("dailyCheck", datetime(2024, 2, 2, 9))
+    assert next_reminder(PREDICTIONS, {"periodReminders": False, "ovulationReminders": False}, now) is None
+
+
+class Collect(ReminderSink):
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, reminder: dict) -> None:
+        self.sent.append(reminder)
+
+
+def test_due_reminder_is_sent_once_across_schedulers(db):
+    async def load(user_id):
+        return PREDICTIONS, None
+
+    async def main():
+        sink = Collect()
+        first, second = ReminderScheduler(db, sink, load), ReminderScheduler(db, sink, load)
+        reminder = await first.reschedule("alice", now=datetime(2024, 2, 1))
+        fire_at = reminder["fireAt"]
+
+        await asyncio.gather(first._fire("alice", fire_at, fire_at), second._fire("alice", fire_at, fire_at))
+        assert [sent["kind"] for sent in sink.sent] == ["ovulationReminders"]
+        assert await db.reminders.count_documents({}) == 0
+
+    asyncio.run(main())
+
+
+def test_refill_loads_a_window_one_page_at_a_time(db):
+    async def load(user_id):
+        return None, None
+
+    async def main():
+        fire_at = datetime(2024, 2, 1, 9)
+        await db.reminders.insert_many([{"userId": f"user-{i}", "kind": "dailyCheck", "day": "2024-02-01",
+                                         "fireAt": fire_at} for i in range(5)])
+        scheduler = ReminderScheduler(db, Collect(), load, page_size=2)
+        now = datetime(2024, 2, 1, 8, 55)
+
+        await scheduler._refill(now)
+        assert sorted(scheduler._queued) == ["user-0", "user-1"]
+        assert not scheduler._needs_refill(now)
+        # Sent reminders make room for the next page, after the same fire time
+        for user_id in ["user-0", "user-1"]:
+            del scheduler._queued[user_id]
+        assert scheduler._needs_refill(now)
+        await scheduler._refill(now)
+        await scheduler._refill(now)
+        assert sorted(scheduler._queued) == [f"user-{i}" for i in range(2, 5)]
+        assert scheduler._loaded_to is None and not scheduler._needs_refill(now)
+
+    asyncio.run(main())
+
+
+def test_backfill_schedules_users_who_never_wrote(db):
+    async def main():
+        await db.cycles.insert_many([{"id": f"c-{user}-{start}", "userId": user, "startDate": start}
+                                     for user in ["alice", "bob"] for start in ["2024-01-01", "2024-01-29"]])
+        # Only alice has a reminder after now, bob's predictions are long past
+        await db.preferences.insert_one({"userId": "alice", "notifications": {"dailyCheck": True}})
+        scheduler = ReminderScheduler(db, Collect(), lambda user_id: load_inputs(db, user_id))
+
+        summary = await run_reminders(db, page_size=1, scheduler=scheduler)
+        assert (summary["processed"], summary["scheduled"], summary["failed"]) == (2, 1, 0)
+        assert [doc["userId"] async for doc in db.reminders.find()] == ["alice"]
+        assert (await load_checkpoint(db, REMINDERS_JOB))["status"] == "completed"
+
+    asyncio.run(main())
@@ -0,0 +1,63 @@
+import asyncio
+
+from search import normalize_tags, query_terms, search
+
+
+class _NoNotes:
+    """Notes collection finding nothing: mongomock cannot run $text queries."""
+
+    def find(self, *args, **kwargs):
+        return self
+
+    def sort(self, *args, **kwargs):
+        return self
+
+    def limit(self, *args, **kwargs):
+        return self
+
+    async def to_list(self, length):
+        return []
+
+
+class _SymptomsOnly:
+    def __init__(self, db):
+        self.symptoms = db.symptoms
+        self.notes = _NoNotes()
+
+
+def test_terms_and_tags_ignore_case():
+    assert query_terms("Back PAIN -cramps") == ["back", "pain"]
+    assert normalize_tags(["Back_Pain", "headache", "HEADACHE"]) == ["back_pain", "headache"]
+
+
+def test_best_symptom_match_ranks_first_even_if_older(db):
+    async def main():
+        await db.symptoms.insert_many([
+            {"id": f"recent-{day}", "userId": "alice", "date": f"2024-02-0{day}", "symptoms": ["headache"]}
+            for day in range(1, 4)
+        ])
+        await db.symptoms.insert_one({"id": "old", "userId": "alice", "date": "2024-01-01",
+                                      "symptoms": ["back_pain", "headache"]})
+
+        page = await search(_SymptomsOnly(db), "alice", "head pain", limit=1)
+        assert [(hit["id"], hit["score"]) for hit in page["items"]] == [("old", 1.0)]
+        assert page["next"] == 1
+
+        page = await search(_SymptomsOnly(db), "alice", "BACK")
+        assert [hit["id"] for hit in page["items"]] == ["old"]
+
+    asyncio.run(main())
+
+
+def test_tags_are_stored_lowercase(app, auth):
+    async def main():
+        async with app() as client:
+            headers = auth("alice")
+            created = await client.post("/api/symptoms", json={"date": "2024-01-01", "symptoms": ["Cramps", "cramps"]},
+                                        headers=headers)
+            assert created.json()["symptoms"] == ["cramps"]
+            updated = await client.patch(f"/api/symptoms/{created.json()['id']}", json={"symptoms": ["Back_Pain"]},
+                                       headers=headers)
+            assert updated.json()["symptoms"] == ["back_pain"]
+
+    asyncio.run(main())
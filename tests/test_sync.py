@@ -0,0 +1,38 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from sync import encode_token
+
+
+def test_deletes_reach_the_next_sync_as_tombstones(app, auth):
+    async def main():
+        async with app() as client:
+            alice, bob = auth("alice"), auth("bob")
+            kept = (await client.post("/api/notes", json={"date": "2024-01-01", "content": "kept"}, headers=alice)).json()
+            gone = (await client.post("/api/notes", json={"date": "2024-01-02", "content": "gone"}, headers=alice)).json()
+
+            full = (await client.get("/api/sync", headers=alice)).json()
+            assert {note["id"] for note in full["notes"]["upserted"]} == {kept["id"], gone["id"]}
+            assert full["notes"]["deleted"] == []
+            bob_token = (await client.get("/api/sync", headers=bob)).json()["next"]
+
+            assert (await client.delete(f"/api/notes/{gone['id']}", headers=alice)).status_code == 200
+
+            delta = (await client.get("/api/sync", params={"since": full["next"]}, headers=alice)).json()
+            assert delta["notes"]["deleted"] == [gone["id"]]
+            assert delta["cycles"]["deleted"] == [] and delta["symptoms"]["deleted"] == []
+            # Another user's deletes are not theirs to see
+            other = (await client.get("/api/sync", params={"since": bob_token}, headers=bob)).json()
+            assert other["notes"]["deleted"] == []
+
+    asyncio.run(main())
+
+
+def test_token_older_than_tombstone_retention_is_rejected(app, auth):
+    async def main():
+        async with app() as client:
+            since = encode_token({"tombstones": (datetime.utcnow() - timedelta(days=365), "")})
+            response = await client.get("/api/sync", params={"since": since}, headers=auth("alice"))
+            assert response.status_code == 410
+
+    asyncio.run(main())
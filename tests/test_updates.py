@@ -0,0 +1,43 @@
+import asyncio
+
+import server
+
+
+def test_updates_finishing_out_of_order_leave_no_stale_cache_entry(app, auth):
+    async def main():
+        async with app() as client:
+            headers = auth("alice")
+            cycle = (await client.post("/api/cycles", json={"startDate": "2024-01-01"}, headers=headers)).json()
+            url = f"/api/cycles/{cycle['id']}"
+            await client.get(url, headers=headers)
+
+            # The first update to reach Mongo is the last to return
+            cycles = server.db.cycles
+            update, first_done, second_done = cycles.find_one_and_update, asyncio.Event(), asyncio.Event()
+
+            async def reordered(*args, **kwargs):
+                previous = await update(*args, **kwargs)
+                if not first_done.is_set():
+                    first_done.set()
+                    await second_done.wait()
+                else:
+                    second_done.set()
+                return previous
+
+            cycles.find_one_and_update = reordered
+            try:
+                first = asyncio.ensure_future(client.put(url, json={"flow": "light"}, headers=headers))
+                await first_done.wait()
+                second = await client.put(url, json={"flow": "heavy"}, headers=headers)
+                await first
+            finally:
+                del cycles.find_one_and_update
+
+            assert second.json()["flow"] == "heavy"
+            assert (await client.get(url, headers=headers)).json()["flow"] == "heavy"
+
+            # The derived document is marked stale once per update, after the response
+            await asyncio.gather(*server._stale_marks)
+            assert (await server.db.derived.find_one({"userId": "alice"}))["writes"] == 3
+
+    asyncio.run(main())